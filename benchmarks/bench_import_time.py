@@ -0,0 +1,80 @@
+"""
+Startup benchmark: the time of `import nimble_tk` in a fresh interpreter.
+
+Every run starts a new python process, so that nothing is cached in
+`sys.modules`. Reports the median wall time of the import, the heaviest
+modules according to `python -X importtime`, and whether pandas / IPython
+were imported. With `--max-ms`, exits with a non-zero status when the median
+is above the threshold, e.g. to guard against regressions in CI.
+
+Usage:
+    python benchmarks/bench_import_time.py --runs 20 --max-ms 150
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+IMPORT_CODE = '''
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(elapsed_ms, 'pandas' in sys.modules, 'IPython' in sys.modules)
+'''
+
+
+def time_import(module, env):
+    output = subprocess.run([sys.executable, '-c', IMPORT_CODE.format(module=module)],
+                            env=env, capture_output=True, text=True, check=True).stdout
+    elapsed_ms, has_pandas, has_ipython = output.split()[-3:]
+    return float(elapsed_ms), has_pandas == 'True', has_ipython == 'True'
+
+
+def heaviest_imports(module, env, top):
+    """Returns the (cumulative us, module) of the slowest imports, from `-X importtime`."""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            env=env, capture_output=True, text=True, check=True).stderr
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        timings.append((int(cumulative_us), name.rstrip()))
+    return sorted(timings, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--module', default='nimble_tk', help='module to import')
+    parser.add_argument('--runs', type=int, default=10, help='number of fresh interpreters')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest imports listed')
+    parser.add_argument('--eager', action='store_true', help='import everything eagerly (NTK_EAGER_IMPORT=1)')
+    parser.add_argument('--max-ms', type=float, help='fail when the median import time is above this')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.eager:
+        env['NTK_EAGER_IMPORT'] = '1'
+
+    # the first run compiles / warms up the file system cache
+    time_import(args.module, env)
+    results = [time_import(args.module, env) for _ in range(args.runs)]
+    times = [elapsed_ms for elapsed_ms, _, _ in results]
+    _, has_pandas, has_ipython = results[-1]
+
+    print(f'import {args.module}: median {statistics.median(times):.1f} ms, '
+          f'min {min(times):.1f} ms, max {max(times):.1f} ms over {args.runs} runs')
+    print(f'imports pandas: {has_pandas}, imports IPython: {has_ipython}')
+    print('\nslowest imports (cumulative):')
+    for cumulative_us, name in heaviest_imports(args.module, env, args.top):
+        print(f'{cumulative_us / 1000:10.1f} ms  {name}')
+
+    if args.max_ms is not None and statistics.median(times) > args.max_ms:
+        print(f'\nFAILED: median import time is above {args.max_ms} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
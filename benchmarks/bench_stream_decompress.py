@@ -0,0 +1,69 @@
+"""
+Throughput benchmark for the streaming decompression in nimble_tk.linux.
+
+Compares reading the lines of a gzip file through a pipe and decompressing them 
+in python with `stream_gzip_decompress`, against decompressing them with 
+`gzip -dc` and reading the plain lines through a pipe.
+
+Usage:
+    python benchmarks/bench_stream_decompress.py --size-mb 200
+"""
+import argparse
+import gzip
+import os
+import subprocess
+import tempfile
+import time
+
+import nimble_tk as ntk
+
+
+def make_input(path, size_mb):
+    line = b'2023-12-09 11:10:43,268,some_column_value,12345.678,another value\n'
+    block = line * (1024 * 1024 // len(line))
+    with gzip.open(path, 'wb', compresslevel=1) as writer:
+        for _ in range(size_mb):
+            writer.write(block)
+
+
+def consume(lines_iter):
+    lines, size = 0, 0
+    for line in lines_iter:
+        lines += 1
+        size += len(line)
+    return lines, size
+
+
+def bench_python_decompress(path):
+    p = subprocess.Popen(f'cat {path}', stdout=subprocess.PIPE, shell=True)
+    result = consume(ntk.stream_gzip_decompress(ntk.iter_blocks(p.stdout)))
+    p.wait()
+    return result
+
+
+def bench_gzip_pipe(path):
+    lines_iter, p = ntk.run_command_return_iter(f'gzip -dc {path}', log=False)
+    result = consume(lines_iter)
+    p.wait()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size-mb', type=int, default=100, help='uncompressed size of the input')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'input.gz')
+        make_input(path, args.size_mb)
+
+        for name, bench in [('python stream_gzip_decompress', bench_python_decompress),
+                            ('gzip -dc | pipe', bench_gzip_pipe)]:
+            start = time.perf_counter()
+            lines, size = bench(path)
+            elapsed = time.perf_counter() - start
+            print(f'{name:35s} {elapsed:7.2f}s {size / elapsed / 1024 / 1024:8.1f} MB/s ({lines} lines)')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,109 @@
 
+import os
+import sys
+import importlib
+import importlib.abc
+import importlib.util
+
 from .common import *
-from .notebook import *
-from .analytics.pandas_utils import *
-from .analytics.string_utils import *
 from .tasks.schedulers import *
 from .tasks.concurrent import *
 from .linux import *
+
+# The modules below import pandas and IPython, which take most of the time of
+# `import nimble_tk`. They are loaded on first access of one of their names
+# (PEP 562), e.g. `ntk.df_display`. The names are listed statically so that a
+# lookup does not need to import the modules; a test checks that they match.
+# On conflicts, later modules win, as with the star imports they replace.
+_LAZY_MODULES = {
+    'notebook.display': [
+        'DataFrame', 'DataFrameViewer', 'bold', 'breakline', 'df_browse', 'df_display', 'display_image',
+        'h1', 'h2', 'h3', 'h4', 'h5', 'html', 'html_kv', 'np', 'pd', 're', 'special_char_regex',
+    ],
+    'analytics.pandas_utils': [
+        'LookupTable', 'df_remove_tz_info', 'df_reverse_sort_values', 'df_to_lookup', 'df_to_map',
+        'flattened_columns', 'idx_outer_merge', 'idx_outer_merge_all', 'importlib', 'infer_dtypes', 'map_attr',
+        'mcut', 'memory_report', 'namedtuple', 'np', 'optimize_dtypes', 'os', 'pd', 'read_csv_optimized',
+        'remove_tz_info', 'split', 'sr_reverse_sort_values', 'value_counts_perc', 'write_dfs_to_excel',
+    ],
+    'analytics.string_utils': [
+        'format_spoken', 'format_spoken_indian',
+    ],
+}
+
+_lazy_names = {name: module for module, names in _LAZY_MODULES.items() for name in names}
+_LAZY_SUBPACKAGES = ['analytics', 'notebook']
+
+# modules registering the DataFrame / Series extensions (df.rsort, df.show, ...)
+_PANDAS_EXTENSION_MODULES = ['analytics.pandas_utils', 'notebook.display']
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBPACKAGES:
+        return importlib.import_module(f'{__name__}.{name}')
+    module = _lazy_names.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'{__name__}.{module}'), name)
+    # cache it, later lookups do not go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_names) | set(_LAZY_SUBPACKAGES))
+
+
+def _register_pandas_extensions():
+    for module in _PANDAS_EXTENSION_MODULES:
+        try:
+            importlib.import_module(f'{__name__}.{module}')
+        except Exception:
+            log_traceback(f'Error while registering the pandas extensions of {module}')
+
+
+class _PandasImportHook(importlib.abc.MetaPathFinder):
+    """
+    Registers the pandas extensions right after pandas is imported, so that
+    `df.rsort()` etc. work without importing pandas in `import nimble_tk`.
+    """
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname != 'pandas':
+            return None
+        # one shot: find the real spec with the remaining finders
+        _remove_pandas_import_hook()
+        spec = importlib.util.find_spec(fullname)
+        if spec is None or spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+            return spec
+        exec_module = spec.loader.exec_module
+
+        def exec_module_and_register(module):
+            exec_module(module)
+            _register_pandas_extensions()
+
+        spec.loader.exec_module = exec_module_and_register
+        return spec
+
+
+_pandas_import_hook = _PandasImportHook()
+
+
+def _remove_pandas_import_hook():
+    try:
+        sys.meta_path.remove(_pandas_import_hook)
+    except ValueError:
+        pass
+
+
+if os.environ.get('NTK_EAGER_IMPORT', '').lower() in ('1', 'true', 'yes'):
+    for _module in _LAZY_MODULES:
+        globals().update({name: getattr(importlib.import_module(f'{__name__}.{_module}'), name)
+                          for name in _LAZY_MODULES[_module]})
+elif 'pandas' in sys.modules:
+    _register_pandas_extensions()
+else:
+    sys.meta_path.insert(0, _pandas_import_hook)
+
+# `from nimble_tk import *` exports the lazy names too (and so imports pandas)
+__all__ = sorted({name for name in globals() if not name.startswith('_')} | set(_lazy_names))
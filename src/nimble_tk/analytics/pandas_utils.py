@@ -1,3 +1,6 @@
+import os
+import importlib.util
+import numpy as np
 import pandas as pd
 from nimble_tk import common
 from collections import namedtuple
@@ -34,19 +37,24 @@ def split(self, n_parts=None, n_rows_per_split=None, ratio=None):
 pd.DataFrame.split = split
 
 
-def flattened_columns(self, separator='_'):
+def flattened_columns(self, separator='_', inplace=False):
     """
     flatten or collapse multi-level columns
+
+    Returns a shallow copy with the new column names, the data is not copied.
+    With inplace=True, the columns of the frame are renamed and None is returned.
     """
     cols = []
     for col in self.columns.values:
-        # print(col)
-        if type(col) == str:
+        if type(col) != tuple:
             cols.append(col)
         else:
-            col = [col1 for col1 in col if col1]
+            col = [str(col1) for col1 in col if col1]
             cols.append(separator.join(col).strip())
-    df_copy = self.copy()
+    if inplace:
+        self.columns = cols
+        return None
+    df_copy = self.copy(deep=False)
     df_copy.columns = cols
     return df_copy
 
@@ -153,12 +161,14 @@ def write_dfs_to_excel(dfs_map:dict[str, pd.DataFrame], file_name:str,
                             datetime_format='mmm d yyyy hh:mm:ss', date_format='mmm dd yyyy')
     workbook = writer.book
     num_format = workbook.add_format(
-        {'num_format': '[>9999999]##\,##\,##\,##0; [>99999]##\,##\,##0; ##,##0'})
+        {'num_format': r'[>9999999]##\,##\,##\,##0; [>99999]##\,##\,##0; ##,##0'})
     percent_fmt = workbook.add_format({'num_format': '0.00%'})
     text_format = workbook.add_format({'num_format': '@'})
+    # excel does not support timezones
+    dfs_map = {sheet: df.remove_tz_info() for sheet, df in dfs_map.items()}
     for sheet, df in dfs_map.items():
         common.log_info(f"Write to excel - writing sheet - {sheet}")
-        df.to_excel(writer, sheet, index=index)
+        df.to_excel(writer, sheet_name=sheet, index=index)
 
     for sheet, df in dfs_map.items():
 
@@ -202,23 +212,234 @@ def write_dfs_to_excel(dfs_map:dict[str, pd.DataFrame], file_name:str,
 
 
 def df_to_map(self, key_col, value_col):
-    return self[[key_col, value_col]].set_index(key_col).to_dict()[value_col]
+    """
+    Returns a dict of the values of `value_col` by the values of `key_col`. For
+    duplicate keys, the last value wins.
+    """
+    return dict(zip(self[key_col].tolist(), self[value_col].tolist()))
 
 
 pd.DataFrame.to_map = df_to_map
 
 
-def remove_tz_info(self):
-    c_series = self.copy(deep=True)
-    c_series.index = c_series
-    return c_series.tz_localize(None).values
+class LookupTable:
+    """
+    A compact, read-only map of keys to values for vectorized lookups, e.g. of
+    tens of millions of keys where a dict would take several GBs.
+
+    Numbers and datetimes are stored in a sorted numpy array and looked up in
+    batches with `searchsorted`, the values in a numpy array in the same order,
+    so that both arrays can be saved and memory mapped by other processes
+    (e.g. the workers of `run_concurrently`) without copies. Strings are kept
+    as python objects and looked up with the hash table of a `pd.Index`, as a
+    fixed width unicode array would take the width of the longest key for
+    every key. Instances can also be pickled.
+
+    Sample code
+    >>> lookup = df_users.to_lookup('USER_ID', 'COUNTRY')
+    >>> df_events['COUNTRY'] = lookup.get(df_events['USER_ID'])
+    >>> lookup.save('/tmp/country_lookup')
+    >>> lookup = ntk.LookupTable.load('/tmp/country_lookup')
+    """
+
+    def __init__(self, keys, values):
+        """
+        Args:
+            keys (array-like): Numbers, datetimes or strings. For duplicate keys,
+                the last value wins, as with `df.to_map`.
+            values (array-like): The values, in the order of the keys.
+        """
+        keys = self._key_array(keys)
+        # through a Series, so that e.g. a list of tuples gives a 1d array of objects
+        values = pd.Series(values).to_numpy()
+        if len(keys) != len(values):
+            raise ValueError(f'Got {len(keys)} keys and {len(values)} values')
+        self._index = None
+        if keys.dtype == object:
+            last = ~pd.Index(keys).duplicated(keep='last')
+            self.keys = keys[last]
+            self.values = values[last]
+            return
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        # the last of every run of equal keys
+        last = np.ones(len(keys), dtype=bool)
+        last[:-1] = keys[1:] != keys[:-1]
+        self.keys = keys[last]
+        self.values = values[order[last]]
+
+    @staticmethod
+    def _key_array(keys):
+        keys = np.asarray(keys)
+        if keys.dtype.kind in 'OU':
+            if not all(isinstance(key, str) for key in keys):
+                raise TypeError('The keys of a LookupTable must be numbers, datetimes or strings')
+            keys = keys.astype(object)
+        return keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getstate__(self):
+        # the hash table is rebuilt on the first lookup
+        return {**self.__dict__, '_index': None}
+
+    def _positions(self, keys):
+        """Returns the positions of the keys in the table, -1 for missing keys."""
+        # through a Series, so that a list of strings and numbers is not all strings
+        keys = keys if isinstance(keys, np.ndarray) else pd.Series(keys).to_numpy()
+        if self.keys.dtype == object or not self._comparable(keys):
+            # keys of other types (e.g. strings in a table of numbers) are missing
+            if self._index is None:
+                self._index = pd.Index(self.keys)
+            return self._index.get_indexer(keys)
+        positions = np.minimum(np.searchsorted(self.keys, keys), max(len(self.keys) - 1, 0))
+        found = self.keys[positions] == keys if len(self.keys) else np.zeros(len(keys), dtype=bool)
+        return np.where(found, positions, -1)
+
+    def _comparable(self, keys):
+        """Whether the keys can be compared with the keys of the table by numpy."""
+        if self.keys.dtype.kind == 'M':
+            return keys.dtype.kind == 'M'
+        return keys.dtype.kind in 'biuf'
+
+    def get(self, keys, default=None):
+        """
+        Looks up a batch of keys.
+
+        Args:
+            keys (array-like): The keys. A Series gives a Series with its index.
+            default (optional): Value of missing keys. Defaults to the missing
+                value of the dtype of the values (e.g. NaN for numbers, which
+                makes integer values float).
+
+        Returns:
+            np.ndarray or pd.Series: The values.
+        """
+        positions = self._positions(keys.to_numpy() if isinstance(keys, pd.Series) else keys)
+        values = pd.api.extensions.take(self.values, positions, allow_fill=True, fill_value=default)
+        if isinstance(keys, pd.Series):
+            return pd.Series(values, index=keys.index, name=keys.name)
+        return values
+
+    def __getitem__(self, key):
+        position = self._positions([key])[0]
+        if position < 0:
+            raise KeyError(key)
+        return self.values[position]
+
+    def __contains__(self, key):
+        return self._positions([key])[0] >= 0
+
+    def save(self, path: str) -> None:
+        """
+        Saves the table as the numpy files keys.npy and values.npy in the given
+        directory.
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'keys.npy'), self.keys, allow_pickle=True)
+        np.save(os.path.join(path, 'values.npy'), self.values, allow_pickle=True)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'LookupTable':
+        """
+        Loads a table saved with `save`.
+
+        Args:
+            path (str): The directory of the table.
+            mmap (bool): Whether to memory map the arrays instead of reading them.
+                Arrays of objects (string keys, string or mixed values) are
+                pickled, and always read.
+        """
+        table = cls.__new__(cls)
+        table._index = None
+        table.keys = cls._load_array(os.path.join(path, 'keys.npy'), mmap)
+        table.values = cls._load_array(os.path.join(path, 'values.npy'), mmap)
+        return table
+
+    @staticmethod
+    def _load_array(file_path, mmap):
+        try:
+            return np.load(file_path, mmap_mode='r' if mmap else None)
+        except ValueError:
+            # arrays of objects are pickled, and can not be memory mapped
+            return np.load(file_path, allow_pickle=True)
+
+
+def df_to_lookup(self, key_col, value_col) -> LookupTable:
+    """
+    Returns a `LookupTable` of the values of `value_col` by the values of `key_col`.
+    """
+    return LookupTable(self[key_col].to_numpy(), self[value_col].to_numpy())
+
+
+pd.DataFrame.to_lookup = df_to_lookup
+
+
+def _remove_tz(values, wall_time):
+    """Removes the timezone of tz-aware datetimes (a Series or DatetimeIndex)."""
+    accessor = values.dt if isinstance(values, pd.Series) else values
+    # tz_convert(None) keeps the underlying UTC int64 data as it is, without a copy
+    return accessor.tz_localize(None) if wall_time else accessor.tz_convert(None)
+
+
+def remove_tz_info(self, wall_time=True):
+    """
+    Removes the timezone of a tz-aware datetime series, e.g. before an export
+    to formats without timezones. Other series are returned as they are.
+
+    Args:
+        wall_time (bool, optional): Whether to keep the local (wall clock) times
+            of the timezone, else the times are converted to UTC, which does not
+            copy the data.
+
+    Returns:
+        pd.Series: The naive datetimes, with the index of the series.
+    """
+    if not isinstance(self.dtype, pd.DatetimeTZDtype):
+        return self
+    return _remove_tz(self, wall_time)
 
 
 pd.Series.remove_tz_info = remove_tz_info
 
 
+def df_remove_tz_info(self, wall_time=True, inplace=False):
+    """
+    Removes the timezone of all tz-aware datetime columns (and of the index),
+    see `Series.remove_tz_info`.
+
+    Args:
+        wall_time (bool, optional): See `Series.remove_tz_info`.
+        inplace (bool, optional): Whether to replace the columns of the frame,
+            else a shallow copy is returned.
+
+    Returns:
+        pd.DataFrame: The frame with naive datetimes, or None if inplace.
+    """
+    df = self if inplace else self.copy(deep=False)
+    for i, dtype in enumerate(self.dtypes):
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            naive = _remove_tz(self.iloc[:, i], wall_time)
+            if self.columns.is_unique:
+                df[self.columns[i]] = naive
+            else:
+                # by position, for duplicate column names (pandas >= 1.5)
+                df.isetitem(i, naive)
+    if isinstance(self.index.dtype, pd.DatetimeTZDtype):
+        df.index = _remove_tz(self.index, wall_time)
+    return None if inplace else df
+
+
+pd.DataFrame.remove_tz_info = df_remove_tz_info
+
+
 def map_attr(self, value_map, attr):
     dummy = namedtuple('dummy', [attr])
+    if isinstance(value_map, LookupTable):
+        values = value_map.values
+        return pd.Series([getattr(values[position], attr) if position >= 0 else None
+                          for position in value_map._positions(self.to_numpy())], name=attr, index=self.index)
     mapped_values = []
     for value in self.values:
         mapped_object = value_map.get(value)
@@ -229,5 +450,286 @@ pd.Series.map_attr = map_attr
 
 
 def idx_outer_merge(self, df_other, **kwargs):
+    """
+    Outer merge of two frames on their indexes.
+
+    When both indexes are unique, the frames are aligned with `join`, which
+    is much faster than the general `merge` with the same result.
+    """
+    if not kwargs.keys() - {'suffixes'} and self.index.is_unique and df_other.index.is_unique:
+        lsuffix, rsuffix = kwargs.get('suffixes', ('_x', '_y'))
+        return self.join(df_other, how='outer', lsuffix=lsuffix or '', rsuffix=rsuffix or '')
     return self.merge(df_other, left_index=True, right_index=True, how='outer', **kwargs)
 pd.DataFrame.idx_outer_merge = idx_outer_merge
+
+
+def idx_outer_merge_all(dfs):
+    """
+    Outer merge of many frames on their indexes, e.g. of daily feature frames.
+
+    When all indexes are unique and no column name repeats, the frames are
+    aligned in one pass with `pd.concat(axis=1)`, instead of merging them one
+    by one, which copies the growing result for every frame. Otherwise the
+    frames are merged one by one with `idx_outer_merge`.
+
+    Args:
+        dfs (list): The DataFrames. An empty list raises a ValueError, as with
+            `pd.concat`.
+
+    Returns:
+        pd.DataFrame: The merged frame, with the union of the indexes, sorted.
+    """
+    dfs = list(dfs)
+    if not dfs:
+        raise ValueError('No frames to merge')
+    columns = [col for df in dfs for col in df.columns]
+    if all(df.index.is_unique for df in dfs) and len(set(columns)) == len(columns):
+        return pd.concat(dfs, axis=1, join='outer', sort=True)
+    df_merged = dfs[0]
+    for df in dfs[1:]:
+        df_merged = df_merged.idx_outer_merge(df)
+    return df_merged
+
+
+
+_UNSIGNED_INT_DTYPES = [np.dtype('uint8'), np.dtype('uint16'), np.dtype('uint32'), np.dtype('uint64')]
+_SIGNED_INT_DTYPES = [np.dtype('int8'), np.dtype('int16'), np.dtype('int32'), np.dtype('int64')]
+
+
+def _smallest_int_dtype(min_value, max_value) -> np.dtype:
+    """Returns the smallest integer dtype which can hold the given range of values."""
+    for dtype in (_UNSIGNED_INT_DTYPES if min_value >= 0 else _SIGNED_INT_DTYPES):
+        info = np.iinfo(dtype)
+        if info.min <= min_value and max_value <= info.max:
+            return dtype
+    return np.dtype('int64')
+
+
+def _has_pyarrow() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _suggest_dtype(series: pd.Series, category_threshold: float = 0.5,
+                   downcast_floats: bool = True, pyarrow_strings: bool = True) -> tuple:
+    """
+    Suggests a lossless conversion of a series to a smaller dtype:
+    integers to the smallest integer type holding their range, floats to float32
+    when every value round-trips exactly, strings/objects with few distinct
+    values to category, and other strings to string[pyarrow].
+
+    Args:
+        series (pd.Series): The series.
+        category_threshold (float): Max ratio of distinct values to rows for a
+            conversion to category.
+        downcast_floats (bool): Whether to consider float32 for floats.
+        pyarrow_strings (bool): Whether to consider string[pyarrow] for strings,
+            when pyarrow is installed.
+
+    Returns:
+        tuple: (suggested dtype or None, projected bytes after the conversion,
+        current bytes). Byte counts are deep and exclude the index.
+    """
+    current_bytes = int(series.memory_usage(deep=True, index=False))
+    num_rows, dtype = len(series), series.dtype
+    if not num_rows or not isinstance(dtype, np.dtype) and not pd.api.types.is_string_dtype(dtype):
+        return None, current_bytes, current_bytes
+
+    if pd.api.types.is_bool_dtype(dtype):
+        pass
+    elif pd.api.types.is_integer_dtype(dtype):
+        smallest = _smallest_int_dtype(series.min(), series.max())
+        if smallest.itemsize < dtype.itemsize:
+            return smallest.name, num_rows * smallest.itemsize, current_bytes
+    elif pd.api.types.is_float_dtype(dtype):
+        values = series.to_numpy()
+        if downcast_floats and dtype.itemsize > 4 and \
+                np.array_equal(values.astype('float32').astype(dtype), values, equal_nan=True):
+            return 'float32', num_rows * 4, current_bytes
+    elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        try:
+            uniques = series.drop_duplicates()
+        except TypeError:
+            # unhashable values, e.g. lists
+            return None, current_bytes, current_bytes
+        if len(uniques) <= category_threshold * num_rows:
+            codes_dtype = _smallest_int_dtype(-1, len(uniques))
+            projected_bytes = num_rows * codes_dtype.itemsize + int(uniques.memory_usage(deep=True, index=False))
+            if projected_bytes < current_bytes:
+                return 'category', projected_bytes, current_bytes
+        if pyarrow_strings and str(dtype) != 'string[pyarrow]' and _has_pyarrow() and \
+                pd.api.types.infer_dtype(series, skipna=True) == 'string':
+            # utf-8 data, 32 bit offsets and a validity bitmap
+            projected_bytes = int(series.str.len().sum()) + 4 * (num_rows + 1) + (num_rows + 7) // 8
+            if projected_bytes < current_bytes:
+                return 'string[pyarrow]', projected_bytes, current_bytes
+    return None, current_bytes, current_bytes
+
+
+def memory_report(self, category_threshold: float = 0.5) -> pd.DataFrame:
+    """
+    Reports the deep memory usage of every column (and of the index), with a
+    suggested lossless conversion to a smaller dtype and the projected savings.
+
+    Sample code
+    >>> df.memory_report().rsort('BYTES').display()
+
+    Args:
+        category_threshold (float): Max ratio of distinct values to rows for
+            suggesting a conversion to category. Defaults to 0.5.
+
+    Returns:
+        pd.DataFrame: One row per column, with the columns COLUMN, DTYPE, BYTES,
+        SUGGESTED_DTYPE, PROJECTED_BYTES and SAVINGS_BYTES.
+    """
+    index_bytes = int(self.index.memory_usage(deep=True))
+    rows = [('Index', str(self.index.dtype), index_bytes, None, index_bytes)]
+    for position, column in enumerate(self.columns):
+        series = self.iloc[:, position]
+        suggested_dtype, projected_bytes, current_bytes = _suggest_dtype(series, category_threshold)
+        rows.append((column, str(series.dtype), current_bytes, suggested_dtype, projected_bytes))
+    df_report = pd.DataFrame(rows, columns=['COLUMN', 'DTYPE', 'BYTES', 'SUGGESTED_DTYPE', 'PROJECTED_BYTES'])
+    df_report['SAVINGS_BYTES'] = df_report.BYTES - df_report.PROJECTED_BYTES
+    return df_report
+
+
+pd.DataFrame.memory_report = memory_report
+
+
+def infer_dtypes(df: pd.DataFrame, category_threshold: float = 0.5, downcast_floats: bool = False,
+                 pyarrow_strings: bool = True) -> dict:
+    """
+    Infers the smallest lossless dtypes of the columns of a DataFrame (see
+    `df.optimize_dtypes`), e.g. from a sample of a bigger dataset.
+
+    Returns:
+        dict: Column -> suggested dtype, for the columns which can be converted.
+    """
+    schema = {}
+    for position, column in enumerate(df.columns):
+        suggested_dtype, _, _ = _suggest_dtype(df.iloc[:, position], category_threshold,
+                                               downcast_floats, pyarrow_strings)
+        if suggested_dtype:
+            schema[column] = suggested_dtype
+    return schema
+
+
+def optimize_dtypes(self, category_threshold: float = 0.5, downcast_floats: bool = False,
+                    pyarrow_strings: bool = True, log: bool = True) -> pd.DataFrame:
+    """
+    Converts the columns to smaller dtypes, without losing information:
+    - integers to the smallest (unsigned) integer type holding their range
+    - floats to float32, if `downcast_floats` and every value round-trips exactly
+    - strings/objects with few distinct values to category
+    - other strings to string[pyarrow], if pyarrow is installed
+
+    Sample code
+    >>> df = pd.read_sql(query, conn).optimize_dtypes()
+
+    Args:
+        category_threshold (float): Max ratio of distinct values to rows for a
+            conversion to category. Defaults to 0.5.
+        downcast_floats (bool): Whether to convert floats to float32. Defaults to
+            False, as later arithmetic is done in float32 precision.
+        pyarrow_strings (bool): Whether to convert strings to string[pyarrow].
+            Defaults to True.
+        log (bool): Whether to log the bytes saved. Defaults to True.
+
+    Returns:
+        pd.DataFrame: The converted DataFrame.
+    """
+    schema = infer_dtypes(self, category_threshold, downcast_floats, pyarrow_strings)
+    df_optimized = self.astype(schema)
+    if log:
+        _log_bytes_saved('optimize_dtypes', self.memory_usage(deep=True).sum(),
+                         df_optimized.memory_usage(deep=True).sum())
+    return df_optimized
+
+
+pd.DataFrame.optimize_dtypes = optimize_dtypes
+
+
+def _log_bytes_saved(label, bytes_before, bytes_after, extra=''):
+    saved = bytes_before - bytes_after
+    percent = 100 * saved / bytes_before if bytes_before else 0
+    common.log_info(f'{label} - {common.format_bytes(bytes_before)} -> {common.format_bytes(bytes_after)}, '
+                    f'saved {common.format_bytes(saved)} ({percent:.1f}%){extra}')
+
+
+def _downcast_numerics(df, downcast_floats):
+    schema = {}
+    for position, column in enumerate(df.columns):
+        series = df.iloc[:, position]
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            suggested_dtype, _, _ = _suggest_dtype(series, downcast_floats=downcast_floats)
+            if suggested_dtype:
+                schema[column] = suggested_dtype
+    return df.astype(schema) if schema else df
+
+
+def _concat_chunks(chunks):
+    """Concatenates chunks, unifying the categories of categorical columns so they stay categorical."""
+    if len(chunks) == 1:
+        return chunks[0]
+    for column in chunks[0].columns:
+        if all(isinstance(chunk[column].dtype, pd.CategoricalDtype) for chunk in chunks):
+            categories = pd.api.types.union_categoricals([chunk[column] for chunk in chunks]).categories
+            for chunk in chunks:
+                chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(chunks)
+
+
+def read_csv_optimized(filepath: str, sample_rows: int = 100000, chunksize: int = None,
+                       category_threshold: float = 0.5, downcast_floats: bool = False,
+                       pyarrow_strings: bool = True, log: bool = True, **kwargs) -> pd.DataFrame:
+    """
+    Reads a CSV file into a DataFrame with optimized dtypes (see `df.optimize_dtypes`)
+    without materializing it with the default dtypes first.
+
+    The dtypes of string columns (category or string[pyarrow]) are inferred from
+    a sample of the first rows and given to the parser. Numeric columns are
+    downcast chunk by chunk after a range check of every chunk, so values beyond
+    the sample can not overflow (concatenation widens the dtype where needed).
+
+    Sample code
+    >>> df = ntk.read_csv_optimized('events.csv.gz', chunksize=ntk.ONE_MILLION)
+
+    Args:
+        filepath (str): Path of the CSV file.
+        sample_rows (int): Number of rows read to infer the dtypes. Defaults to 100000.
+        chunksize (int, optional): If given, the file is read in chunks of that many
+            rows, which bounds the memory used for the default dtypes.
+        category_threshold (float): See `df.optimize_dtypes`.
+        downcast_floats (bool): See `df.optimize_dtypes`.
+        pyarrow_strings (bool): See `df.optimize_dtypes`.
+        log (bool): Whether to log the (estimated) bytes saved.
+        **kwargs: Passed to `pd.read_csv`. A `dtype` dict overrides the inferred dtypes.
+
+    Returns:
+        pd.DataFrame: The DataFrame.
+    """
+    df_sample = pd.read_csv(filepath, nrows=sample_rows, **kwargs)
+    schema = {column: dtype for column, dtype in
+              infer_dtypes(df_sample, category_threshold, downcast_floats, pyarrow_strings).items()
+              if dtype in ('category', 'string[pyarrow]')}
+    dtype = kwargs.pop('dtype', None)
+    if isinstance(dtype, dict):
+        schema.update(dtype)
+    elif dtype is not None:
+        schema = dtype
+
+    if chunksize:
+        with pd.read_csv(filepath, dtype=schema, chunksize=chunksize, **kwargs) as reader:
+            df = _concat_chunks([_downcast_numerics(chunk, downcast_floats) for chunk in reader])
+    else:
+        df = _downcast_numerics(pd.read_csv(filepath, dtype=schema, **kwargs), downcast_floats)
+
+    if log:
+        # the size with the default dtypes is estimated from the sample
+        sample_before = df_sample.memory_usage(deep=True).sum()
+        sample_after = optimize_dtypes(df_sample, category_threshold, downcast_floats, pyarrow_strings,
+                                       log=False).memory_usage(deep=True).sum()
+        bytes_after = df.memory_usage(deep=True).sum()
+        bytes_before = bytes_after * sample_before / sample_after if sample_after else bytes_after
+        _log_bytes_saved(f'read_csv_optimized {filepath}', int(bytes_before), bytes_after,
+                         f' (estimated from a sample of {len(df_sample)} rows)')
+    return df
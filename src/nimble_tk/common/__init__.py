@@ -1,2 +1,6 @@
+from .timers import *
+from .profiling import *
+from .memory import *
+from .ids import *
 from .general_utils import *
 from .files import *
@@ -3,6 +3,16 @@ import pickle
 import pathlib
 import os
 import datetime
+import io
+import mmap
+import gzip
+import bz2
+import time
+import threading
+import copy
+import struct
+import json
+import concurrent.futures
 
 from . import logger
 
@@ -27,13 +37,29 @@ def rmdir(path):
         shutil.rmtree(path)
 
 
-def is_file_recent_enough(file_path: str, max_age_days: int) -> bool:
+def rmdirs(paths: list, max_workers: int = 16) -> None:
+    """
+    Remove the given directories and all their contents, in parallel.
+
+    Parameters:
+    paths (list): The file system paths of the directories to be removed.
+    max_workers (int): Number of directories removed concurrently.
+
+    Returns:
+    None
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(rmdir, paths))
+
+
+def is_file_recent_enough(file_path: str, max_age_days: int, log: bool = True) -> bool:
     """Utility function to check if the given file is older than the given 
     number of days.
 
     Args:
         file_path (str): Path of the file to check
         max_age_days (int): Max age in days beyond which to return False 
+        log (bool, optional): Whether to log the age of the file. Defaults to True.
 
     Returns:
         bool: False if the file is older than the given number of days. 
@@ -46,32 +72,384 @@ def is_file_recent_enough(file_path: str, max_age_days: int) -> bool:
     diff_days = (datetime.datetime.now().timestamp() -
                  last_modified_ts) / (60*60*24)
     if diff_days < max_age_days:
-        logger.log_info(
-            f"File: {file_path} - age_days: {diff_days} - recent enough (required {max_age_days})")
+        if log:
+            logger.log_info(
+                f"File: {file_path} - age_days: {diff_days} - recent enough (required {max_age_days})")
         return True
     else:
-        logger.log_info(
-            f"File: {file_path} - age_days: {diff_days} - not recent enough (required {max_age_days})")
+        if log:
+            logger.log_info(
+                f"File: {file_path} - age_days: {diff_days} - not recent enough (required {max_age_days})")
+        return False
+
+
+def _stat_mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+class FileMtimeIndex:
+    """
+    A small on-disk cache of file modification times, used to avoid 
+    re-stat'ing files in directories which have not changed.
+
+    Modification times are cached per directory, along with the modification 
+    time of the directory itself. As long as the directory's modification time
+    is unchanged, the cached file modification times are trusted, and only 
+    the directory is stat'ed.
+
+    A directory's modification time changes whenever files are created, 
+    deleted or renamed in it, but NOT when an existing file is modified in 
+    place. The index is therefore only correct for files which are replaced 
+    rather than modified, e.g. files written with `write_to_file` (which 
+    renames a temporary file into place) or by tools like `aws s3 sync`.
+
+    Saving the index changes the modification time of its own directory, so
+    files in that directory are always stat'ed. Keep the index outside the 
+    directories it watches.
+
+    Attributes:
+        index_path (str): Path of the JSON file the index is stored in.
+    """
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        # directory -> [directory mtime_ns, {file name: file mtime}]
+        self._dirs = {}
+        if os.path.exists(index_path):
+            with open(index_path) as reader:
+                self._dirs = json.load(reader)
+
+    def get_mtimes(self, paths: list, executor) -> dict:
+        """
+        Returns the modification times of the given files, stat'ing only the
+        files in directories which changed since they were last indexed.
+
+        Args:
+            paths (list): Paths of the files
+            executor (concurrent.futures.Executor): Executor used for stat calls
+
+        Returns:
+            dict: Mapping of path to modification timestamp, or None for 
+                  missing files.
+        """
+        by_dir = {}
+        for path in paths:
+            directory, name = os.path.split(os.path.abspath(path))
+            by_dir.setdefault(directory, []).append((path, name))
+
+        def dir_mtime_ns(directory):
+            try:
+                return os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                return None
+
+        directories = list(by_dir)
+        index_dir = os.path.dirname(os.path.abspath(self.index_path))
+        to_stat = []
+        for directory, mtime_ns in zip(directories, executor.map(dir_mtime_ns, directories)):
+            cached = self._dirs.get(directory)
+            if cached is None or cached[0] != mtime_ns or directory == index_dir:
+                cached = [mtime_ns, {}]
+                self._dirs[directory] = cached
+            for path, name in by_dir[directory]:
+                if name not in cached[1]:
+                    to_stat.append((path, name, cached[1]))
+
+        for (path, name, cached_files), mtime in zip(
+                to_stat, executor.map(_stat_mtime, [path for path, _, _ in to_stat])):
+            cached_files[name] = mtime
+
+        mtimes = {}
+        for directory, dir_paths in by_dir.items():
+            cached_files = self._dirs[directory][1]
+            for path, name in dir_paths:
+                mtimes[path] = cached_files[name]
+        return mtimes
+
+    def save(self) -> None:
+        """
+        Writes the index to `index_path`.
+        """
+        write_to_file(self.index_path, json.dumps(self._dirs), strip=False)
+
+
+def files_recent_enough(paths: list, max_age_days: float, max_workers: int = 32,
+                        index_path: str = None) -> dict:
+    """Bulk version of `is_file_recent_enough`. The files are stat'ed in a 
+    thread pool, and nothing is logged per file.
+
+    Args:
+        paths (list): Paths of the files to check
+        max_age_days (float): Max age in days beyond which a file is not 
+            recent enough
+        max_workers (int, optional): Number of concurrent stat calls. 
+            Defaults to 32.
+        index_path (str, optional): Path of a `FileMtimeIndex` to use and 
+            update, so that repeated checks skip unchanged directories. 
+            See `FileMtimeIndex` for when this is safe to use.
+
+    Returns:
+        dict: Mapping of path to True if the file exists and is more recent
+              than `max_age_days`, False otherwise.
+    """
+    min_mtime = time.time() - max_age_days * 60 * 60 * 24
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if index_path:
+            index = FileMtimeIndex(index_path)
+            mtimes = index.get_mtimes(paths, executor)
+            index.save()
+        else:
+            mtimes = dict(zip(paths, executor.map(_stat_mtime, paths)))
+    return {path: mtime is not None and mtime > min_mtime for path, mtime in mtimes.items()}
+
+
+def _scan_dir(directory):
+    """Lists a directory, returning its sub-directories and the 
+    (path, mtime) of the files in it."""
+    sub_dirs, files = [], []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        sub_dirs.append(entry.path)
+                    else:
+                        files.append((entry.path, entry.stat(follow_symlinks=False).st_mtime))
+                except FileNotFoundError:
+                    # removed while scanning
+                    pass
+    except FileNotFoundError:
+        pass
+    return sub_dirs, files
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
         return False
 
 
-def read_file(filepath: str) -> str:
+def purge_older_than(directory: str, days: float, max_workers: int = 32, 
+                     dry_run: bool = False, log: bool = True) -> list:
+    """Removes all files under the given directory, recursively, which were
+    last modified more than the given number of days ago. 
+
+    Directories are listed with os.scandir, and the listing, stat'ing and 
+    removal of files is done in a thread pool, which pays off on large trees
+    and network file systems. Directories themselves are not removed.
+
+    Args:
+        directory (str): The directory to purge
+        days (float): Files older than this are removed
+        max_workers (int, optional): Number of threads. Defaults to 32.
+        dry_run (bool, optional): Only return the files which would be 
+            removed. Defaults to False.
+        log (bool, optional): Whether to log a summary. Defaults to True.
+
+    Returns:
+        list: Paths of the removed files
+    """
+    min_mtime = time.time() - days * 60 * 60 * 24
+    old_files = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = [directory]
+        while pending:
+            next_pending = []
+            for sub_dirs, files in executor.map(_scan_dir, pending):
+                next_pending.extend(sub_dirs)
+                old_files.extend(path for path, mtime in files if mtime < min_mtime)
+            pending = next_pending
+
+        if not dry_run:
+            removed = executor.map(_remove_file, old_files)
+            old_files = [path for path, is_removed in zip(old_files, removed) if is_removed]
+
+    if log:
+        action = 'would remove' if dry_run else 'removed'
+        logger.log_info(f"Purge {directory} - {action} {len(old_files)} files older than {days} days")
+    return old_files
+
+
+# file extension -> compression format, used when compression='infer'
+COMPRESSION_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.gzip': 'gzip',
+    '.bz2': 'bz2',
+    '.zst': 'zstd',
+    '.zstd': 'zstd',
+    '.lz4': 'lz4',
+}
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def infer_compression(filepath: str) -> str:
+    """Infers the compression format of a file from its extension.
+
+    Args:
+        filepath (str): Path of the file
+
+    Returns:
+        str: One of the values of `COMPRESSION_EXTENSIONS`, or None for 
+             uncompressed files.
+    """
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(str(filepath))[1].lower())
+
+
+def open_file(filepath: str, mode: str = 'rb', compression: str = 'infer',
+              buffering: int = -1, encoding: str = None, newline: str = None):
+    """A wrapper around open() which transparently compresses/decompresses 
+    gzip, bz2, zstd and lz4 files. 
+
+    Args:
+        filepath (str): Path of the file
+        mode (str, optional): Same as the mode of open(). Defaults to 'rb'.
+        compression (str, optional): One of 'gzip', 'bz2', 'zstd', 'lz4' or 
+            None. Defaults to 'infer', which picks the format based on the 
+            file extension. zstd needs the `zstandard` package and lz4 needs 
+            the `lz4` package.
+        buffering (int, optional): Buffer size for uncompressed files. 
+            Same as the buffering of open().
+        encoding (str, optional): Encoding used in text mode.
+        newline (str, optional): Same as the newline of open().
+
+    Returns:
+        A file object
+    """
+    if compression == 'infer':
+        compression = infer_compression(filepath)
+    text_kwargs = {}
+    if 'b' not in mode:
+        if 't' not in mode:
+            mode += 't'
+        text_kwargs = {'encoding': encoding, 'newline': newline}
+
+    if not compression:
+        return open(filepath, mode.replace('t', ''), buffering=buffering, **text_kwargs)
+    elif compression == 'gzip':
+        return gzip.open(filepath, mode, **text_kwargs)
+    elif compression == 'bz2':
+        return bz2.open(filepath, mode, **text_kwargs)
+    elif compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('Reading/writing zstd files needs the zstandard package - pip install zstandard')
+        return zstandard.open(filepath, mode, **text_kwargs)
+    elif compression == 'lz4':
+        try:
+            import lz4.frame
+        except ImportError:
+            raise ImportError('Reading/writing lz4 files needs the lz4 package - pip install lz4')
+        return lz4.frame.open(filepath, mode, **text_kwargs)
+    else:
+        raise ValueError(f'Unsupported compression: {compression}')
+
+
+def iter_chunks(filepath: str, chunk_size: int = DEFAULT_CHUNK_SIZE, 
+                compression: str = 'infer'):
+    """Reads a file in fixed size blocks, decompressing it on the fly if 
+    needed. Only one block is held in memory at a time.
+
+    Args:
+        filepath (str): Path of the file
+        chunk_size (int, optional): Max number of bytes per block. Defaults to 1 MB.
+        compression (str, optional): See `open_file`. Defaults to 'infer'.
+
+    Yields:
+        bytes: The next block of the (decompressed) file contents
+    """
+    with open_file(filepath, 'rb', compression=compression, buffering=0) as reader:
+        while True:
+            chunk = reader.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def iter_lines(filepath: str, chunk_size: int = DEFAULT_CHUNK_SIZE, 
+               encoding: str = 'utf-8', keep_newlines: bool = False,
+               compression: str = 'infer'):
+    """Lazily reads a text file line by line, decompressing it on the fly if 
+    needed. Memory usage is bounded by the read buffer and the longest line,
+    irrespective of the file size.
+
+    Args:
+        filepath (str): Path of the file
+        chunk_size (int, optional): Size of the read buffer in bytes. Defaults to 1 MB.
+        encoding (str, optional): Encoding of the file. Defaults to 'utf-8'.
+        keep_newlines (bool, optional): Whether to keep the trailing newline 
+            of each line. Defaults to False.
+        compression (str, optional): See `open_file`. Defaults to 'infer'.
+
+    Yields:
+        str: The next line of the file
+    """
+    binary_reader = open_file(filepath, 'rb', compression=compression, buffering=chunk_size)
+    with io.TextIOWrapper(binary_reader, encoding=encoding) as reader:
+        if keep_newlines:
+            yield from reader
+        else:
+            for line in reader:
+                yield line.rstrip('\n')
+
+
+def read_bytes_view(filepath: str) -> memoryview:
+    """Memory-maps the given file and returns a read-only, zero-copy view of 
+    its contents. Pages are loaded lazily by the OS as they are accessed, so 
+    this is suitable for files larger than the available RAM.
+
+    The mapping stays open as long as the returned view (or any slice of it)
+    is referenced.
+
+    Args:
+        filepath (str): Path of the file. Compressed files cannot be mapped.
+
+    Returns:
+        memoryview: A view of the file's contents
+    """
+    if infer_compression(filepath):
+        raise ValueError(f'Cannot memory-map compressed file: {filepath} - use iter_chunks instead')
+    with open(filepath, 'rb') as reader:
+        if os.fstat(reader.fileno()).st_size == 0:
+            # empty files cannot be memory-mapped
+            return memoryview(b'')
+        mapped = mmap.mmap(reader.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped)
+
+
+def read_file(filepath: str, encoding: str = None, compression: str = 'infer') -> str:
     """Simply reads a file's contents. Useful for reading small text files.
+    Use `iter_lines` or `iter_chunks` for large files.
 
     Args:
         filepath (str): The location of the file to read
+        encoding (str, optional): Encoding of the file. Defaults to the 
+            platform's default encoding.
+        compression (str, optional): See `open_file`. Defaults to 'infer'.
 
     Returns:
         str: A string containing all of the file's contents
     """
-    with open(filepath, 'r') as reader:
-        return '\n'.join(reader.readlines())
+    with open_file(filepath, 'rt', compression=compression, encoding=encoding) as reader:
+        return reader.read()
 
 
-def write_to_file(filepath: str, content: object, strip: bool = True) -> None:
+def write_to_file(filepath: str, content: object, strip: bool = True,
+                  atomic: bool = True, fsync: bool = False) -> None:
     """
     Simply writes the given content to the given file. 
-    Useful for reading small text files. 
+    Useful for writing small text files. 
+
+    By default the content is first written to a temporary file in the same 
+    directory, which is then renamed to the given path. Readers therefore 
+    either see the old or the new file, never a partially written one. The
+    permissions of an existing file are kept, and symlinks are followed.
 
     Args:
         filepath (str): The location of the file to write
@@ -79,6 +457,10 @@ def write_to_file(filepath: str, content: object, strip: bool = True) -> None:
             it is converted to string using str(content).
         strip (bool): Whether to remove prefix and suffix whitespace from the 
             string before writing.
+        atomic (bool): Whether to write through a temporary file and rename 
+            it. Defaults to True.
+        fsync (bool): Whether to fsync the file before returning, so that the
+            content survives a system crash. Defaults to False.
 
     Returns:
         None
@@ -87,14 +469,43 @@ def write_to_file(filepath: str, content: object, strip: bool = True) -> None:
         content = str(content)
     if strip:
         content = content.strip()
-    with open(filepath, 'w') as writer:
-        writer.write(content.strip())
+    if not atomic:
+        with open(filepath, 'w') as writer:
+            writer.write(content)
+            if fsync:
+                writer.flush()
+                os.fsync(writer.fileno())
+        return
+
+    # the target of a symlink is replaced, not the link
+    filepath = os.path.realpath(filepath)
+    directory, name = os.path.split(filepath)
+    tmp_path = os.path.join(directory, f'.{name}.{os.getpid()}.{os.urandom(4).hex()}.tmp')
+    # the permissions of the temporary file honour the umask, like open() does
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with open(fd, 'w') as writer:
+            writer.write(content)
+            if fsync:
+                writer.flush()
+                os.fsync(writer.fileno())
+        if os.path.exists(filepath):
+            # keep the permissions of the replaced file
+            shutil.copymode(filepath, tmp_path)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 
 def append_to_file(filepath, content, strip=True):
     """
     Simply appends the given content to the given file. 
-    Useful for reading small text files. 
+    Useful for writing small text files. 
+
+    This opens and closes the file on every call. Use `FileAppender` when 
+    appending in a loop.
 
     Args:
         filepath (str): The location of the file to write
@@ -113,40 +524,249 @@ def append_to_file(filepath, content, strip=True):
     with open(filepath, 'a') as appender:
         appender.write(content)
 
+
+class FileAppender:
+    """
+    A buffered appender for building up a file piece by piece, e.g. 
+    writing a CSV like output line by line in a loop. 
+    
+    The file is opened once, and content is collected in memory and written 
+    out in batches once `flush_size` characters are buffered or 
+    `flush_interval` seconds have passed since the last write.
+
+    Sample code
+    >>> with ntk.FileAppender('/tmp/output.csv', flush_size=1024*1024) as appender:
+    >>>     for row in rows:
+    >>>         appender.append_line(','.join(row))
+
+    Attributes:
+        filepath (str): The location of the file to append to.
+        flush_size (int): Number of buffered characters which triggers a write.
+        flush_interval (float): Max seconds content is kept in the buffer. The 
+            interval is checked when content is appended. None to disable.
+        fsync (str): When to fsync the file - 'flush' after every write, 
+            'close' only when closing, or None to leave it to the OS.
+        strip (bool): Whether to remove prefix and suffix whitespace from the 
+            appended content, like `append_to_file`.
+    """
+
+    def __init__(self, filepath: str, flush_size: int = 1024 * 1024, 
+                 flush_interval: float = None, fsync: str = None, 
+                 strip: bool = True):
+        if fsync not in (None, 'flush', 'close'):
+            raise ValueError(f"fsync should be one of None, 'flush' or 'close' - got: {fsync}")
+        self.filepath = filepath
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.strip = strip
+
+        self._buffer = []
+        self._buffered_size = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = open(filepath, 'a')
+
+    def append(self, content: object) -> None:
+        """
+        Appends the given content to the buffer, writing the buffer out if it
+        is full or older than `flush_interval`.
+
+        Args:
+            content (object): If the given variable is not a string, 
+                it is converted to string using str(content).
+        """
+        self._buffer_content(self._to_string(content))
+
+    def append_line(self, content: object) -> None:
+        """
+        Appends the given content followed by a newline.
+        """
+        self._buffer_content(self._to_string(content) + '\n')
+
+    def _to_string(self, content):
+        if type(content) != str:
+            content = str(content)
+        if self.strip:
+            content = content.strip()
+        return content
+
+    def _buffer_content(self, content):
+        with self._lock:
+            self._buffer.append(content)
+            self._buffered_size += len(content)
+            if self._buffered_size >= self.flush_size or (
+                    self.flush_interval is not None and 
+                    time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def flush(self) -> None:
+        """
+        Writes out all buffered content.
+        """
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._buffer.clear()
+            self._buffered_size = 0
+        self._file.flush()
+        if self.fsync == 'flush':
+            os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Writes out all buffered content and closes the file.
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush()
+            if self.fsync == 'close':
+                os.fsync(self._file.fileno())
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
 # ------------------------------------
 
 
-def pickle_dump(obj: object, filepath: str, remove: list = []) -> None:
+# out-of-band pickle buffers are written to a sidecar file with this suffix
+PICKLE_BUFFERS_SUFFIX = '.buffers'
+_PICKLE_BUFFERS_MAGIC = b'NTKPKB01'
+_PICKLE_BUFFERS_ALIGNMENT = 64
+
+
+def _without_attributes(obj, remove):
+    """Returns a shallow copy of the given object without the given attributes, 
+    leaving the original object untouched."""
+    obj_copy = copy.copy(obj)
+    for key in remove:
+        obj_copy.__dict__.pop(key, None)
+    return obj_copy
+
+
+def _write_pickle_buffers(filepath, buffers):
+    """Writes out-of-band pickle buffers to a sidecar file: a header with the 
+    (offset, length) of every buffer, followed by the buffers, each aligned 
+    so that arrays mapped from the file are aligned too."""
+    raw_buffers = [buffer.raw() for buffer in buffers]
+    header_size = len(_PICKLE_BUFFERS_MAGIC) + 8 + 16 * len(raw_buffers)
+    offsets, offset = [], header_size
+    for raw in raw_buffers:
+        offset += -offset % _PICKLE_BUFFERS_ALIGNMENT
+        offsets.append(offset)
+        offset += raw.nbytes
+
+    with open(filepath, 'wb') as writer:
+        writer.write(_PICKLE_BUFFERS_MAGIC)
+        writer.write(struct.pack('<Q', len(raw_buffers)))
+        for offset, raw in zip(offsets, raw_buffers):
+            writer.write(struct.pack('<QQ', offset, raw.nbytes))
+        for offset, raw in zip(offsets, raw_buffers):
+            writer.write(b'\0' * (offset - writer.tell()))
+            writer.write(raw)
+
+
+def _read_pickle_buffers(filepath, mmap_mode):
+    """Reads the out-of-band pickle buffers written by `_write_pickle_buffers` 
+    as a list of memoryviews."""
+    with open(filepath, 'rb') as reader:
+        if mmap_mode:
+            access = mmap.ACCESS_COPY if mmap_mode == 'c' else mmap.ACCESS_READ
+            data = memoryview(mmap.mmap(reader.fileno(), 0, access=access))
+        else:
+            data = memoryview(bytearray(reader.read()))
+    magic_size = len(_PICKLE_BUFFERS_MAGIC)
+    if data[:magic_size] != _PICKLE_BUFFERS_MAGIC:
+        raise ValueError(f'Not a pickle buffers file: {filepath}')
+    count, = struct.unpack_from('<Q', data, magic_size)
+    buffers = []
+    for i in range(count):
+        offset, length = struct.unpack_from('<QQ', data, magic_size + 8 + 16 * i)
+        buffers.append(data[offset:offset + length])
+    return buffers
+
+
+def pickle_dump(obj: object, filepath: str, remove: list = None, 
+                protocol: int = pickle.HIGHEST_PROTOCOL, 
+                compression: str = 'infer', out_of_band: bool = False) -> None:
     """A wrapper around pickle.dump(). 
 
+    With `out_of_band=True`, large buffers which support pickle protocol 5, 
+    like NumPy arrays and the blocks of pandas DataFrames, are not copied 
+    into the pickle stream. They are written to a sidecar file 
+    (`filepath + PICKLE_BUFFERS_SUFFIX`) instead, which `pickle_load` 
+    memory-maps, so loading does not copy them either.
+
     Args:
         obj (object): The object to pickle
         filepath (str): The path to the pickle file 
-        remove (list, optional): To remove any variables from the object 
-            before pickling.
+        remove (list, optional): Attributes of the object to leave out of the
+            pickle. The given object itself is not modified.
+        protocol (int, optional): Pickle protocol. Defaults to the highest 
+            available one.
+        compression (str, optional): Compression of the pickle stream, see 
+            `open_file`. Defaults to 'infer', which picks the format based on 
+            the file extension, e.g. '.pkl.zst' or '.pkl.lz4'. The sidecar 
+            file is never compressed.
+        out_of_band (bool, optional): Whether to write large buffers to a 
+            sidecar file. Needs protocol 5 or higher. Defaults to False.
 
     Returns:
         None
     """
-    for key in remove:
-        obj.__dict__.pop(key)
-    with open(filepath, 'wb') as file:
-        pickle.dump(obj, file)
-
-
-def pickle_load(filepath: str, put: dict = {}) -> object:
+    if remove:
+        obj = _without_attributes(obj, remove)
+    buffers_path = filepath + PICKLE_BUFFERS_SUFFIX
+    buffers = []
+    with open_file(filepath, 'wb', compression=compression) as file:
+        if out_of_band:
+            if protocol < 5:
+                raise ValueError(f'Out-of-band pickling needs protocol 5 or higher - got: {protocol}')
+            pickle.dump(obj, file, protocol=protocol, buffer_callback=buffers.append)
+        else:
+            pickle.dump(obj, file, protocol=protocol)
+
+    if out_of_band:
+        _write_pickle_buffers(buffers_path, buffers)
+    elif os.path.exists(buffers_path):
+        # remove the stale buffers of an earlier out-of-band dump
+        os.remove(buffers_path)
+
+
+def pickle_load(filepath: str, put: dict = None, compression: str = 'infer', 
+                mmap_mode: str = 'c') -> object:
     """A wrapper around pickle.load(). 
 
+    Objects pickled with `pickle_dump(..., out_of_band=True)` get their large 
+    buffers from the memory-mapped sidecar file, without copying them.
+
     Args:
         filepath (str): The path to the pickle file 
-        remove (list, optional): To remove any variables from the object 
-            before pickling.
+        put (dict, optional): Attributes to set on the unpickled object.
+        compression (str, optional): See `open_file`. Defaults to 'infer'.
+        mmap_mode (str, optional): How the sidecar file of an out-of-band 
+            pickle is mapped. 'c' (copy-on-write, arrays can be modified 
+            without changing the file), 'r' (read-only), or None to read it 
+            into memory. Defaults to 'c'.
 
     Returns:
         object: The unpickled object
     """
-    with open(filepath, 'rb') as file:
-        obj = pickle.load(file)
-    for key, attr in put.items():
+    buffers_path = filepath + PICKLE_BUFFERS_SUFFIX
+    buffers = None
+    if os.path.exists(buffers_path):
+        buffers = _read_pickle_buffers(buffers_path, mmap_mode)
+    with open_file(filepath, 'rb', compression=compression) as file:
+        obj = pickle.load(file, buffers=buffers)
+    for key, attr in (put or {}).items():
         obj.__dict__[key] = attr
     return obj
@@ -3,35 +3,118 @@ import random
 import gc
 import importlib
 from importlib import reload
-import pandas as pd
 import sys
+import numbers
+import reprlib
+import enum
+import uuid
+import decimal
+import pathlib
 import traceback
 import os
 import datetime
+import time
 from io import StringIO
 
 from .logger import *
+from .timers import *
+from .memory import *
 
 
 class StopWatch:
     """
     A simple stopwatch class for tracking elapsed time.
 
+    Time is measured with the monotonic, high resolution `time.perf_counter_ns`, 
+    so it is not affected by changes of the system clock. Named laps can be 
+    recorded, and a stopwatch with a name also records its laps (as 
+    '<name>.<lap name>') and, when used as a context manager, its total time
+    into the `timer_registry`.
+
+    Sample code
+    >>> with ntk.StopWatch('daily_job') as stopwatch:
+    >>>     df = load_data()
+    >>>     stopwatch.lap('load')
+    >>>     df = transform(df)
+    >>>     stopwatch.lap('transform')
+
     Attributes:
-        start (datetime): The start time of the stopwatch.
+        start (datetime): The wall clock time at which the stopwatch was started.
+        name (str): Name under which timings are recorded in the registry, if any.
+        laps (list): (lap name, duration in nanoseconds) of the recorded laps.
     """
 
-    def __init__(self):
+    def __init__(self, name: str = None, registry: TimerRegistry = None):
         """
         Initializes a new instance of the StopWatch class, setting the start time to the current time.
+
+        Args:
+            name (str, optional): Name under which laps and the total time are 
+                recorded in the registry. Nothing is recorded if not given.
+            registry (TimerRegistry, optional): Defaults to `timer_registry`.
         """
-        self.start = datetime.datetime.now()
+        self.name = name
+        self.registry = registry or timer_registry
+        self._lap_timers = {}
+        self.reset()
 
     def reset(self) -> None:
         """
         Resets the start time of the stopwatch to the current time.
         """
         self.start = datetime.datetime.now()
+        self.laps = []
+        self._start_ns = self._lap_start_ns = time.perf_counter_ns()
+
+    def elapsed_ns(self) -> int:
+        """
+        Returns:
+            int: The elapsed time since the start in nanoseconds.
+        """
+        return time.perf_counter_ns() - self._start_ns
+
+    def elapsed(self) -> float:
+        """
+        Returns:
+            float: The elapsed time since the start in seconds.
+        """
+        return self.elapsed_ns() / 1e9
+
+    def lap(self, name: str = None) -> int:
+        """
+        Records a lap - the time since the previous lap, or since the start for 
+        the first lap.
+
+        Args:
+            name (str, optional): Name of the lap. Defaults to its number.
+
+        Returns:
+            int: The duration of the lap in nanoseconds.
+        """
+        now_ns = time.perf_counter_ns()
+        duration_ns = now_ns - self._lap_start_ns
+        self._lap_start_ns = now_ns
+        if name is None:
+            name = str(len(self.laps) + 1)
+        self.laps.append((name, duration_ns))
+        if self.name:
+            timer = self._lap_timers.get(name)
+            if timer is None:
+                timer = self._lap_timers[name] = self.registry.get(f'{self.name}.{name}')
+            timer.record(duration_ns)
+        return duration_ns
+
+    @staticmethod
+    def format_hhmmss(duration_ns: int) -> str:
+        """
+        Formats a duration as 'HH:MM:SS.mmm'. Hours go beyond 24 for durations 
+        longer than a day.
+        """
+        ms_total = duration_ns // 1000000
+        s, ms = divmod(ms_total, 1000)
+        m, s = divmod(s, 60)
+        h, m = divmod(m, 60)
+        return "%02d:%02d:%02d.%03d" % (h, m, s, ms)
 
     def get_time_hhmmss(self):
         """
@@ -40,18 +123,19 @@ class StopWatch:
         Returns:
             str: The elapsed time formatted as 'HH:MM:SS.mmm'.
         """
-        end = datetime.datetime.now()
-        time_diff = (end - self.start)
-        diff_seconds = time_diff.seconds
-        m, s = divmod(diff_seconds, 60)
-        h, m = divmod(m, 60)
-        ms = (time_diff.microseconds / 1000) % 1000
-        time_str = "%02d:%02d:%02d.%03d" % (h, m, s, ms)
-        return time_str
+        return self.format_hhmmss(self.elapsed_ns())
     
     def __str__(self):
         return self.get_time()
 
+    def __enter__(self):
+        self.reset()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.name:
+            self.registry.record(self.name, self.elapsed_ns())
+
     def get_time(self) -> str:
         """
         Convenience method to get the elapsed time in hours, minutes, seconds, and milliseconds format.
@@ -132,9 +216,9 @@ class TempClass(object):
 
 def exception_to_trace_string(exception):
     if exception.__cause__:
-        return '\n'.join(exception.__cause__.args)
-    else:
-        return '\n'.join(exception.args)
+        exception = exception.__cause__
+    # args are not necessarily strings, e.g. OSError(2, 'No such file')
+    return '\n'.join(str(arg) for arg in exception.args)
 
 # ----------------------------------------------------------------------
 
@@ -153,14 +237,21 @@ def get_system_ram():
 
 
 def run_gc():
-    # Returns the number of
-    # objects it has collected
-    # and deallocated
-    collected = gc.collect()
+    """
+    Runs a full garbage collection, and logs the number of objects collected
+    and the resident memory of the process before and after.
 
-    # Prints Garbage collector
-    # as 0 object
-    log_info("Garbage collector: collected %d objects." % collected)
+    Returns:
+        int: The number of objects collected.
+    """
+    rss_before = get_process_memory()['rss_bytes']
+    collected = gc.collect()
+    memory = get_process_memory()
+    rss_after = memory['rss_bytes']
+    rss_change = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+    log_info(f"Garbage collector: collected {collected} objects. RSS: {format_bytes(rss_after)} "
+             f"({format_bytes(rss_change)}), peak RSS: {format_bytes(memory['peak_rss_bytes'])}")
+    return collected
 
 # ----------------------------------------------------------------------
 
@@ -226,10 +317,15 @@ def add_function_to_object(object1, function1, class1):
 
 
 def generate_pseudo_uuid(n=5, prefix=''):
+    """
+    Generates an id made of the current time (yymmddHHMMSSffffff) followed by
+    n random digits.
+
+    These ids are not guaranteed to be unique across threads and processes, use
+    `generate_id` / `generate_ids` for unique ids.
+    """
     now = datetime.datetime.now()
-    random_append_str = ''
-    for r in range(n):
-        random_append_str += str(random.randint(0, 10))
+    random_append_str = f'{random.randrange(10 ** n):0{n}d}' if n > 0 else ''
     return prefix + now.strftime("%y%m%d%H%M%S%f") + random_append_str
 
 
@@ -265,23 +361,113 @@ def log_uncaught_exception(exctype, value, tb):
 sys.excepthook = log_uncaught_exception
 
 
-def map_to_string(args):
+class _ArgRepr(reprlib.Repr):
+    """
+    Bounded reprs of function arguments for error messages: containers are
+    truncated while they are walked (like `reprlib.repr`), and DataFrames,
+    Series, indexes and numpy arrays are summarized instead of being converted
+    whole. Objects of other types are only described by their type and size,
+    as their full repr may be arbitrarily large.
+    """
+
+    # types whose repr is short
+    # types whose reprs are small and worth logging whole, other objects only show their type
+    _SMALL_REPR_TYPES = (numbers.Number, decimal.Decimal, datetime.date, datetime.time, datetime.timedelta,
+                         pathlib.PurePath, uuid.UUID, enum.Enum, type(None))
+
+    def __init__(self):
+        super().__init__()
+        self.maxlevel = 3
+        self.maxlist = self.maxtuple = self.maxset = self.maxfrozenset = self.maxdeque = self.maxarray = 10
+        self.maxdict = 10
+        self.maxstring = 200
+        self.maxlong = 60
+        self.maxother = 500
+
+    def repr_bytes(self, value, level):
+        # sliced before the repr, like reprlib does for str
+        suffix = '...' if len(value) > self.maxstring else ''
+        return repr(bytes(value[:self.maxstring])) + suffix
+
+    repr_bytearray = repr_bytes
+
+    def repr_DataFrame(self, df, level):
+        # just the first 15 columns and 3 rows, in case of huge frames
+        lines = [f'DataFrame shape={df.shape}', ','.join(self.repr1(col, level - 1) for col in df.columns[:15])]
+        for row in df.iloc[:3, :15].itertuples(index=False, name=None):
+            lines.append(','.join(self.repr1(value, level - 1) for value in row))
+        return '\n'.join(lines)
+
+    def repr_Series(self, series, level):
+        values = self.repr1(series.iloc[:self.maxlist + 1].tolist(), level - 1)
+        return f'Series name={self.repr1(series.name, level - 1)} length={len(series)} dtype={series.dtype} {values}'
+
+    def repr_Index(self, index, level):
+        values = self.repr1(index[:self.maxlist + 1].tolist(), level - 1)
+        return f'{type(index).__name__} length={len(index)} dtype={index.dtype} {values}'
+
+    repr_RangeIndex = repr_DatetimeIndex = repr_MultiIndex = repr_CategoricalIndex = repr_Index
+
+    def repr_ndarray(self, array, level):
+        values = self.repr1(array.flat[:self.maxlist + 1].tolist(), level - 1)
+        return f'ndarray shape={array.shape} dtype={array.dtype} {values}'
+
+    def repr_instance(self, value, level):
+        if isinstance(value, self._SMALL_REPR_TYPES):
+            return super().repr_instance(value, level)
+        description = type(value).__name__
+        shape = getattr(value, 'shape', None)
+        if isinstance(shape, tuple):
+            description += f' shape={shape}'
+        elif hasattr(type(value), '__len__'):
+            try:
+                description += f' len={len(value)}'
+            except Exception:
+                pass
+        return f'<{description}>'
+
+
+_arg_repr = _ArgRepr()
+
+
+def map_to_string(args, max_chars: int = 2000) -> str:
+    """
+    Summarizes the arguments of a function call for error messages, e.g. of
+    the failed tasks of `run_concurrently`. Large arguments are truncated
+    without converting them to strings whole, so the cost is bounded.
+
+    Args:
+        args (dict or list): Keyword or positional arguments.
+        max_chars (int, optional): Maximum length of the summary, not counting
+            the note about skipped arguments.
+
+    Returns:
+        str: One 'name = value' line per argument.
+    """
+    if isinstance(args, dict):
+        items = args.items()
+    elif isinstance(args, (list, tuple)):
+        items = enumerate(args)
+    else:
+        items = [('args', args)]
     str_io = StringIO()
-    for k, v in args.items():
-        str_io.write(f'{k} = ')
-        if isinstance(v, pd.DataFrame):
-            str_io.write(f'\n')
-            str_io_temp = StringIO()
-            # just print first 15 columns, in case of huge no. of cols
-            v.iloc[:, :15].head(3).to_csv(str_io_temp)
-            # again limit text output to max 2000 chars, in case individual col data is large
-            str_io.write((str_io_temp.getvalue())[:2000])
-            str_io.write('\n')
-        elif isinstance(v, str):
-            str_io.write(f'{v[:200]}')
+    for i, (k, v) in enumerate(items):
+        prefix = f'{k} = '
+        # every argument gets what is left of the budget
+        remaining = max_chars - str_io.tell() - len(prefix) - 1
+        if remaining <= 3:
+            str_io.write(f'... ({len(args) - i} more)\n')
+            break
+        if isinstance(v, str):
+            value = v[:200] + ('...' if len(v) > 200 else '')
         else:
-            str_io.write(f'{(str(v))[:500]}')
-        str_io.write(f'\n')
+            try:
+                value = _arg_repr.repr(v)
+            except Exception as e:
+                value = f'<{type(v).__name__}, repr failed: {e!r}>'
+        if len(value) > remaining:
+            value = value[:remaining - 3] + '...'
+        str_io.write(f'{prefix}{value}\n')
     return str_io.getvalue()
 
 
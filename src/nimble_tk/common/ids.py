@@ -0,0 +1,146 @@
+"""
+Unique, k-sortable ids in the style of ULIDs.
+
+An id is a 128 bit number made of
+- a 48 bit unix timestamp in milliseconds,
+- a 16 bit node id derived from the process and thread ids,
+- a 64 bit counter, starting at a random value every millisecond and incremented
+  for every id generated in the same millisecond by the same thread,
+encoded as 26 characters of Crockford's base32. Ids sort by creation time, are
+monotonic within a thread, and do not collide across threads and processes (a
+collision needs the same millisecond, the same node id and overlapping counter
+ranges starting at random 63 bit values).
+"""
+
+import os
+import zlib
+import time
+import random
+import datetime
+import threading
+
+ID_LENGTH = 26
+
+_CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+# all pairs of characters, encoding 10 bits at once
+_CROCKFORD_PAIRS = [first + second for first in _CROCKFORD_ALPHABET for second in _CROCKFORD_ALPHABET]
+_COUNTER_START_MAX = 1 << 63
+_COUNTER_MASK = (1 << 64) - 1
+
+
+def _encode_65_bits(value):
+    """Encodes a 65 bit number as 13 characters of Crockford's base32."""
+    pairs = _CROCKFORD_PAIRS
+    return (_CROCKFORD_ALPHABET[value >> 60] + pairs[(value >> 50) & 1023] + pairs[(value >> 40) & 1023] +
+            pairs[(value >> 30) & 1023] + pairs[(value >> 20) & 1023] + pairs[(value >> 10) & 1023] +
+            pairs[value & 1023])
+
+
+class _IdState(threading.local):
+
+    def __init__(self):
+        self.node = zlib.crc32(f'{os.getpid()}:{threading.get_native_id()}'.encode()) & 0xFFFF
+        self.last_ms = 0
+        self.counter = 0
+        # first 13 characters of the ids of the last millisecond
+        self.prefix = ''
+        self.random = random.Random()
+
+
+_state = _IdState()
+
+
+def _reset_state_after_fork():
+    # a forked child would otherwise continue the counters of the forking thread
+    global _state
+    _state = _IdState()
+
+
+# fork is POSIX only
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_state_after_fork)
+
+
+def _start_millisecond(state, timestamp_ms):
+    state.last_ms = timestamp_ms
+    state.counter = state.random.randrange(_COUNTER_START_MAX)
+    # the 130 bits of an id (with 2 leading zero bits) are encoded as 26
+    # characters, the first 13 of them hold the timestamp and all but the
+    # lowest bit of the node id
+    state.prefix = _encode_65_bits(((timestamp_ms << 16) | state.node) >> 1)
+
+
+def _reserve(n):
+    """Returns the thread state and the first counter of n consecutive ids of the current thread."""
+    state = _state
+    now_ms = time.time_ns() // 1000000
+    if now_ms > state.last_ms:
+        _start_millisecond(state, now_ms)
+    else:
+        # same millisecond, or the clock went backwards: stay monotonic
+        state.counter += 1
+    start = state.counter
+    state.counter += n - 1
+    if state.counter > _COUNTER_MASK:
+        # counter overflow, practically unreachable: move to the next millisecond
+        _start_millisecond(state, state.last_ms + 1)
+        start = state.counter
+        state.counter += n - 1
+    return state, start
+
+
+def generate_id(prefix: str = '') -> str:
+    """
+    Generates a unique, k-sortable id, e.g. '01J9ZQ3K5R8TW2M4XA6BVCDE7F'.
+
+    Args:
+        prefix (str, optional): Prepended to the id.
+
+    Returns:
+        str: The id.
+    """
+    state, counter = _reserve(1)
+    return prefix + state.prefix + _encode_65_bits(((state.node & 1) << 64) | counter)
+
+
+def generate_ids(n: int) -> 'np.ndarray':
+    """
+    Generates n unique, k-sortable ids in one call (see `generate_id`), much
+    faster than calling `generate_id` n times.
+
+    Args:
+        n (int): Number of ids.
+
+    Returns:
+        np.ndarray: Array of n ids, of dtype '<U26', in increasing order.
+    """
+    import numpy as np
+    if n <= 0:
+        return np.empty(0, dtype=f'<U{ID_LENGTH}')
+    state, start = _reserve(n)
+    codes = np.frombuffer(_CROCKFORD_ALPHABET.encode('ascii'), dtype=np.uint8)
+    counters = np.arange(n, dtype=np.uint64) + np.uint64(start)
+    chars = np.empty((n, ID_LENGTH), dtype=np.uint8)
+    chars[:, :13] = np.frombuffer(state.prefix.encode('ascii'), dtype=np.uint8)
+    # the 14th character holds the lowest bit of the node id and the top 4 bits of the counter
+    chars[:, 13] = codes[(counters >> np.uint64(60)) | np.uint64((state.node & 1) << 4)]
+    for position in range(14, ID_LENGTH):
+        shift = np.uint64(5 * (ID_LENGTH - 1 - position))
+        chars[:, position] = codes[(counters >> shift) & np.uint64(31)]
+    return chars.view(f'S{ID_LENGTH}').ravel().astype(f'U{ID_LENGTH}')
+
+
+def get_id_timestamp(id: str) -> datetime.datetime:
+    """
+    Returns the creation time encoded in an id generated by `generate_id(s)`.
+
+    Args:
+        id (str): The id, without prefix.
+
+    Returns:
+        datetime.datetime: The creation time (UTC), with millisecond precision.
+    """
+    # the first 10 characters hold the 48 bit timestamp (plus 2 leading zero bits)
+    timestamp_ms = int(id[:10].upper().translate(str.maketrans(
+        _CROCKFORD_ALPHABET, '0123456789abcdefghijklmnopqrstuv')), 32)
+    return datetime.datetime.fromtimestamp(timestamp_ms / 1000, tz=datetime.timezone.utc)
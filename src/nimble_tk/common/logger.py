@@ -4,6 +4,86 @@ import threading
 import sys
 import datetime
 import traceback
+import random
+import time
+import collections
+import contextvars
+
+
+class LogRateLimiter:
+    """
+    A per-key token bucket rate limiter for log messages.
+
+    Every key gets its own bucket holding up to `burst` tokens, refilled at `rate` tokens
+    per second. A message is let through only if its bucket has a token left, otherwise it
+    is counted as suppressed. The next message which gets through for the same key reports
+    how many similar messages were suppressed in between.
+
+    Attributes:
+        rate (float): Number of tokens added to each bucket per second.
+        burst (int): Maximum number of tokens a bucket can hold.
+        max_keys (int): Maximum number of keys tracked. Least recently used keys are evicted.
+    """
+
+    def __init__(self, rate=1.0, burst=5, max_keys=10000):
+        """
+        Initialize the rate limiter.
+
+        Parameters:
+            rate (float): Number of messages per second allowed for each key.
+            burst (int): Number of messages allowed in a burst for each key.
+            max_keys (int): Maximum number of keys to keep track of.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # key -> [tokens, last refill time, suppressed count]
+        self._buckets = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """
+        Try to take a token from the bucket of the given key.
+
+        Parameters:
+            key (hashable): Identifies a family of similar messages.
+
+        Returns:
+            tuple[bool, int]: Whether the message should be logged, and the number of
+            messages suppressed for the key since the last one which was logged.
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.burst), now, 0]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                suppressed, bucket[2] = bucket[2], 0
+                return True, suppressed
+            bucket[2] += 1
+            return False, 0
+
+    def pop_suppressed(self):
+        """
+        Return the suppressed message counts of all keys and reset them.
+
+        Returns:
+            dict: Mapping of key to the number of messages suppressed since the last logged one.
+        """
+        with self._lock:
+            counts = {key: bucket[2] for key, bucket in self._buckets.items() if bucket[2]}
+            for key in counts:
+                self._buckets[key][2] = 0
+        return counts
 
 
 class Logger:
@@ -19,11 +99,13 @@ class Logger:
         logger (logging.Logger): Internal Python logger instance.
         console_log_on (bool): Flag to enable or disable console logging.
         replace_new_lines (str): String to replace newlines in log messages.
+        rate_limiter (LogRateLimiter): Rate limiter used for messages logged with a `rate_limit_key`.
     """
 
     def __init__(self, log_file_path=None, console_log_on=False, max_bytes=50*1024*1024, backup_count=20,
                  logger=None, log_prefix='', replace_new_lines=None,
-                 format_='%(asctime)s %(threadName)s %(filename)s:%(lineno)d: %(message)s'):
+                 format_='%(asctime)s %(threadName)s %(filename)s:%(lineno)d: %(message)s',
+                 rate_limiter=None):
         """
         Initialize the Logger instance with specified configurations.
 
@@ -36,9 +118,12 @@ class Logger:
             log_prefix (str): Prefix string for each log message.
             replace_new_lines (str): String to replace newlines in log messages.
             format_ (str): Format string for log messages.
+            rate_limiter (LogRateLimiter): Rate limiter for messages logged with a 
+                `rate_limit_key`. Defaults to 1 message per second per key, with bursts of 5.
         """
 
         self.log_prefix = log_prefix
+        self.rate_limiter = rate_limiter or LogRateLimiter()
         self.console_log_on = console_log_on
         self.replace_new_lines = replace_new_lines
         if logger:
@@ -60,11 +145,29 @@ class Logger:
         Log informational messages.
 
         This method logs messages at the INFO level. It supports logging both to the console and to a file.
+
+        High volume messages can be throttled with the following keyword arguments:
+            rate_limit_key (hashable): Messages sharing this key are rate limited by the 
+                logger's `rate_limiter`. When a message gets through after others were 
+                dropped, it is suffixed with the number of suppressed similar messages.
+            sample_rate (float): Probability with which the message is logged, e.g. 0.01 
+                logs roughly one in a hundred calls.
         
         Parameters:
             msgs: Variable length argument list for error messages to be logged.
         """
-        thread_log_prefix = get_thread_local_attribute('thread_log_prefix', '')
+        sample_rate = kwargs.get('sample_rate')
+        if sample_rate is not None and random.random() >= sample_rate:
+            return
+
+        suppressed = 0
+        rate_limit_key = kwargs.get('rate_limit_key')
+        if rate_limit_key is not None:
+            allowed, suppressed = self.rate_limiter.acquire(rate_limit_key)
+            if not allowed:
+                return
+
+        thread_log_prefix = get_thread_local_attribute('thread_log_prefix', '') + context_log_prefix.get()
 
         log_to_file_only = False
         if 'file_only' in kwargs and kwargs['file_only']:
@@ -80,6 +183,8 @@ class Logger:
             local_logger = self.logger.error
 
         log_msg = ' '.join([thread_log_prefix] + [str(msg) for msg in msgs])
+        if suppressed:
+            log_msg += f' [suppressed {suppressed} similar messages]'
 
         if self.replace_new_lines:
             log_msg = log_msg.replace("\n", self.replace_new_lines)
@@ -97,7 +202,7 @@ class Logger:
             local_console_logger.write('\n')
             local_console_logger.flush()
 
-    def log_info_file(self, *msgs):
+    def log_info_file(self, *msgs, **kwargs):
         """
         Log informational messages to a file only and not to the console.
         Useful in case of Jupyter notebooks where we do not want to flood the browser with logs.
@@ -107,9 +212,9 @@ class Logger:
         Parameters:
             msgs: Variable length argument list for messages to be logged.
         """
-        self.log_info(*msgs, file_only=True)
+        self.log_info(*msgs, file_only=True, **kwargs)
 
-    def log_error(self, *msgs):
+    def log_error(self, *msgs, **kwargs):
         """
         Log error messages.
 
@@ -118,9 +223,9 @@ class Logger:
         Parameters:
             msgs: Variable length argument list for error messages to be logged.
         """
-        self.log_info(*msgs, level_error=True)
+        self.log_info(*msgs, level_error=True, **kwargs)
 
-    def log_error_file(self, *msgs):
+    def log_error_file(self, *msgs, **kwargs):
         """
         Log error messages to a file only and not to the console.
         Useful in case of Jupyter notebooks where we do not want to flood the browser with logs.
@@ -130,7 +235,7 @@ class Logger:
         Parameters:
             msgs: Variable length argument list for error messages to be logged.
         """
-        self.log_info(*msgs, level_error=True, file_only=True)
+        self.log_info(*msgs, level_error=True, file_only=True, **kwargs)
 
     def log_traceback(self, extra_info_str=''):
         """
@@ -161,6 +266,17 @@ class Logger:
         self.log_error_file(f'{extra_info_str}', '::',
                             error_msg[-1], '::\n', '\n'.join(error_msg))
 
+    def flush_suppressed(self):
+        """
+        Log a summary line for every rate limited key which has suppressed messages pending.
+
+        Messages are only reported as suppressed when the next message for the same key
+        gets through. Call this at the end of a batch so that trailing suppressed 
+        messages are accounted for as well.
+        """
+        for key, count in self.rate_limiter.pop_suppressed().items():
+            self.log_info(f'suppressed {count} similar messages for key: {key}')
+
 
 # a thread-local object which can be used anywhere in the app
 app_thread_local = threading.local()
@@ -213,6 +329,36 @@ def set_thread_log_prefix(prefix):
     set_thread_local_attribute('thread_log_prefix', prefix)
 
 
+# log prefix of the current context, e.g. of an asyncio task. Unlike the thread log
+# prefix, it is not shared by all the tasks running on the thread of an event loop.
+context_log_prefix = contextvars.ContextVar('ntk_context_log_prefix', default='')
+
+
+def set_context_log_prefix(prefix):
+    """
+    Set a logging prefix for the current context.
+
+    The prefix applies to the current asyncio task (and the tasks it creates
+    afterwards), or to the current thread outside of asyncio. It is appended to
+    the thread log prefix, if any.
+
+    Parameters:
+    prefix (str): The logging prefix to set for the current context.
+
+    Returns:
+    contextvars.Token: A token which can be given to `reset_context_log_prefix`.
+    """
+    return context_log_prefix.set(prefix)
+
+
+def reset_context_log_prefix(token):
+    """
+    Restore the logging prefix of the current context to its value before the
+    `set_context_log_prefix` call which returned the given token.
+    """
+    context_log_prefix.reset(token)
+
+
 class NoOpLogger:
 
     def info(self, msg):
@@ -225,7 +371,7 @@ default_logger = Logger(log_file_path=None, console_log_on=True, logger=NoOpLogg
 
 
 def init_file_logger(log_file_path, console_log_on=False, max_bytes=50*1024*1024, backup_count=10,
-                     logger=None, log_prefix='', replace_new_lines=None):
+                     logger=None, log_prefix='', replace_new_lines=None, rate_limiter=None):
     """
         Initialize a file logger with specified configurations.
 
@@ -243,6 +389,8 @@ def init_file_logger(log_file_path, console_log_on=False, max_bytes=50*1024*1024
         replace_new_lines (str, optional): If true, replaces newlines with 
             '\\n' characters. Helpul in cases where we do not want the log 
             line to be split into multiple lines.
+        rate_limiter (LogRateLimiter, optional): Rate limiter for messages logged with 
+            a `rate_limit_key`.
 
         Returns:
             None
@@ -250,7 +398,7 @@ def init_file_logger(log_file_path, console_log_on=False, max_bytes=50*1024*1024
     global default_logger
     default_logger = Logger(log_file_path, console_log_on=console_log_on, max_bytes=max_bytes,
                             backup_count=backup_count, logger=logger, log_prefix=log_prefix,
-                            replace_new_lines=replace_new_lines)
+                            replace_new_lines=replace_new_lines, rate_limiter=rate_limiter)
     
 
 def log_info(*msgs, **kwargs):
@@ -268,7 +416,7 @@ def log_info(*msgs, **kwargs):
 log = log_info  # alias for log_info
 
 
-def log_info_file(*msgs):
+def log_info_file(*msgs, **kwargs):
     """
     Log informational messages to a file only and not to the console.
     Useful in case of Jupyter notebooks where we do not want to flood the browser with logs.
@@ -278,12 +426,12 @@ def log_info_file(*msgs):
     Parameters:
         msgs: Variable length argument list for messages to be logged.
     """
-    default_logger.log_info_file(*msgs)
+    default_logger.log_info_file(*msgs, **kwargs)
 
 logf = log_info_file  # alias for log_info_file
 
 
-def log_error(*msgs):
+def log_error(*msgs, **kwargs):
     """
     Log error messages.
 
@@ -292,7 +440,7 @@ def log_error(*msgs):
     Parameters:
         msgs: Variable length argument list for error messages to be logged.
     """
-    default_logger.log_error(*msgs)
+    default_logger.log_error(*msgs, **kwargs)
 
 """
 Log error messages to a file only and not to the console.
@@ -303,8 +451,8 @@ This method logs messages at the ERROR level to the configured log file without
 Parameters:
     msgs: Variable length argument list for error messages to be logged.
 """
-def log_error_file(*msgs):
-    default_logger.log_error_file(*msgs)
+def log_error_file(*msgs, **kwargs):
+    default_logger.log_error_file(*msgs, **kwargs)
 
 """
 Log a traceback of the current exception with an optional additional message.
@@ -333,4 +481,12 @@ def log_traceback_file(extra_info_str=''):
     """
     default_logger.log_traceback_file(extra_info_str='')
 
-logtracef = log_traceback_file
\ No newline at end of file
+logtracef = log_traceback_file
+
+
+def flush_suppressed_logs():
+    """
+    Log a summary line for every rate limited key of the default logger which has 
+    suppressed messages pending. See `Logger.flush_suppressed`.
+    """
+    default_logger.flush_suppressed()
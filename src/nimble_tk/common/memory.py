@@ -0,0 +1,149 @@
+"""
+Memory instrumentation: process RSS, and tracemalloc snapshots diffed around a
+block of code.
+"""
+
+import sys
+import tracemalloc
+
+from .logger import *
+
+
+def _read_proc_status_bytes(*keys):
+    values = {}
+    with open('/proc/self/status') as reader:
+        for line in reader:
+            key, _, value = line.partition(':')
+            if key in keys:
+                # values are reported in kB
+                values[key] = int(value.split()[0]) * 1024
+    return values
+
+
+def get_process_memory() -> dict:
+    """
+    Returns the current and peak resident set size of the current process.
+
+    Returns:
+        dict: {'rss_bytes': ..., 'peak_rss_bytes': ...}. `rss_bytes` is None on
+        systems without /proc, both are None on systems without the `resource`
+        module (e.g. windows).
+    """
+    try:
+        values = _read_proc_status_bytes('VmRSS', 'VmHWM')
+        return {'rss_bytes': values.get('VmRSS'), 'peak_rss_bytes': values.get('VmHWM')}
+    except FileNotFoundError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return {'rss_bytes': None, 'peak_rss_bytes': None}
+    # ru_maxrss is in kilobytes on linux, bytes on macos
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'rss_bytes': None, 'peak_rss_bytes': maxrss if sys.platform == 'darwin' else maxrss * 1024}
+
+
+def format_bytes(num_bytes: float) -> str:
+    """
+    Returns a human readable size, e.g. '1.50 MiB'.
+    """
+    if num_bytes is None:
+        return 'NA'
+    sign = '-' if num_bytes < 0 else ''
+    num_bytes = abs(num_bytes)
+    for unit in ['B', 'KiB', 'MiB', 'GiB', 'TiB']:
+        if num_bytes < 1024 or unit == 'TiB':
+            return f'{sign}{num_bytes:.0f} {unit}' if unit == 'B' else f'{sign}{num_bytes:.2f} {unit}'
+        num_bytes /= 1024
+
+
+class trace_memory:
+    """
+    Traces the python memory allocations of a block of code with tracemalloc,
+    and reports where memory went: the top allocation sites which grew during
+    the block, the peak of traced memory, and the change of the process RSS.
+
+    Tracing slows down allocations noticeably, so use it while investigating
+    rather than in production runs.
+
+    Sample code
+    >>> with ntk.trace_memory('load_data') as tracer:
+    >>>     df = pd.read_csv(...)
+    >>> tracer.diff[:3]
+
+    Attributes:
+        diff (list): `tracemalloc.StatisticDiff`s, the biggest growth first.
+        allocated_bytes (int): Net traced memory allocated during the block.
+        peak_bytes (int): Peak of traced memory during the block. On python 3.8
+            (without `tracemalloc.reset_peak`), when tracemalloc was already
+            tracing before the block, the peak since tracing started.
+        rss_before (dict): `get_process_memory()` before the block.
+        rss_after (dict): `get_process_memory()` after the block.
+    """
+
+    def __init__(self, label: str = '', top: int = 10, key_type: str = 'lineno',
+                 frames: int = 1, log: bool = True):
+        """
+        Args:
+            label (str): Label of the block in the log.
+            top (int): Number of allocation sites logged.
+            key_type (str): How allocations are grouped: 'lineno', 'filename' or 'traceback'.
+            frames (int): Number of frames stored per allocation, when tracemalloc
+                is not tracing yet. More frames are more expensive.
+            log (bool): Whether to log the report.
+        """
+        self.label = label
+        self.top = top
+        self.key_type = key_type
+        self.frames = frames
+        self.log = log
+        self.diff = []
+        self.allocated_bytes = 0
+        self.peak_bytes = 0
+        self.rss_before = self.rss_after = None
+        self._started_tracing = False
+        self._snapshot = None
+
+    def __enter__(self):
+        self.rss_before = get_process_memory()
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(self.frames)
+        if hasattr(tracemalloc, 'reset_peak'):
+            # python >= 3.9. Before, a trace started here has no earlier peak anyway
+            tracemalloc.reset_peak()
+        self._start_bytes = tracemalloc.get_traced_memory()[0]
+        self._snapshot = tracemalloc.take_snapshot()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        snapshot = tracemalloc.take_snapshot()
+        current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        if self._started_tracing:
+            tracemalloc.stop()
+        self.rss_after = get_process_memory()
+        self.allocated_bytes = current_bytes - self._start_bytes
+        self.peak_bytes = peak_bytes - self._start_bytes
+        # ignore the allocations of tracemalloc itself
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        self.diff = snapshot.filter_traces(filters).compare_to(
+            self._snapshot.filter_traces(filters), self.key_type)
+        self._snapshot = None
+        if self.log:
+            log_info(self.report())
+
+    def report(self) -> str:
+        """
+        Returns:
+            str: The report of the traced block.
+        """
+        rss_before, rss_after = self.rss_before['rss_bytes'], self.rss_after['rss_bytes']
+        rss_change = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        lines = [f'Memory trace {self.label} - allocated: {format_bytes(self.allocated_bytes)}, '
+                 f'peak: {format_bytes(self.peak_bytes)}, RSS: {format_bytes(rss_after)} '
+                 f'({format_bytes(rss_change)}), peak RSS: {format_bytes(self.rss_after["peak_rss_bytes"])}']
+        for stat in self.diff[:self.top]:
+            frame = stat.traceback[0]
+            lines.append(f'  {frame.filename}:{frame.lineno}: {format_bytes(stat.size_diff)} '
+                         f'in {stat.count_diff} blocks (total: {format_bytes(stat.size)})')
+        return '\n'.join(lines)
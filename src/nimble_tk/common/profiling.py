@@ -0,0 +1,418 @@
+"""
+Profiling hooks for hot-path functions and pipeline stages.
+
+Wrap functions with `@ntk.profile` and blocks with `with ntk.profiled('stage'):`.
+What is collected depends on the profiling mode, read from the NTK_PROFILE
+environment variable and changeable at runtime with `set_profile_mode`:
+
+- 'off' (default): nothing is collected, a profiled call costs a global lookup.
+- 'time': durations are recorded into the `timer_registry`, and the self time
+  (in microseconds) of nested stages is aggregated as collapsed stacks.
+- 'cprofile': every thread running a profiled block is profiled with cProfile,
+  and the stats of all threads are merged.
+- 'sample': a statistical sampler (driven by SIGPROF, or by a background thread
+  when the profiling starts outside of the main thread) records the python
+  stacks, down to the current line, of the threads running a profiled block.
+
+Results aggregate across threads, and every process (e.g. forked
+`run_concurrently` workers) writes its own files into NTK_PROFILE_DIR, once
+every `FLUSH_INTERVAL` seconds and at exit. Collapsed stacks are in the format
+of Brendan Gregg's flamegraph.pl, and can be merged across processes with
+`merge_collapsed_stacks`.
+
+Sample code
+>>> ntk.set_profile_mode('sample')
+>>> @ntk.profile
+>>> def build_features(df):
+>>>     ...
+>>>
+>>> results, errors = ntk.run_concurrently(functions, max_workers=8, fork=True)
+>>> ntk.flush_profile()
+>>> ntk.merge_collapsed_stacks(kind='sample', output_path='features.collapsed')
+>>> # flamegraph.pl features.collapsed > features.svg
+"""
+
+import os
+import sys
+import time
+import glob
+import signal
+import atexit
+import tempfile
+import threading
+import functools
+
+from .logger import *
+from .timers import *
+
+PROFILE_MODES = ('off', 'time', 'cprofile', 'sample')
+# seconds between two samples in 'sample' mode
+SAMPLE_INTERVAL = 0.005
+# min seconds between two writes of the results of a process
+FLUSH_INTERVAL = 10.0
+
+_mode = 'off'
+_profile_dir = os.environ.get('NTK_PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'ntk_profile')
+
+# 'time' mode: collapsed stack of stage names -> self time in microseconds
+_time_stacks = {}
+# 'sample' mode: collapsed stack of frames -> number of samples, only written by the sampler
+_sample_stacks = {}
+# 'cprofile' mode: merged pstats.Stats of all threads
+_cprofile_stats = None
+_lock = threading.Lock()
+
+
+class _ThreadState(threading.local):
+
+    def __init__(self):
+        # [stage, mode, start ns, time spent in nested stages ns] of the open blocks
+        self.stack = []
+        self.profiler = None
+
+
+_state = _ThreadState()
+# thread ident -> (outermost stage, frame it was entered from), of threads in 'sample' mode
+_sampled_threads = {}
+_sampler = None
+_last_flush = time.monotonic()
+_exit_hooks_pid = None
+
+
+def get_profile_mode() -> str:
+    """
+    Returns:
+        str: The current profiling mode, one of `PROFILE_MODES`.
+    """
+    return _mode
+
+
+def set_profile_mode(mode: str) -> None:
+    """
+    Sets the profiling mode. Blocks already running finish in the mode they
+    were started with.
+
+    Args:
+        mode (str): One of 'off', 'time', 'cprofile' or 'sample'.
+    """
+    global _mode
+    mode = (mode or 'off').lower()
+    if mode not in PROFILE_MODES:
+        raise ValueError(f'Invalid profile mode: {mode}, expected one of {PROFILE_MODES}')
+    _mode = mode
+
+
+def set_profile_dir(profile_dir: str) -> None:
+    """
+    Sets the directory into which every process writes its results. Defaults to
+    the NTK_PROFILE_DIR environment variable, or `<tmp dir>/ntk_profile`.
+    """
+    global _profile_dir
+    _profile_dir = profile_dir
+
+
+def _frame_label(frame, line=False):
+    code = frame.f_code
+    label = f'{code.co_name} ({os.path.basename(code.co_filename)}'
+    return f'{label}:{frame.f_lineno})' if line else f'{label})'
+
+
+def _collapse_frames(stage, entry_frame, frame):
+    """Returns the collapsed stack from the entry frame of a profiled block down to the given frame."""
+    labels, leaf = [], True
+    while frame is not None:
+        if frame.f_code.co_filename != __file__:
+            labels.append(_frame_label(frame, line=leaf))
+            leaf = False
+        if frame is entry_frame:
+            break
+        frame = frame.f_back
+    labels.append(stage)
+    return ';'.join(reversed(labels))
+
+
+def _take_sample(*args):
+    frames = sys._current_frames()
+    for ident, (stage, entry_frame) in list(_sampled_threads.items()):
+        frame = frames.get(ident)
+        if frame is not None:
+            stack = _collapse_frames(stage, entry_frame, frame)
+            _sample_stacks[stack] = _sample_stacks.get(stack, 0) + 1
+
+
+class _Sampler:
+    """
+    Samples the stacks of the threads running profiled blocks every `interval`
+    seconds of CPU time with SIGPROF, or of wall clock time with a background
+    thread when the signal handler can not be installed (from another thread than
+    the main thread).
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._thread = None
+        self._stop = None
+        self.use_signal = threading.current_thread() is threading.main_thread() and hasattr(signal, 'setitimer')
+        if self.use_signal:
+            signal.signal(signal.SIGPROF, _take_sample)
+
+    def start(self):
+        if self.use_signal:
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True,
+                                            name='ntk-profile-sampler')
+            self._thread.start()
+
+    def stop(self):
+        if self.use_signal:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+        else:
+            self._stop.set()
+
+    def _run(self, stop):
+        while not stop.wait(self.interval):
+            _take_sample()
+
+
+def _start_cprofile():
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # python >= 3.12 allows a single active profiler per process
+        log_error_file('cProfile is already active in another thread', rate_limit_key='ntk.profile cprofile')
+        return None
+    return profiler
+
+
+def _stop_cprofile(profiler):
+    global _cprofile_stats
+    import pstats
+    profiler.disable()
+    with _lock:
+        if _cprofile_stats is None:
+            _cprofile_stats = pstats.Stats(profiler)
+        else:
+            _cprofile_stats.add(profiler)
+
+
+def _enter(stage, mode, entry_frame):
+    global _sampler
+    state = _state
+    if not state.stack:
+        _register_exit_hooks()
+        if mode == 'cprofile':
+            state.profiler = _start_cprofile()
+        elif mode == 'sample':
+            with _lock:
+                if not _sampled_threads:
+                    if _sampler is None:
+                        _sampler = _Sampler(SAMPLE_INTERVAL)
+                    _sampler.start()
+                _sampled_threads[threading.get_ident()] = (stage, entry_frame)
+    state.stack.append([stage, mode, time.perf_counter_ns(), 0])
+
+
+def _exit():
+    global _last_flush
+    end_ns = time.perf_counter_ns()
+    state = _state
+    stage, mode, start_ns, nested_ns = state.stack.pop()
+    elapsed_ns = end_ns - start_ns
+    timer_registry.record(stage, elapsed_ns)
+    if state.stack:
+        state.stack[-1][3] += elapsed_ns
+    if mode == 'time':
+        stack = ';'.join([block[0] for block in state.stack] + [stage])
+        with _lock:
+            _time_stacks[stack] = _time_stacks.get(stack, 0) + (elapsed_ns - nested_ns) // 1000
+    if not state.stack:
+        if mode == 'cprofile' and state.profiler is not None:
+            _stop_cprofile(state.profiler)
+            state.profiler = None
+        elif mode == 'sample':
+            with _lock:
+                _sampled_threads.pop(threading.get_ident(), None)
+                if not _sampled_threads:
+                    _sampler.stop()
+        if time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+            _last_flush = time.monotonic()
+            flush_profile()
+
+
+class profiled:
+    """
+    Profiles a block of code as a named stage, according to the current
+    profiling mode (see `set_profile_mode`).
+
+    Sample code
+    >>> with ntk.profiled('load_data'):
+    >>>     df = pd.read_csv(...)
+    """
+
+    __slots__ = ('stage', 'active')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.active = False
+
+    def __enter__(self):
+        if _mode != 'off':
+            self.active = True
+            _enter(self.stage, _mode, sys._getframe(1))
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.active:
+            self.active = False
+            _exit()
+
+
+def profile(function=None, stage: str = None):
+    """
+    Decorator profiling every call of a function as a stage named after the
+    function, according to the current profiling mode (see `set_profile_mode`).
+
+    Sample code
+    >>> @ntk.profile
+    >>> def build_features(df):
+    >>>     ...
+    >>>
+    >>> @ntk.profile(stage='features')
+    >>> def build_features(df):
+    >>>     ...
+
+    Args:
+        function (callable): The decorated function.
+        stage (str, optional): Name of the stage. Defaults to the qualified name
+            of the function.
+    """
+    if function is None:
+        return functools.partial(profile, stage=stage)
+    stage = stage or function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        mode = _mode
+        if mode == 'off':
+            return function(*args, **kwargs)
+        _enter(stage, mode, sys._getframe(0))
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _exit()
+    return wrapper
+
+
+def _write_collapsed(stacks, filepath):
+    from .files import write_to_file
+    write_to_file(filepath, ''.join(f'{stack} {count}\n' for stack, count in stacks.items()), strip=False)
+
+
+def flush_profile() -> None:
+    """
+    Writes the results of the current process into the profile directory, as
+    `<pid>.time.collapsed`, `<pid>.sample.collapsed` and `<pid>.prof` (loadable
+    with `pstats`, snakeviz etc.). Called automatically at exit.
+    """
+    pid = os.getpid()
+    with _lock:
+        time_stacks = dict(_time_stacks)
+        sample_stacks = dict(_sample_stacks)
+        cprofile_stats = _cprofile_stats
+        if time_stacks or sample_stacks or cprofile_stats is not None:
+            os.makedirs(_profile_dir, exist_ok=True)
+        if cprofile_stats is not None:
+            cprofile_stats.dump_stats(os.path.join(_profile_dir, f'{pid}.prof'))
+    if time_stacks:
+        _write_collapsed(time_stacks, os.path.join(_profile_dir, f'{pid}.time.collapsed'))
+    if sample_stacks:
+        _write_collapsed(sample_stacks, os.path.join(_profile_dir, f'{pid}.sample.collapsed'))
+
+
+def reset_profile() -> None:
+    """
+    Clears the results collected so far by the current process.
+    """
+    global _cprofile_stats
+    with _lock:
+        _time_stacks.clear()
+        _sample_stacks.clear()
+        _cprofile_stats = None
+
+
+def merge_collapsed_stacks(profile_dir: str = None, kind: str = 'sample', output_path: str = None) -> dict:
+    """
+    Merges the collapsed stacks written by all processes into the profile directory.
+
+    Args:
+        profile_dir (str, optional): Defaults to the current profile directory.
+        kind (str): 'sample' for sample counts, or 'time' for self times in microseconds.
+        output_path (str, optional): If given, the merged stacks are written to it,
+            e.g. for flamegraph.pl.
+
+    Returns:
+        dict: Collapsed stack -> total count.
+    """
+    stacks = {}
+    for filepath in sorted(glob.glob(os.path.join(profile_dir or _profile_dir, f'*.{kind}.collapsed'))):
+        with open(filepath) as reader:
+            for line in reader:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack:
+                    stacks[stack] = stacks.get(stack, 0) + int(count)
+    if output_path:
+        _write_collapsed(stacks, output_path)
+    return stacks
+
+
+def merge_cprofile_stats(profile_dir: str = None):
+    """
+    Merges the cProfile stats written by all processes into the profile directory.
+
+    Returns:
+        pstats.Stats: The merged stats, or None if there are none.
+    """
+    import pstats
+    filepaths = sorted(glob.glob(os.path.join(profile_dir or _profile_dir, '*.prof')))
+    return pstats.Stats(*filepaths) if filepaths else None
+
+
+def _register_exit_hooks():
+    """Makes sure the results of the current process are flushed when it exits."""
+    global _exit_hooks_pid
+    if _exit_hooks_pid == os.getpid():
+        return
+    _exit_hooks_pid = os.getpid()
+    atexit.register(flush_profile)
+    # worker processes of multiprocessing exit with os._exit, which skips atexit
+    from multiprocessing import util
+    util.Finalize(None, flush_profile, exitpriority=100)
+
+
+def _after_fork_in_child():
+    # a forked child starts with the results of its parent, and with the blocks
+    # open in the forking thread
+    global _state, _sampler, _cprofile_stats, _lock
+    _state = _ThreadState()
+    _lock = threading.Lock()
+    _time_stacks.clear()
+    _sample_stacks.clear()
+    _sampled_threads.clear()
+    _cprofile_stats = None
+    if _sampler is not None and _sampler.use_signal:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+    _sampler = None
+
+
+# fork is POSIX only
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+try:
+    set_profile_mode(os.environ.get('NTK_PROFILE', 'off'))
+except ValueError as e:
+    log_error(f'{e}, profiling is off')
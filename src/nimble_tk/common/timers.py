@@ -0,0 +1,230 @@
+import time
+import threading
+import functools
+
+
+class TimerStats:
+    """
+    Aggregated durations recorded for a named timer.
+
+    Durations are counted in a log-linear histogram, similar to an HDR histogram:
+    every power of two range is split into 16 equal buckets, which bounds the
+    relative error of the reported percentiles to about 6%, with constant memory
+    and a handful of integer operations per recorded duration.
+
+    Attributes:
+        name (str): Name of the timer.
+        count (int): Number of recorded durations.
+        total_ns (int): Sum of the recorded durations in nanoseconds.
+        min_ns (int): Smallest recorded duration in nanoseconds.
+        max_ns (int): Largest recorded duration in nanoseconds.
+    """
+
+    SUB_BUCKET_BITS = 4
+    _SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = None
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _bucket_range(cls, bucket):
+        """Returns the (lowest, highest) duration counted in the given bucket."""
+        if bucket < 2 * cls._SUB_BUCKETS:
+            return bucket, bucket
+        shift = bucket // cls._SUB_BUCKETS - 1
+        top = bucket % cls._SUB_BUCKETS + cls._SUB_BUCKETS
+        return top << shift, ((top + 1) << shift) - 1
+
+    def record(self, duration_ns: int) -> None:
+        """
+        Records a duration.
+
+        Args:
+            duration_ns (int): The duration in nanoseconds.
+        """
+        shift = duration_ns.bit_length() - self.SUB_BUCKET_BITS - 1
+        if shift <= 0:
+            bucket = duration_ns
+        else:
+            bucket = (shift + 1) * self._SUB_BUCKETS + (duration_ns >> shift) - self._SUB_BUCKETS
+        with self._lock:
+            if not self.count:
+                self.min_ns = self.max_ns = duration_ns
+            elif duration_ns < self.min_ns:
+                self.min_ns = duration_ns
+            elif duration_ns > self.max_ns:
+                self.max_ns = duration_ns
+            self.count += 1
+            self.total_ns += duration_ns
+            buckets = self._buckets
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+
+    def percentile(self, percent: float) -> float:
+        """
+        Returns the approximate given percentile of the recorded durations.
+
+        Args:
+            percent (float): The percentile, between 0 and 100.
+
+        Returns:
+            float: The duration in nanoseconds, or None if nothing was recorded.
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            if percent >= 100:
+                return self.max_ns
+            rank = max(1, percent / 100 * self.count)
+            seen = 0
+            for bucket in sorted(self._buckets):
+                seen += self._buckets[bucket]
+                if seen >= rank:
+                    low, high = self._bucket_range(bucket)
+                    return min(max((low + high) / 2, self.min_ns), self.max_ns)
+            return self.max_ns
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count else None
+
+    def to_dict(self) -> dict:
+        """
+        Returns:
+            dict: The statistics of the timer, with durations in milliseconds.
+        """
+        def to_ms(value):
+            return value / 1e6 if value is not None else None
+
+        return {
+            'name': self.name,
+            'count': self.count,
+            'total_ms': to_ms(self.total_ns),
+            'mean_ms': to_ms(self.mean_ns),
+            'min_ms': to_ms(self.min_ns),
+            'p50_ms': to_ms(self.percentile(50)),
+            'p90_ms': to_ms(self.percentile(90)),
+            'p99_ms': to_ms(self.percentile(99)),
+            'max_ms': to_ms(self.max_ns),
+        }
+
+
+class TimerRegistry:
+    """
+    A registry of named timers, aggregating durations recorded from anywhere in
+    the application (e.g. with `timed` or a named `StopWatch`).
+    """
+
+    def __init__(self):
+        self._timers = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> TimerStats:
+        """
+        Returns the timer with the given name, creating it if needed.
+        """
+        timer = self._timers.get(name)
+        if timer is None:
+            with self._lock:
+                timer = self._timers.setdefault(name, TimerStats(name))
+        return timer
+
+    def record(self, name: str, duration_ns: int) -> None:
+        """
+        Records a duration for the timer with the given name.
+        """
+        self.get(name).record(duration_ns)
+
+    def timers(self) -> list:
+        """
+        Returns:
+            list: All timers, in the order they were created.
+        """
+        return list(self._timers.values())
+
+    def reset(self) -> None:
+        """
+        Removes all timers.
+        """
+        with self._lock:
+            self._timers = {}
+
+    def to_df(self):
+        """
+        Returns:
+            pd.DataFrame: The statistics of all timers, one row per timer.
+        """
+        import pandas as pd
+        return pd.DataFrame([timer.to_dict() for timer in self.timers()],
+                            columns=['name', 'count', 'total_ms', 'mean_ms', 'min_ms',
+                                     'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'])
+
+
+# the registry used by default by `timed` and named `StopWatch`es
+timer_registry = TimerRegistry()
+
+
+class timed:
+    """
+    Records the duration of a block of code or of every call of a function into
+    a `TimerRegistry`.
+
+    Sample code
+    >>> with ntk.timed('load_data'):
+    >>>     df = pd.read_csv(...)
+    >>>
+    >>> @ntk.timed('feature_engineering')
+    >>> def build_features(df):
+    >>>     ...
+    >>>
+    >>> ntk.get_timer_stats_df()
+    """
+
+    def __init__(self, name: str = None, registry: TimerRegistry = None):
+        """
+        Args:
+            name (str, optional): Name of the timer. Defaults to the qualified
+                name of the decorated function.
+            registry (TimerRegistry, optional): Defaults to `timer_registry`.
+        """
+        self.name = name
+        self.registry = registry or timer_registry
+        self._start_ns = threading.local()
+
+    def __enter__(self):
+        self._start_ns.value = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.registry.record(self.name, time.perf_counter_ns() - self._start_ns.value)
+
+    def __call__(self, function):
+        timer = self.registry.get(self.name or function.__qualname__)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start_ns = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timer.record(time.perf_counter_ns() - start_ns)
+        return wrapper
+
+
+def get_timer_stats_df(registry: TimerRegistry = None):
+    """
+    Returns the statistics of all timers as a DataFrame, e.g. for analysis in a
+    notebook.
+
+    Args:
+        registry (TimerRegistry, optional): Defaults to `timer_registry`.
+
+    Returns:
+        pd.DataFrame: One row per timer.
+    """
+    return (registry or timer_registry).to_df()
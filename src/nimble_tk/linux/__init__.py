@@ -1,8 +1,17 @@
 import zlib
+import codecs
+import random
 import datetime
+import os
+import time
+import signal
+import selectors
+import collections
+import threading
 
 # import common
 from .. import common
+from .resources import *
 
 from typing import Optional, Callable, Tuple, Any
 import datetime
@@ -13,14 +22,70 @@ Utility functions for Linux
 
 import subprocess
 
+# size of the blocks read from child process pipes and compressed streams
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
 # for remote ssh, keys need to be exchanged between systems
 
 
+def _pump_output(stream, block_size, capture=None, on_lines=None):
+    """
+    Reads a process output stream in blocks of up to `block_size` bytes until EOF.
+
+    Args:
+        stream: The stdout of a process.
+        block_size (int): Size of the read buffer.
+        capture (bytearray, optional): The output is appended to this.
+        on_lines (Callable[[list], Any], optional): Called with the complete lines 
+            (bytes, without newlines) of every block.
+    """
+    buffer = memoryview(bytearray(block_size))
+    splitter = LineSplitter()
+    while True:
+        n = stream.readinto1(buffer)
+        if not n:
+            break
+        if capture is not None:
+            capture += buffer[:n]
+        if on_lines is not None:
+            lines = splitter.feed(bytes(buffer[:n]))
+            if lines:
+                on_lines(lines)
+    if on_lines is not None:
+        lines = splitter.flush()
+        if lines:
+            on_lines(lines)
+
+
+class _BatchLogger(object):
+    """
+    Logs the lines of every block of a command's output with a single log call, 
+    optionally only for a random sample of the blocks.
+    """
+
+    def __init__(self, log_info, sample_rate=1.0):
+        self.log_info = log_info
+        self.sample_rate = sample_rate
+        self.skipped_lines = 0
+
+    def __call__(self, lines):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            self.skipped_lines += len(lines)
+            return
+        # lines are complete, so decoding them together never splits a character
+        self.log_info(b'\n'.join(lines).decode('utf-8', errors='replace').rstrip())
+
+
 def run_command(command: str, log: bool = True, 
                 log_info: Callable[[str], Any] = common.log_info, 
                 env: Optional[dict] = None, 
                 fail_on_error: bool = True, 
-                track_time: bool = False
+                track_time: bool = False,
+                block_size: int = DEFAULT_BLOCK_SIZE,
+                capture: Optional[bytearray] = None,
+                log_sample_rate: float = 1.0,
+                track_resources: bool = False,
+                resource_sample_interval: float = 1.0
             ) -> Tuple[int, Optional[datetime.timedelta]]:
     """
     A utility function to execute linux commands.
@@ -39,100 +104,275 @@ def run_command(command: str, log: bool = True,
         env (Optional[dict]): Environment variables for the command.
         fail_on_error (bool): If True, raises an error if the command execution fails.
         track_time (bool): If True, tracks and returns the execution time.
+        block_size (int): The output is read in blocks of up to this many bytes. 
+            The lines of each block are logged with a single log call.
+        capture (Optional[bytearray]): If given, the raw output of the command is 
+            appended to it, without any per line processing. 
+            e.g. `output = bytearray(); run_command("zcat ...", log=False, capture=output)`
+        log_sample_rate (float): Fraction of the output blocks to log, for commands
+            which print too much to log everything. Defaults to 1.0.
+        track_resources (bool): If True, collects the resources used by the command -
+            CPU time, max RSS, block I/O and context switches from `os.wait4`, plus
+            memory and I/O of the whole process tree sampled from /proc - and 
+            returns them as a `ResourceReport`, which is also logged.
+        resource_sample_interval (float): Seconds between /proc samples when 
+            `track_resources` is True.
 
     Returns:
         Tuple[int, Optional[datetime.timedelta]]: A tuple containing the return code of the command, 
         and the elapsed time (datetime.timedelta) if track_time is True, else None.
+        If track_resources is True, the `ResourceReport` is appended to the returned tuple, 
+        e.g. `returncode, report = run_command(..., track_resources=True)`.
     """
-    if track_time:
-        start = datetime.datetime.now()
+    start = datetime.datetime.now()
     final_command = command
 
     if log:
         log_info('Executing command: %s - env: %s' % (final_command, env))
     p = subprocess.Popen(final_command, stdout=subprocess.PIPE,
                          stderr=subprocess.STDOUT, stdin=None, shell=True, env=env)
-    for line in iter(p.stdout.readline, b''):
-        if log:
-            log_info(line.decode('utf-8').strip())
-    p.terminate()
-    p.wait()
+    sampler = ProcessTreeSampler(p.pid, resource_sample_interval).start() if track_resources else None
+    batch_logger = _BatchLogger(log_info, log_sample_rate) if log else None
+    _pump_output(p.stdout, block_size, capture=capture, on_lines=batch_logger)
+    if track_resources:
+        report = wait_with_rusage(p, sampler, start)
+    else:
+        p.terminate()
+        p.wait()
     if p.returncode != 0 and fail_on_error:
         raise ValueError('Process exit status: %s' % p.returncode)
     if log:
+        if batch_logger.skipped_lines:
+            log_info(f'{batch_logger.skipped_lines} output lines not logged (log_sample_rate: {log_sample_rate})')
         log_info('command return output', p.returncode)
+        if track_resources:
+            log_info(f'command resources: {report}')
 
+    result = (p.returncode,)
     if track_time:
         end = datetime.datetime.now()
         elapsed = end - start
-        return p.returncode, elapsed
-    else:
-        return p.returncode
+        result += (elapsed,)
+    if track_resources:
+        result += (report,)
+    return result if len(result) > 1 else p.returncode
 
 
 cmd = run_command
 
 
-def stream_gzip_decompress(stream):
+def iter_blocks(stream, block_size: int = DEFAULT_BLOCK_SIZE):
+    """
+    Generator function that reads a binary stream in blocks until EOF.
+
+    Args:
+        stream: A binary file-like object, e.g. the stdout of a process.
+        block_size (int): Max number of bytes per block.
+
+    Yields:
+        bytes: The next block of data. Blocks are returned as soon as some data is 
+        available, so they can be smaller than `block_size`.
+    """
+    read = getattr(stream, 'read1', stream.read)
+    while True:
+        block = read(block_size)
+        if not block:
+            break
+        yield block
+
+
+class LineSplitter(object):
+    """
+    Incrementally splits blocks of bytes into lines.
+
+    Only the incomplete last line of a block is buffered, and it is joined just once
+    with the rest of the line when its end arrives, so the work done is linear in 
+    the size of the data irrespective of how lines straddle blocks.
+    """
+
+    def __init__(self, keepends: bool = False):
+        """
+        Args:
+            keepends (bool): Whether to keep the trailing b'\\n' of each line.
+        """
+        self.keepends = keepends
+        self._pending = []
+
+    def feed(self, block: bytes) -> list:
+        """
+        Adds a block of data.
+
+        Args:
+            block (bytes): The next block of data.
+
+        Returns:
+            list: The lines completed by this block.
+        """
+        lines = block.split(b'\n')
+        remainder = lines.pop()
+        if not lines:
+            if remainder:
+                self._pending.append(remainder)
+            return lines
+        if self._pending:
+            self._pending.append(lines[0])
+            lines[0] = b''.join(self._pending)
+            self._pending = []
+        if remainder:
+            self._pending.append(remainder)
+        if self.keepends:
+            lines = [line + b'\n' for line in lines]
+        return lines
+
+    def flush(self) -> list:
+        """
+        Returns:
+            list: The last line, if the data did not end with a newline.
+        """
+        if not self._pending:
+            return []
+        line = b''.join(self._pending)
+        self._pending = []
+        return [line]
+
+
+def iter_lines_from_blocks(blocks, keepends: bool = False):
+    """
+    Generator function that splits an iterable of byte blocks into lines.
+
+    Args:
+        blocks (iterable): Blocks of bytes.
+        keepends (bool): Whether to keep the trailing b'\\n' of each line.
+
+    Yields:
+        bytes: The next line.
+    """
+    splitter = LineSplitter(keepends=keepends)
+    for block in blocks:
+        yield from splitter.feed(block)
+    yield from splitter.flush()
+
+
+def _new_decompressobj(compression):
+    if compression == 'gzip':
+        # offset 32 to auto-detect and skip the gzip header
+        return zlib.decompressobj(32 + zlib.MAX_WBITS)
+    elif compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('zstd decompression needs the zstandard package - pip install zstandard')
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f'Unsupported compression: {compression}')
+
+
+def stream_decompress(blocks, compression: str = 'gzip'):
+    """
+    Generator function that decompresses a stream of compressed byte blocks.
+
+    Streams made of multiple concatenated gzip members or zstd frames, e.g. the 
+    output of `cat a.gz b.gz`, are decompressed completely.
+
+    Args:
+        blocks (iterable): Blocks of compressed bytes, e.g. from `iter_blocks`.
+        compression (str): 'gzip' or 'zstd'. zstd needs the `zstandard` package.
+
+    Yields:
+        bytes: Blocks of decompressed data.
+    """
+    dec = _new_decompressobj(compression)
+    for block in blocks:
+        while block:
+            output = dec.decompress(block)
+            if output:
+                yield output
+            if dec.eof:
+                # start of the next gzip member / zstd frame, if any
+                block = dec.unused_data
+                dec = _new_decompressobj(compression)
+            else:
+                block = b''
+    output = dec.flush()
+    if output:
+        yield output
+
+
+def stream_gzip_decompress(stream, compression: str = 'gzip'):
     """
     Generator function that decompresses a gzip-compressed stream.
 
     Args:
         stream (iterable): An iterable stream of compressed data.
+        compression (str): 'gzip' or 'zstd'.
 
     Yields:
-        str: Decompressed data, line by line.
+        bytes: Decompressed data, line by line, including the trailing newline.
     """
-    # offset 32 to skip the header
-    dec = zlib.decompressobj(32 + zlib.MAX_WBITS)
-    rem = ''
-    for chunk in stream:
-        rv = rem + dec.decompress(chunk)
-        if rv:
-            split = rv.split('\n')
-            for line in split[:-1]:
-                yield line
-            rem = split[-1]
+    yield from iter_lines_from_blocks(stream_decompress(stream, compression), keepends=True)
+
+
+# compression format -> command used to compress the output of a command
+_COMPRESS_COMMANDS = {
+    'gzip': 'gzip -c',
+    'zstd': 'zstd -c -q',
+}
 
 
-def run_command_return_iter(command, compress=False, env=None, log=True):
+def run_command_return_iter(command, compress=False, env=None, log=True, block_size=DEFAULT_BLOCK_SIZE):
     """
         Executes a command and returns an iterator to its output, optionally compressing the output.
 
+        Compressing helps when the output travels over a slow link, e.g. when the command 
+        is run over ssh. The output is read in blocks of `block_size` bytes and decompressed 
+        on the fly.
+
         Args:
             command (str): The command to execute.
-            compress (bool): If True, compresses the command output.
+            compress (bool or str): If True or 'gzip', compresses the command output with gzip. 
+                'zstd' compresses it with zstd.
             env (dict, optional): Environment variables for the command.
             log (bool): Flag to enable logging.
+            block_size (int): Number of bytes read from the process at a time.
 
         Returns:
             tuple: A tuple containing an iterator to the command output and the process object.
     """
 
+    if compress is True:
+        compress = 'gzip'
     if compress:
-        command += ' | gzip -c '
+        # the sub-shell makes sure the output of every part of a compound command is compressed
+        command = f'( {command} ) | {_COMPRESS_COMMANDS[compress]} '
     final_command = command
 
     if log:
         common.log_info('Executing command: %s' % final_command)
     p = subprocess.Popen(final_command, stdout=subprocess.PIPE,
                          stderr=subprocess.STDOUT, stdin=None, shell=True, env=env)
+    blocks = iter_blocks(p.stdout, block_size)
     if not compress:
-        return common.IterWrapper(iter(p.stdout.readline, b'')), p
+        return common.IterWrapper(iter_lines_from_blocks(blocks, keepends=True)), p
     else:
-        return common.IterWrapper(stream_gzip_decompress(iter(p.stdout.readline, b''))), p
+        return common.IterWrapper(stream_gzip_decompress(blocks, compress)), p
 
 # for remote ssh, keys need to be exchanged between systems
 
 
-def run_command_iter_output(command, log=True, env=None):
+def run_command_iter_output(command, log=True, env=None, block_size=DEFAULT_BLOCK_SIZE, output='lines'):
     """
     Executes a command and yields its output line by line.
 
+    The output is read in blocks of up to `block_size` bytes.
+
     Args:
         command (str): The command to execute.
         log (bool): Flag to enable logging.
         env (dict, optional): Environment variables for the command.
+        block_size (int): Size of the blocks read from the process.
+        output (str): What to yield:
+            'lines' - the decoded lines, including the trailing newline.
+            'chunks' - decoded text chunks, as they are read.
+            'bytes' - raw blocks of bytes, as they are read.
 
     Yields:
         str: The output of the command, line by line.
@@ -143,27 +383,398 @@ def run_command_iter_output(command, log=True, env=None):
         common.log_info('Executing command: %s, env: %s' % (final_command, env))
     p = subprocess.Popen(final_command, stdout=subprocess.PIPE,
                          stderr=subprocess.STDOUT, stdin=None, shell=True, env=env)
-    for line in iter(p.stdout.readline, b''):
-        yield line.decode('utf-8')
+    blocks = iter_blocks(p.stdout, block_size)
+    if output == 'bytes':
+        yield from blocks
+    elif output == 'chunks':
+        # incremental decoding keeps multi-byte characters split across blocks intact
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        for block in blocks:
+            chunk = decoder.decode(block)
+            if chunk:
+                yield chunk
+        chunk = decoder.decode(b'', final=True)
+        if chunk:
+            yield chunk
+    elif output == 'lines':
+        for line in iter_lines_from_blocks(blocks, keepends=True):
+            yield line.decode('utf-8', errors='replace')
+    else:
+        raise ValueError(f"output should be one of 'lines', 'chunks' or 'bytes' - got: {output}")
     p.terminate()
     p.wait()
     if log:
-        log.log_info('command return output', p.returncode)
+        common.log_info('command return output', p.returncode)
 
 
-def run_command_return_output(command, log=True):
+def run_command_return_output(command, log=True, env=None):
     """
     Executes a command and returns its output as a single string.
 
     Args:
         command (str): The command to execute.
         log (bool): Flag to enable logging.
+        env (dict, optional): Environment variables for the command.
+
+    Returns:
+        str: The output of the command, without the trailing newline.
+    """
+    capture = bytearray()
+    run_command(command, log=False, env=env, fail_on_error=False, capture=capture)
+    if log:
+        common.log_info('Executed command: %s, env: %s - output bytes: %s' % (command, env, len(capture)))
+    output = capture.decode('utf-8', errors='replace')
+    if output.endswith('\n'):
+        output = output[:-1]
+    return output
+
+
+CommandResult = collections.namedtuple('CommandResult', ['command', 'returncode', 'elapsed', 'tail', 'timed_out'])
+CommandResult.__doc__ = """
+Result of a command run by `run_commands`.
+
+Attributes:
+    command (str): The command.
+    returncode (int): Exit status of the command. Negative if it was killed by a signal,
+        None if it did not exit (see `run_commands`).
+    elapsed (datetime.timedelta): Time taken by the command.
+    tail (list): The last lines of the command's output.
+    timed_out (bool): Whether the command was killed because of the timeout.
+"""
+
+
+class _RunningCommand(object):
+    """
+    State of a command started by `run_commands`.
+    """
+
+    def __init__(self, idx, command, env, timeout, tail_lines, log, log_info):
+        self.idx = idx
+        self.command = command
+        self.log = log
+        self.log_info = log_info
+        self.prefix = f'[{idx}]'
+        self.splitter = LineSplitter()
+        self.tail = collections.deque(maxlen=tail_lines)
+        self.eof = False
+        self.timed_out = False
+        self.killed = False
+        self.abandoned = False
+        self.kill_at = None
+        self.start = time.monotonic()
+        self.deadline = self.start + timeout if timeout else None
+        if log:
+            log_info(f'{self.prefix} Executing command: {command} - env: {env}')
+        # a new session puts the command and all its children in their own process group
+        self.p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                  stdin=subprocess.DEVNULL, shell=True, env=env, start_new_session=True)
+
+    def on_lines(self, lines):
+        text = b'\n'.join(lines).decode('utf-8', errors='replace')
+        self.tail.extend(text.split('\n'))
+        if self.log:
+            self.log_info(f'{self.prefix} {text.rstrip()}')
+
+    def feed(self, data):
+        if data:
+            lines = self.splitter.feed(data)
+        else:
+            self.eof = True
+            lines = self.splitter.flush()
+        if lines:
+            self.on_lines(lines)
+
+    def signal_group(self, sig):
+        try:
+            os.killpg(self.p.pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def check_timeout(self, now, kill_grace):
+        if self.deadline is None or now < self.deadline:
+            return
+        if not self.timed_out:
+            self.timed_out = True
+            self.kill_at = now + kill_grace
+            common.log_error(f'{self.prefix} Command timed out, terminating: {self.command}')
+            self.signal_group(signal.SIGTERM)
+        elif now < self.kill_at:
+            return
+        elif not self.killed:
+            self.killed = True
+            self.kill_at = now + kill_grace
+            self.signal_group(signal.SIGKILL)
+        else:
+            # children which left the process group can keep the pipe open, and a
+            # process stuck in the kernel does not exit on SIGKILL
+            self.abandoned = True
+            common.log_error(f'{self.prefix} Command still running after SIGKILL, abandoning it: {self.command}')
+
+    def kill(self):
+        """Kills the process group of the command, and reaps the command."""
+        self.signal_group(signal.SIGKILL)
+        self.p.stdout.close()
+        try:
+            self.p.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+
+    def close(self, selector):
+        """Stops reading the output of an abandoned command."""
+        if not self.eof:
+            selector.unregister(self.p.stdout)
+            self.p.stdout.close()
+            self.feed(b'')
+        self.p.poll()
+
+    def next_event_time(self):
+        if self.timed_out:
+            return self.kill_at
+        return self.deadline
+
+    def result(self):
+        elapsed = datetime.timedelta(seconds=time.monotonic() - self.start)
+        if self.log:
+            self.log_info(f'{self.prefix} command return output {self.p.returncode} - took {elapsed}')
+        return CommandResult(self.command, self.p.returncode, elapsed, list(self.tail), self.timed_out)
+
+
+def run_commands(commands: list, max_parallel: int = 4, timeout: Optional[float] = None,
+                 log: bool = True, log_info: Callable[[str], Any] = common.log_info,
+                 env: Optional[dict] = None, tail_lines: int = 20, kill_grace: float = 5,
+                 fail_on_error: bool = False, block_size: int = DEFAULT_BLOCK_SIZE) -> list:
+    """
+    Runs many commands in parallel, with at most `max_parallel` of them at a time.
+
+    All commands are run from the calling thread: their outputs are multiplexed with 
+    `selectors`, instead of blocking one thread per command. Output lines are logged 
+    with a `[<index of the command>]` prefix.
+
+    Every command runs in its own process group, so on timeout the whole group, 
+    including any children started by the command, is sent SIGTERM, followed by 
+    SIGKILL if it is still alive after `kill_grace` seconds. A command whose output
+    is still open `kill_grace` seconds after SIGKILL (e.g. held by a child which left
+    the process group) is abandoned: its output is closed and it is reported as
+    timed out, with a returncode of None if it did not exit.
+
+    Example usage:
+        results = run_commands([f"aws s3 sync s3://bucket/{day} /data/{day}" for day in days],
+                               max_parallel=8, timeout=3600)
+        failed = [result for result in results if result.returncode != 0]
+
+    Args:
+        commands (list): The commands to be executed.
+        max_parallel (int): Max number of commands running at the same time.
+        timeout (Optional[float]): Max seconds a single command may run for.
+        log (bool): Flag to enable logging of the commands and their output.
+        log_info (Callable[[str], Any]): Logging function to use.
+        env (Optional[dict]): Environment variables for the commands.
+        tail_lines (int): Number of the last output lines kept for each command.
+        kill_grace (float): Seconds between SIGTERM and SIGKILL for timed out commands.
+        fail_on_error (bool): If True, raises an error after all commands are done,
+            if any of them failed.
+        block_size (int): Max number of bytes read from a command at a time.
+
+    Returns:
+        list: A `CommandResult` for each command, in the order of the given commands.
+    """
+    pending = collections.deque(enumerate(commands))
+    results = [None] * len(commands)
+    running = []
+    with selectors.DefaultSelector() as selector:
+        try:
+            while pending or running:
+                while pending and len(running) < max_parallel:
+                    idx, command = pending.popleft()
+                    state = _RunningCommand(idx, command, env, timeout, tail_lines, log, log_info)
+                    running.append(state)
+                    selector.register(state.p.stdout, selectors.EVENT_READ, state)
+
+                now = time.monotonic()
+                # wake up for the next timeout, and poll for exits of commands already at EOF
+                wait = 1.0
+                for state in running:
+                    event_time = state.next_event_time()
+                    if event_time is not None:
+                        wait = min(wait, max(event_time - now, 0))
+                    if state.eof:
+                        wait = min(wait, 0.01)
+
+                for key, _ in selector.select(wait):
+                    state = key.data
+                    data = os.read(key.fd, block_size)
+                    state.feed(data)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+
+                now = time.monotonic()
+                still_running = []
+                for state in running:
+                    if state.eof and state.p.poll() is not None:
+                        results[state.idx] = state.result()
+                    else:
+                        state.check_timeout(now, kill_grace)
+                        if state.abandoned:
+                            state.close(selector)
+                            results[state.idx] = state.result()
+                        else:
+                            still_running.append(state)
+                running = still_running
+        finally:
+            # on errors (e.g. KeyboardInterrupt), the commands still running are killed
+            for state in running:
+                if results[state.idx] is None:
+                    state.kill()
+
+    failed = [result for result in results if result.returncode != 0]
+    if log:
+        log_info(f'Ran: {len(commands)} commands - Successfull: {len(commands) - len(failed)}, Failed: {len(failed)}')
+    if failed and fail_on_error:
+        raise ValueError('Commands failed: %s' % ', '.join(
+            f'{result.command} (exit status: {result.returncode})' for result in failed))
+    return results
+
+
+# format -> (pandas reader name, default reader kwargs)
+_DF_FORMATS = {
+    'csv': ('read_csv', {}),
+    'tsv': ('read_csv', {'sep': '\t'}),
+    'jsonl': ('read_json', {'lines': True}),
+}
+
+
+class _PipedCommand(object):
+    """
+    A command whose stdout is read by the caller, while its stderr is drained 
+    (and logged) by a background thread so that the command never blocks on it.
+    """
+
+    def __init__(self, command, env, log, log_info, tail_lines=20):
+        self.command = command
+        self.stderr_tail = collections.deque(maxlen=tail_lines)
+        self.p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                  stdin=subprocess.DEVNULL, shell=True, env=env)
+        batch_logger = _BatchLogger(log_info) if log else None
+
+        def on_lines(lines):
+            self.stderr_tail.extend(line.decode('utf-8', errors='replace') for line in lines)
+            if batch_logger:
+                batch_logger(lines)
+
+        self._stderr_thread = threading.Thread(target=_pump_output, args=(self.p.stderr, DEFAULT_BLOCK_SIZE),
+                                               kwargs={'on_lines': on_lines}, daemon=True)
+        self._stderr_thread.start()
+
+    def finish(self, fail_on_error):
+        self.p.stdout.close()
+        self.p.wait()
+        self._stderr_thread.join()
+        if self.p.returncode != 0 and fail_on_error:
+            raise self._exit_status_error()
+
+    def _exit_status_error(self):
+        return ValueError('Process exit status: %s - stderr: %s' % (self.p.returncode, '\n'.join(self.stderr_tail)))
+
+    def kill(self):
+        if self.p.poll() is None:
+            self.p.kill()
+        self.finish(fail_on_error=False)
+
+    def finish_after_error(self, error, fail_on_error):
+        """
+        Stops the command after the reader failed. If the command failed by itself
+        (e.g. printing nothing, which the reader reports as empty data), its exit
+        status is raised instead, from the error of the reader.
+        """
+        self.p.stdout.close()
+        try:
+            # a command still writing gets SIGPIPE
+            self.p.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+        failed = self.p.returncode not in (None, 0, -signal.SIGPIPE, 128 + signal.SIGPIPE)
+        self.kill()
+        if failed and fail_on_error:
+            raise self._exit_status_error() from error
+
+
+def _start_reader(command, env, log, log_info, reader, kwargs, fail_on_error):
+    if log:
+        log_info('Executing command: %s - env: %s' % (command, env))
+    piped = _PipedCommand(command, env, log, log_info)
+    try:
+        return piped, reader(piped.p.stdout, **kwargs)
+    except Exception as e:
+        piped.finish_after_error(e, fail_on_error)
+        raise
+    except BaseException:
+        piped.kill()
+        raise
+
+
+def _iter_df_chunks(command, env, log, log_info, reader, kwargs, fail_on_error):
+    # a generator, so the command only starts on the first next(), and is killed
+    # when the generator is closed (or garbage collected) before the end
+    piped, chunks = _start_reader(command, env, log, log_info, reader, kwargs, fail_on_error)
+    try:
+        with chunks:
+            yield from chunks
+    except Exception as e:
+        piped.finish_after_error(e, fail_on_error)
+        raise
+    except BaseException:
+        piped.kill()
+        raise
+    piped.finish(fail_on_error)
+
+
+def run_command_to_df(command: str, format: str = 'csv', chunksize: Optional[int] = None,
+                      env: Optional[dict] = None, log: bool = True,
+                      log_info: Callable[[str], Any] = common.log_info,
+                      fail_on_error: bool = True, **read_kwargs):
+    """
+    Executes a command and parses its output into a DataFrame.
+
+    The command's stdout is handed to the pandas reader as a file-like stream, so 
+    the output is parsed as it arrives without being collected in between. With 
+    `chunksize`, only one chunk is held in memory at a time. stderr is logged.
+
+    Example usage:
+        df = run_command_to_df("psql -c 'select * from sales' --csv")
+        or
+        for df_chunk in run_command_to_df("zcat export.jsonl.gz", format='jsonl', chunksize=ONE_MILLION):
+            ...
+
+    Args:
+        command (str): The command to be executed.
+        format (str): Format of the output - 'csv', 'tsv' or 'jsonl'.
+        chunksize (Optional[int]): If given, an iterator over DataFrames of this 
+            many rows is returned.
+        env (Optional[dict]): Environment variables for the command.
+        log (bool): Flag to enable logging.
+        log_info (Callable[[str], Any]): Logging function to use.
+        fail_on_error (bool): If True, raises an error if the command execution fails.
+        read_kwargs: Passed on to `pd.read_csv` / `pd.read_json`, e.g. `dtype` or 
+            `engine='pyarrow'` (non-chunked csv only).
 
     Returns:
-        str: The output of the command.
+        pd.DataFrame, or an iterator of pd.DataFrame if `chunksize` is given. The
+        iterator starts the command on its first `next()`, and kills it on `close()`.
     """
-    output_list = []
-    for line in run_command_iter_output(command, log=log):
-        line = line.strip('\n')
-        output_list.append(line)
-    return '\n'.join(output_list)
+    # pandas is only needed here, not by the rest of this module
+    import pandas as pd
+
+    if format not in _DF_FORMATS:
+        raise ValueError(f"format should be one of {list(_DF_FORMATS)} - got: {format}")
+    reader_name, kwargs = _DF_FORMATS[format]
+    kwargs = {**kwargs, **read_kwargs}
+    if chunksize:
+        kwargs['chunksize'] = chunksize
+
+    reader = getattr(pd, reader_name)
+    if chunksize:
+        return _iter_df_chunks(command, env, log, log_info, reader, kwargs, fail_on_error)
+    piped, df = _start_reader(command, env, log, log_info, reader, kwargs, fail_on_error)
+    piped.finish(fail_on_error)
+    return df
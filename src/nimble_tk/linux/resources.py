@@ -0,0 +1,238 @@
+"""
+Resource accounting for child processes, based on `os.wait4` rusage and
+samples of /proc/<pid>/io and /proc/<pid>/status taken while the process runs.
+"""
+
+import os
+import threading
+import datetime
+
+__all__ = ['ProcessTreeSampler', 'ResourceReport', 'wait_with_rusage']
+
+
+def _child_pids(pid):
+    """Returns the pids of the direct children of the given process."""
+    children = []
+    try:
+        for tid in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{tid}/children') as reader:
+                children.extend(int(child) for child in reader.read().split())
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        pass
+    return children
+
+
+def process_tree_pids(pid: int) -> list:
+    """
+    Returns the pid of the given process and of all its descendants.
+
+    Args:
+        pid (int): The root process.
+
+    Returns:
+        list: The pids of the process tree.
+    """
+    pids, pending = [], [pid]
+    while pending:
+        pid = pending.pop()
+        pids.append(pid)
+        pending.extend(_child_pids(pid))
+    return pids
+
+
+def _read_proc_io(pid):
+    """Returns the counters of /proc/<pid>/io, e.g. read_bytes and write_bytes."""
+    counters = {}
+    with open(f'/proc/{pid}/io') as reader:
+        for line in reader:
+            key, value = line.split(':')
+            counters[key] = int(value)
+    return counters
+
+
+def _read_proc_rss_bytes(pid):
+    """Returns the current resident set size of the process from /proc/<pid>/status."""
+    with open(f'/proc/{pid}/status') as reader:
+        for line in reader:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    # kernel threads and zombies do not report VmRSS
+    return 0
+
+
+class ProcessTreeSampler(object):
+    """
+    Periodically samples the memory and I/O of a process and all its descendants
+    in a background thread, using /proc/<pid>/status and /proc/<pid>/io.
+
+    Attributes:
+        peak_rss_bytes (int): Max total resident set size of the process tree seen in a sample.
+        read_bytes (int): Bytes read from storage by the processes of the tree, as
+            last seen for every process.
+        write_bytes (int): Bytes written to storage by the processes of the tree, as
+            last seen for every process.
+        read_chars (int): Bytes read by the processes, including from pipes and the page cache.
+        write_chars (int): Bytes written by the processes, including to pipes and the page cache.
+        num_samples (int): Number of samples taken.
+        max_processes (int): Max number of processes in the tree seen in a sample.
+    """
+
+    def __init__(self, pid: int, interval: float = 1.0):
+        """
+        Args:
+            pid (int): The root process of the tree to sample.
+            interval (float): Seconds between samples.
+        """
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss_bytes = 0
+        self.num_samples = 0
+        self.max_processes = 0
+        # pid -> last seen /proc/<pid>/io counters
+        self._io = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f'ProcessTreeSampler-{pid}')
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            self.sample()
+            if self._stop.wait(self.interval):
+                break
+
+    def sample(self):
+        """
+        Takes a sample of the process tree.
+        """
+        rss_bytes, pids = 0, process_tree_pids(self.pid)
+        for pid in pids:
+            try:
+                rss_bytes += _read_proc_rss_bytes(pid)
+                self._io[pid] = _read_proc_io(pid)
+            except (FileNotFoundError, ProcessLookupError, PermissionError):
+                # exited since listing the tree, or not readable
+                pass
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss_bytes)
+        self.max_processes = max(self.max_processes, len(pids))
+        self.num_samples += 1
+
+    def _io_total(self, key):
+        return sum(counters.get(key, 0) for counters in self._io.values())
+
+    @property
+    def read_bytes(self):
+        return self._io_total('read_bytes')
+
+    @property
+    def write_bytes(self):
+        return self._io_total('write_bytes')
+
+    @property
+    def read_chars(self):
+        return self._io_total('rchar')
+
+    @property
+    def write_chars(self):
+        return self._io_total('wchar')
+
+
+class ResourceReport(object):
+    """
+    Resources used by a command, as returned by `run_command(..., track_resources=True)`.
+
+    The rusage figures come from `os.wait4` and cover the command and all the children
+    it waited for. The sampled figures are taken from /proc while the command runs,
+    so short lived processes between two samples are missed.
+
+    Attributes:
+        elapsed (datetime.timedelta): Wall clock time.
+        user_time (float): CPU seconds spent in user mode.
+        system_time (float): CPU seconds spent in the kernel.
+        max_rss_bytes (int): Max resident set size of the largest single process. A forked
+            child starts out with the RSS of its parent, so for small commands this can 
+            reflect the size of the calling python process - see `sampled_peak_rss_bytes`.
+        block_input_ops (int): Number of block input operations (reads from storage).
+        block_output_ops (int): Number of block output operations (writes to storage).
+        voluntary_context_switches (int): Usually waits for I/O or locks.
+        involuntary_context_switches (int): Preemptions, usually because of CPU contention.
+        sampled_peak_rss_bytes (int): Max total RSS of the whole process tree in a sample.
+        sampled_read_bytes (int): Bytes read from storage, from /proc/<pid>/io.
+        sampled_write_bytes (int): Bytes written to storage, from /proc/<pid>/io.
+        sampled_read_chars (int): Bytes read including pipes and page cache hits.
+        sampled_write_chars (int): Bytes written including pipes and page cache.
+        num_samples (int): Number of /proc samples taken.
+    """
+
+    def __init__(self, elapsed, rusage, sampler=None):
+        self.elapsed = elapsed
+        self.user_time = rusage.ru_utime
+        self.system_time = rusage.ru_stime
+        # ru_maxrss is in kilobytes on linux
+        self.max_rss_bytes = rusage.ru_maxrss * 1024
+        self.block_input_ops = rusage.ru_inblock
+        self.block_output_ops = rusage.ru_oublock
+        self.voluntary_context_switches = rusage.ru_nvcsw
+        self.involuntary_context_switches = rusage.ru_nivcsw
+        self.sampled_peak_rss_bytes = sampler.peak_rss_bytes if sampler else None
+        self.sampled_read_bytes = sampler.read_bytes if sampler else None
+        self.sampled_write_bytes = sampler.write_bytes if sampler else None
+        self.sampled_read_chars = sampler.read_chars if sampler else None
+        self.sampled_write_chars = sampler.write_chars if sampler else None
+        self.num_samples = sampler.num_samples if sampler else 0
+
+    @property
+    def cpu_utilization(self) -> float:
+        """
+        CPU seconds per wall clock second. Close to (or above, for multi-threaded or
+        parallel commands) 1 for CPU bound commands, and close to 0 for commands
+        waiting on I/O, the network or locks.
+        """
+        elapsed_seconds = self.elapsed.total_seconds()
+        if not elapsed_seconds:
+            return 0.0
+        return (self.user_time + self.system_time) / elapsed_seconds
+
+    def to_dict(self) -> dict:
+        """
+        Returns:
+            dict: The report as a flat dict of metric name to value, e.g. for
+            sending to a metrics system.
+        """
+        metrics = {key: value for key, value in vars(self).items()}
+        metrics['elapsed'] = self.elapsed.total_seconds()
+        metrics['cpu_utilization'] = self.cpu_utilization
+        return metrics
+
+    def __str__(self):
+        return ' '.join(f'{key}={value:.3f}' if isinstance(value, float) else f'{key}={value}'
+                        for key, value in self.to_dict().items())
+
+    __repr__ = __str__
+
+
+def wait_with_rusage(p, sampler=None, start=None):
+    """
+    Waits for a `subprocess.Popen` process with `os.wait4`, collecting its resource usage.
+
+    Args:
+        p (subprocess.Popen): The process. Its returncode is set.
+        sampler (ProcessTreeSampler, optional): Sampler of the process, stopped once it exits.
+        start (datetime.datetime, optional): Start time of the process, defaults to now.
+
+    Returns:
+        ResourceReport: The resources used by the process.
+    """
+    _, status, rusage = os.wait4(p.pid, 0)
+    end = datetime.datetime.now()
+    # as Popen does, negative for a signal (os.waitstatus_to_exitcode needs python 3.9)
+    p.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    if sampler:
+        sampler.stop()
+    return ResourceReport((end - start) if start else datetime.timedelta(0), rusage, sampler)
@@ -1,8 +1,19 @@
 from pandas import DataFrame
-from IPython.display import display, HTML, Image
 import pandas as pd
+import numpy as np
 import re
 
+from nimble_tk import common
+
+
+def __getattr__(name):
+    # IPython is only imported when something is displayed, so that it is not
+    # needed on headless servers
+    if name in ('display', 'HTML', 'Image'):
+        import IPython.display
+        return getattr(IPython.display, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def html(html_str:str, tag:str="", style:str="", bold:bool=False, 
          italic:bool=False, font_size:str='') -> None:
@@ -24,6 +35,7 @@ def html(html_str:str, tag:str="", style:str="", bold:bool=False,
         style += f'font-size:{font_size}px;'
     if not tag and style:
         tag = 'span'
+    from IPython.display import display, HTML
     if tag:
         display(HTML("<" + tag + " style='" + style +
                 "'" + ">" + html_str + "</" + tag + ">"))
@@ -63,25 +75,170 @@ def html_kv(key, value):
     html(f'<b>{key}:</b> {value}')
 
 
-special_char_regex = re.compile('\W+')
+special_char_regex = re.compile(r'\W+')
 
+# format strings which `_format_numbers` can apply to whole columns at once
+_NUMBER_FORMAT_REGEX = re.compile(r'^\{:(,?)\.(\d+)([f%])\}$')
 
-def df_display(self, border=False, center_header=False, pct_cols=[], pct_precision=2,
-                cell_styles={}, index_styles={}, header_styles={}, 
-                int_cols = [], float_format='{:,.3f}', 
-                index=True, return_html=False):
+_ELLIPSIS = '…'
+
+
+def _format_numbers(values, precision, percent=False, thousands=True):
     """
-        Utility function to display a dataframe in between the cell execution 
-        and not just at the end. 
+    Formats numbers as `'{:,.<precision>f}'.format(value)` (or `%` when percent)
+    would, for a whole array at once: the numbers are rounded to integers with
+    the fraction digits, converted to digits by numpy, and the thousands
+    separators are inserted in a character matrix. Values which cannot be
+    rounded exactly this way (halfway cases, huge and non finite values) are
+    formatted by python. Missing values are formatted as ''.
+
+    Returns:
+        np.ndarray: The formatted strings.
+    """
+    numbers = np.asarray(values, dtype='float64')
+    if percent:
+        numbers = numbers * 100
+    n = len(numbers)
+    if not n:
+        return np.array([], dtype=object)
+    scaled = np.abs(numbers) * 10.0 ** precision
+    with np.errstate(invalid='ignore'):
+        exact = np.isfinite(scaled) & (scaled < 2.0 ** 53)
+        rounded = np.where(exact, np.rint(scaled), 0)
+        exact &= np.abs(np.abs(scaled - rounded) - 0.5) > 1e-6
+    digits = np.char.zfill(rounded.astype(np.int64).astype(str), precision + 1)
+    # right aligned digits, with room for a multiple of 3 integer digits
+    width = max(-(-(digits.dtype.itemsize // 4 - precision) // 3) * 3, 3)
+    chars = np.char.rjust(digits, width + precision).astype(f'<U{width + precision}')
+    chars = chars.view('<U1').reshape(n, width + precision)
+    integer = chars[:, :width]
+    if thousands:
+        groups = integer.reshape(n, width // 3, 3)
+        integer = np.concatenate([np.full((n, width // 3, 1), ','), groups], axis=2).reshape(n, -1)[:, 1:]
+    integer = np.char.lstrip(np.ascontiguousarray(integer).view(f'<U{integer.shape[1]}').ravel(), ' ,')
+    strings = np.char.add(np.where(np.signbit(numbers), '-', ''), integer)
+    if precision:
+        fraction = np.ascontiguousarray(chars[:, width:]).view(f'<U{precision}').ravel()
+        strings = np.char.add(np.char.add(strings, '.'), fraction)
+    if percent:
+        strings = np.char.add(strings, '%')
+    if not exact.all():
+        format_str = f'{{:{"," if thousands else ""}.{precision}{"%" if percent else "f"}}}'
+        strings = strings.astype(object)
+        for i in np.flatnonzero(~exact):
+            value = values[i]
+            strings[i] = '' if np.isnan(value) else format_str.format(value)
+    return strings
+
+
+def _format_column(values, format_str):
+    """
+    Formats a column of numbers with a format string, e.g. '{:,.3f}'. Missing
+    values are formatted as ''.
+    """
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    match = _NUMBER_FORMAT_REGEX.match(format_str)
+    if match:
+        thousands, precision, kind = match.groups()
+        return _format_numbers(values, int(precision), percent=kind == '%', thousands=bool(thousands))
+    return np.array(['' if np.isnan(value) else format_str.format(value) for value in values], dtype=object)
+
+
+def _format_frame(df, pct_cols, pct_precision, int_cols, float_format):
+    """Returns the formatted strings of every column of the frame, as a list of arrays."""
+    pct_format = {0: '{:,.0%}', 1: '{:,.1%}'}.get(pct_precision, '{:,.2%}')
+    columns = []
+    for i, col in enumerate(df.columns):
+        values = df.iloc[:, i]
+        if col in pct_cols:
+            columns.append(_format_column(values, pct_format))
+        elif col in int_cols:
+            columns.append(_format_column(values, '{:,.0f}'))
+        elif pd.api.types.is_float_dtype(values):
+            columns.append(_format_column(values, float_format))
+        else:
+            columns.append(values.to_numpy(dtype=object).astype(str))
+    return columns
+
+
+def _elide_rows(df, max_rows):
     """
+    Returns the rows to display: all of them, or the head and tail of the
+    frame when it has more than `max_rows` rows, and the position of the
+    elided rows (None if nothing is elided).
+    """
+    if max_rows is None or len(df) <= max_rows:
+        return df, None
+    head = (max_rows + 1) // 2
+    return pd.concat([df.iloc[:head], df.iloc[len(df) - max_rows // 2:]]), head
+
 
-    style = self.style
+def _th(labels, styles=None):
+    """Returns the `<th>` cells of the labels of an index level."""
+    strings = labels.to_numpy(dtype=object).astype(str)
+    if not styles:
+        return np.char.add(np.char.add('<th>', strings), '</th>')
+    return np.array([f'<th style="{styles[label][0]}:{styles[label][1]};">{string}</th>' if label in styles
+                     else f'<th>{string}</th>' for label, string in zip(labels, strings)], dtype=object)
 
+
+def _to_html(df, columns, elided_at, n_rows, border, center_header, index_styles, header_styles, index):
+    """
+    Builds the html table of a frame from its formatted columns, with a single
+    join of all its parts.
+    """
+    table_id = f'T_{common.generate_id().lower()}'
+    parts = []
+    table_styles = []
     if border:
-        border_val = '1px solid'
-        if border and border is not True:
-            border_val = border
+        border_val = border if border is not True else '1px solid'
+        table_styles += [f'#{table_id} th {{border: {border_val};}}', f'#{table_id} td {{border: {border_val};}}']
+    if center_header:
+        table_styles.append(f'#{table_id} th {{text-align: center;}}')
+    if table_styles:
+        parts.append('<style type="text/css">\n' + '\n'.join(table_styles) + '\n</style>\n')
+    parts.append(f'<table id="{table_id}" class="dataframe">\n<thead>\n')
+
+    # header: a row per level of the columns, the index names next to the last one
+    index_levels = df.index.nlevels if index else 0
+    index_names = [name if name is not None else '' for name in df.index.names] if index else []
+    for level in range(df.columns.nlevels):
+        if level == df.columns.nlevels - 1:
+            corner = ''.join(f'<th>{name}</th>' for name in index_names)
+        else:
+            corner = '<th></th>' * index_levels
+        parts.append('<tr>' + corner + ''.join(_th(df.columns.get_level_values(level), header_styles)) + '</tr>\n')
+    parts.append('</thead>\n<tbody>\n')
+
+    cells = [_th(df.index.get_level_values(level), index_styles) for level in range(index_levels)]
+    cells += [np.char.add(np.char.add('<td>', values.astype(str)), '</td>') for values in columns]
+    if elided_at is not None:
+        cells = [np.insert(values.astype(object), elided_at, f'<th>{_ELLIPSIS}</th>' if i < index_levels
+                           else f'<td>{_ELLIPSIS}</td>') for i, values in enumerate(cells)]
+    row_template = '<tr>' + '{}' * len(cells) + '</tr>\n'
+    parts.extend(row_template.format(*row) for row in zip(*cells))
+    parts.append('</tbody>\n</table>\n')
+    if elided_at is not None:
+        parts.append(f'<p>{n_rows} rows × {len(df.columns)} columns</p>\n')
+    return ''.join(parts)
+
+
+def _to_styler(df, columns, elided_at, border, center_header, cell_styles, index_styles, header_styles, index):
+    """
+    Returns a Styler of the formatted frame, for cell level styles.
+    """
+    formatted = DataFrame(dict(enumerate(columns)), index=df.index)
+    formatted.columns = df.columns
+    if elided_at is not None:
+        ellipsis_label = (_ELLIPSIS,) * df.index.nlevels if df.index.nlevels > 1 else _ELLIPSIS
+        ellipsis_row = DataFrame([[_ELLIPSIS] * len(df.columns)], columns=df.columns,
+                                 index=pd.Index([ellipsis_label], name=df.index.name) if df.index.nlevels == 1
+                                 else pd.MultiIndex.from_tuples([ellipsis_label], names=df.index.names))
+        formatted = pd.concat([formatted.iloc[:elided_at], ellipsis_row, formatted.iloc[elided_at:]])
+    style = formatted.style
 
+    if border:
+        border_val = border if border is not True else '1px solid'
         style.set_table_styles([
             {'selector': 'th', 'props': f'border: {border_val};'},
             {'selector': 'td', 'props': f'border: {border_val};'}
@@ -92,64 +249,53 @@ def df_display(self, border=False, center_header=False, pct_cols=[], pct_precisi
             {'selector': 'th', 'props': 'text-align:center'},
         ], overwrite=False, axis=0)
 
-    def int_formatter(num):
-        if pd.isnull(num):
-            return ''
-        return '{:,.0f}'.format(num)
-
-    def float_formatter(num):
-        if pd.isnull(num):
-            return ''
-        return float_format.format(num)
-    
-    def perc_formatter(num):
-        if pd.isnull(num):
-            return ''
-        if pct_precision == 0:
-            formatter = '{:,.0%}'
-        elif pct_precision == 1:
-            formatter = '{:,.1%}'
-        else:
-            formatter = '{:,.2%}'
-        return formatter.format(num)
-    
-    for col in self.columns:
+    # Styler.applymap_index was renamed to map_index in pandas 2.1
+    map_index = getattr(style, 'map_index', None) or style.applymap_index
+    for axis, label_styles in [(0, index_styles), (1, header_styles)]:
+        for label, (style_key, style_value) in label_styles.items():
+            map_index(lambda value, label=label, css=f'{style_key}:{style_value};': css if value == label else '',
+                      axis=axis)
+
+    for (row, col), (style_key, style_value) in cell_styles.items():
+        if not pd.api.types.is_list_like(row) and not isinstance(row, slice) and row not in formatted.index:
+            # the row is elided
+            continue
         idx = pd.IndexSlice
-        slice_ = idx[idx[:], idx[col]]
-        if col in int_cols:
-            style.format(int_formatter, subset=slice_)
-        elif pd.api.types.is_float_dtype(self[col]):
-            if col in pct_cols:
-                continue
-            else:
-                style.format(float_formatter, subset=slice_)
-
-    if pct_cols:
-        for col in pct_cols:
-            idx = pd.IndexSlice
-            slice_ = idx[idx[:], idx[col]]
-            style.format(perc_formatter, subset=slice_)
-
-    if index_styles:
-        for col, (style_key, style_value) in index_styles.items():
-            style.apply_index(col, f"{style_key}:{style_value};", axis=0)
-    if header_styles:
-        for col, (style_key, style_value) in header_styles.items():
-            style.apply_index(col, f"{style_key}:{style_value};", axis=1)
-
-    if cell_styles:
-        for (row, col), (style_key, style_value) in cell_styles.items():
-            idx = pd.IndexSlice
-            slice_ = idx[idx[row], idx[col]]
-            style.set_properties(**{style_key: style_value}, subset=slice_)
+        style.set_properties(**{style_key: style_value}, subset=idx[idx[row], idx[col]])
 
     if not index:
         try:
             style.hide(axis='index')
         except Exception:
             style.hide_index()
+    return style
+
+
+def df_display(self, border=False, center_header=False, pct_cols=[], pct_precision=2,
+                cell_styles={}, index_styles={}, header_styles={}, 
+                int_cols = [], float_format='{:,.3f}', 
+                index=True, return_html=False, max_rows=None):
+    """
+        Utility function to display a dataframe in between the cell execution 
+        and not just at the end. 
 
-    html_str = style.to_html()
+        Columns are formatted a whole column at a time, and frames with more
+        than `max_rows` rows (defaults to the 'display.max_rows' option) are
+        shown by their head and tail, so that displaying a large frame stays
+        fast. A pandas Styler, which is much slower, is only used for
+        `cell_styles`.
+    """
+    if max_rows is None:
+        max_rows = pd.get_option('display.max_rows')
+    shown, elided_at = _elide_rows(self, max_rows)
+    columns = _format_frame(shown, pct_cols, pct_precision, int_cols, float_format)
+
+    if cell_styles:
+        html_str = _to_styler(shown, columns, elided_at, border, center_header, cell_styles,
+                              index_styles, header_styles, index).to_html()
+    else:
+        html_str = _to_html(shown, columns, elided_at, len(self), border, center_header,
+                            index_styles, header_styles, index)
 
     if return_html:
         return html_str
@@ -160,6 +306,199 @@ def df_display(self, border=False, center_header=False, pct_cols=[], pct_precisi
 pd.DataFrame.show = df_display
 
 
+class DataFrameViewer:
+    """
+    Paged viewer of a DataFrame in a jupyter notebook. Only the rows of the
+    current page are rendered into the notebook, so the size of the output and
+    the time to render it do not depend on the number of rows. Sorting and
+    filtering run in the kernel, on the whole frame.
+
+    With ipywidgets installed, the viewer has buttons to move between pages, a
+    sort column selector and a filter box, and pages are fetched through the
+    widget's comm channel. Without it, the page is displayed as html and is
+    updated in place by the navigation methods.
+
+    Sample code
+    >>> viewer = df.browse(page_size=25, int_cols=['COUNT'])
+    >>> viewer  # or viewer.show()
+    >>> viewer.sort('COUNT', ascending=False).filter('COUNT > 100').next()
+    """
+
+    def __init__(self, df: DataFrame, page_size: int = 50, **show_kwargs):
+        """
+        Args:
+            df (DataFrame): The frame to view. It is not copied.
+            page_size (int): Number of rows per page.
+            show_kwargs: Formatting options of `df_display` (e.g. int_cols,
+                pct_cols, float_format, border).
+        """
+        self.df = df
+        self.page_size = page_size
+        self.show_kwargs = show_kwargs
+        self.page_number = 0
+        self.sort_by = None
+        self.ascending = True
+        self.query = None
+        # positions of the rows of the filtered and sorted view
+        self._positions = np.arange(len(df))
+        self._display_handle = None
+        self._widgets = None
+
+    @property
+    def num_rows(self) -> int:
+        """Number of rows of the filtered view."""
+        return len(self._positions)
+
+    @property
+    def num_pages(self) -> int:
+        return max(1, -(-self.num_rows // self.page_size))
+
+    def page(self, page_number: int) -> 'DataFrameViewer':
+        """
+        Moves to the given page (0 based, negative numbers count from the end).
+        """
+        if page_number < 0:
+            page_number += self.num_pages
+        self.page_number = min(max(page_number, 0), self.num_pages - 1)
+        self._refresh()
+        return self
+
+    def next(self) -> 'DataFrameViewer':
+        return self.page(self.page_number + 1)
+
+    def previous(self) -> 'DataFrameViewer':
+        return self.page(max(self.page_number - 1, 0))
+
+    def sort(self, by=None, ascending=True) -> 'DataFrameViewer':
+        """
+        Sorts the rows by the given column(s), keeping the filter, and moves to
+        the first page.
+
+        Args:
+            by (str or list, optional): Column(s) to sort by. None restores the
+                order of the frame.
+            ascending (bool or list, optional): Sort order.
+        """
+        self.sort_by, self.ascending = by, ascending
+        self._update_positions()
+        return self.page(0)
+
+    def filter(self, query=None) -> 'DataFrameViewer':
+        """
+        Keeps the rows matching the query, keeping the sort order, and moves to
+        the first page.
+
+        Args:
+            query (str or Callable, optional): A `DataFrame.query` expression, or
+                a function returning a boolean mask of the frame. None removes the
+                filter.
+        """
+        self.query = query
+        self._update_positions()
+        return self.page(0)
+
+    def _update_positions(self):
+        if self.query is None:
+            positions = np.arange(len(self.df))
+        else:
+            mask = self.df.eval(self.query) if isinstance(self.query, str) else self.query(self.df)
+            positions = np.flatnonzero(np.asarray(mask, dtype=bool))
+        if self.sort_by is not None:
+            by = [self.sort_by] if isinstance(self.sort_by, str) else list(self.sort_by)
+            # only the sort columns of the filtered rows are copied
+            keys = self.df[by].iloc[positions].reset_index(drop=True)
+            order = keys.sort_values(by, ascending=self.ascending, kind='stable', na_position='last').index
+            positions = positions[order.to_numpy()]
+        self._positions = positions
+
+    def page_df(self) -> DataFrame:
+        """
+        Returns:
+            DataFrame: The rows of the current page.
+        """
+        start = self.page_number * self.page_size
+        return self.df.iloc[self._positions[start:start + self.page_size]]
+
+    def to_html(self) -> str:
+        """
+        Returns:
+            str: The html of the current page, with a line about the position
+            of the page.
+        """
+        start = self.page_number * self.page_size
+        page_df = self.page_df()
+        html_str = df_display(page_df, return_html=True, max_rows=None, **self.show_kwargs)
+        status = f'rows {start + 1 if len(page_df) else 0}-{start + len(page_df)} of {self.num_rows}'
+        if self.num_rows != len(self.df):
+            status += f' (filtered from {len(self.df)})'
+        status += f', page {self.page_number + 1} of {self.num_pages}'
+        return html_str + f'<p>{status}</p>'
+
+    def _refresh(self):
+        if self._widgets is not None:
+            self._widgets['table'].value = self.to_html()
+        elif self._display_handle is not None:
+            from IPython.display import HTML
+            self._display_handle.update(HTML(self.to_html()))
+
+    def _build_widgets(self):
+        import ipywidgets as widgets
+
+        table = widgets.HTML(self.to_html())
+        buttons = {label: widgets.Button(description=label, layout=widgets.Layout(width='40px'))
+                   for label in ['⏮', '◀', '▶', '⏭']}
+        buttons['⏮'].on_click(lambda _: self.page(0))
+        buttons['◀'].on_click(lambda _: self.previous())
+        buttons['▶'].on_click(lambda _: self.next())
+        buttons['⏭'].on_click(lambda _: self.page(-1))
+        sort_by = widgets.Dropdown(options=[('', None)] + [(str(col), col) for col in self.df.columns],
+                                   description='Sort by')
+        descending = widgets.Checkbox(description='Descending', indent=False)
+        query = widgets.Text(placeholder='e.g. COUNT > 100', description='Filter', continuous_update=False)
+        error = widgets.HTML()
+
+        def on_sort(_):
+            self.sort(sort_by.value, ascending=not descending.value)
+
+        def on_filter(_):
+            try:
+                self.filter(query.value or None)
+                error.value = ''
+            except Exception as e:
+                error.value = f'<span style="color:red;">{e}</span>'
+
+        sort_by.observe(on_sort, names='value')
+        descending.observe(on_sort, names='value')
+        query.observe(on_filter, names='value')
+        self._widgets = {'table': table}
+        return widgets.VBox([widgets.HBox(list(buttons.values()) + [sort_by, descending]),
+                             widgets.HBox([query, error]), table])
+
+    def show(self) -> None:
+        """
+        Displays the viewer in the notebook.
+        """
+        from IPython.display import display, HTML
+        try:
+            display(self._build_widgets())
+        except ImportError:
+            self._display_handle = display(HTML(self.to_html()), display_id=True)
+
+    def _ipython_display_(self):
+        self.show()
+
+
+def df_browse(self, page_size=50, **show_kwargs) -> DataFrameViewer:
+    """
+    Returns a paged viewer of the dataframe, see `DataFrameViewer`. It is
+    displayed when it is the result of a cell, or with `show()`.
+    """
+    return DataFrameViewer(self, page_size=page_size, **show_kwargs)
+
+
+pd.DataFrame.browse = df_browse
+
+
 def display_image(image_path, width=None, height=None):
     """Utility function to display an image in a jupyter notebook
 
@@ -168,6 +507,7 @@ def display_image(image_path, width=None, height=None):
         width (int, optional): Width of the image in pixels. Defaults to None.
         height (int, optional): Height of the image in pixels. Defaults to None.
     """
+    from IPython.display import display, HTML, Image
 
     if image_path.startswith('http'):
         display(HTML(f'<img src="{image_path}" ' + (f'width="{width}" ' if width else '') + (f'height="{height}" ' if height else '') + '/>'))
@@ -1,6 +1,9 @@
 import concurrent
 from .. import common
 
+# only the first few errors are logged, otherwise they flood the console/log file
+MAX_ERRORS_LOGGED = 5
+
 
 def run_concurrently(function_specs: list, max_workers: int, fork: bool = True,
                      log: bool = False, logError: bool = False,
@@ -87,14 +90,15 @@ def run_concurrently_with_given_executor(function_specs, log, logError, executor
             result = future.result()
             results.append((fn_spec, result))
         else:
-            # only log first 5 exceptions otherwise it will flood the console/log file
             fn, args = fn_spec[0], fn_spec[1]
             fn_to_string = common.map_to_string(args)
             exceptions.append((fn_to_string, exception))
-            if log or logError and len(exceptions) < 5:
+            if (log or logError) and len(exceptions) <= MAX_ERRORS_LOGGED:
                 common.log_error(
                     f'Error for function: {fn} {fn_to_string} - {common.exception_to_trace_string(exception)}')
 
+    if (log or logError) and len(exceptions) > MAX_ERRORS_LOGGED:
+        common.log_error(f'suppressed {len(exceptions) - MAX_ERRORS_LOGGED} similar error messages')
     summary = f'Successfull: {len(results)}, Failed: {len(exceptions)}'
     common.log_info(f'Ran: {len(function_specs)} functions - {summary}')
     return results, exceptions
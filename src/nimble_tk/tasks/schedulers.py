@@ -1,25 +1,481 @@
 import datetime
+import functools
+import heapq
+import inspect
+import itertools
+import queue
+import random
 import threading
+import time
 from .. import common
 
-class FixedDelayTaskScheduler(object):
+
+class _WorkerPool(object):
+    """
+    A bounded pool of daemon worker threads, started on demand. Daemon threads
+    do not block the exit of the interpreter, like the `threading.Timer`s used
+    before the scheduler engine.
+    """
+
+    def __init__(self, max_workers, name):
+        self.max_workers = max_workers
+        self.name = name
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._num_workers = 0
+        self._num_idle = 0
+        # tasks waiting for a worker, when all workers are busy
+        self._num_queued = 0
+
+    def submit(self, function):
+        with self._lock:
+            if self._num_idle:
+                self._num_idle -= 1
+            elif self._num_workers < self.max_workers:
+                self._num_workers += 1
+                threading.Thread(target=self._work, daemon=True,
+                                 name=f'{self.name}-worker-{self._num_workers}').start()
+            else:
+                self._num_queued += 1
+        self._queue.put(function)
+
+    def _work(self):
+        while True:
+            function = self._queue.get()
+            if function is None:
+                return
+            try:
+                function()
+            except Exception:
+                common.log_traceback('Error in a scheduled task')
+            with self._lock:
+                if self._num_queued:
+                    self._num_queued -= 1
+                else:
+                    self._num_idle += 1
+
+    def shutdown(self):
+        with self._lock:
+            num_workers = self._num_workers
+        for _ in range(num_workers):
+            self._queue.put(None)
+
+
+class SchedulerEngine(object):
+    """
+    Runs the tasks of any number of schedulers with a single dispatcher thread and
+    a bounded pool of worker threads.
+
+    The dispatcher keeps the due times of all schedulers in a heap, sleeps until
+    the earliest one, and hands the due tasks to the workers. So the number of
+    threads does not depend on the number of schedulers or on their intervals.
+    When all workers are busy, due tasks wait for a free worker.
+
+    All schedulers share the default engine (see `get_default_scheduler_engine`),
+    unless they are given their own.
     """
-    A class for scheduling a task to be executed at regular delays. 
+
+    def __init__(self, max_workers: int = 16, name: str = 'ntk-scheduler'):
+        """
+        Args:
+            max_workers (int): Max number of tasks running at the same time. Defaults to 16.
+            name (str): Prefix of the names of the threads of the engine.
+        """
+        self.name = name
+        self.max_workers = max_workers
+        # entries: [due time (time.monotonic), sequence number, callback or None if cancelled]
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._pool = _WorkerPool(max_workers, name)
+        self._thread = None
+        self.is_shutdown = False
+
+    def call_later(self, delay: float, callback) -> list:
+        """
+        Calls `callback` on the dispatcher thread after `delay` seconds. Callbacks
+        must return quickly, and hand any real work to `submit`.
+
+        Returns:
+            list: An entry which can be given to `cancel`.
+        """
+        entry = [time.monotonic() + max(delay, 0), next(self._sequence), callback]
+        with self._condition:
+            if self.is_shutdown:
+                return entry
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, daemon=True, name=f'{self.name}-dispatcher')
+                self._thread.start()
+            elif self._heap[0] is entry:
+                # the dispatcher sleeps until a later due time
+                self._condition.notify()
+        return entry
+
+    def cancel(self, entry: list) -> None:
+        """
+        Cancels a callback scheduled with `call_later`, if it has not been called yet.
+        """
+        # cancelled entries are dropped by the dispatcher when they are due
+        entry[2] = None
+
+    def submit(self, function) -> None:
+        """
+        Runs a function on the worker pool.
+        """
+        self._pool.submit(function)
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self.is_shutdown:
+                        return
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    wait_seconds = self._heap[0][0] - time.monotonic()
+                    if wait_seconds <= 0:
+                        entry = heapq.heappop(self._heap)
+                        break
+                    self._condition.wait(wait_seconds)
+            callback = entry[2]
+            if callback is not None:
+                try:
+                    callback()
+                except Exception:
+                    common.log_traceback('Error in a scheduler callback')
+
+    def shutdown(self) -> None:
+        """
+        Stops the dispatcher and the workers, once they complete their current task.
+        """
+        with self._condition:
+            self.is_shutdown = True
+            self._heap = []
+            self._condition.notify()
+        self._pool.shutdown()
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_default_scheduler_engine() -> SchedulerEngine:
+    """
+    Returns:
+        SchedulerEngine: The engine shared by all schedulers not given their own.
+        A new one is created when it was shut down.
+    """
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None or _default_engine.is_shutdown:
+            _default_engine = SchedulerEngine()
+        return _default_engine
+
+
+OVERLAP_POLICIES = ('skip', 'queue', 'allow', 'cancel')
+MISFIRE_POLICIES = ('coalesce', 'catch_up')
+
+_current_run = threading.local()
+
+
+def is_run_cancelled() -> bool:
+    """
+    Returns whether the scheduled run executing in the current thread was
+    cancelled, e.g. by a scheduler with overlap='cancel' starting a newer run
+    or by a shutdown. Long running tasks should check it regularly and return
+    early, as python threads can not be stopped from the outside.
+
+    Returns:
+        bool: False outside of scheduled runs.
+    """
+    cancelled = getattr(_current_run, 'cancelled', None)
+    return cancelled is not None and cancelled.is_set()
+
+
+class SchedulerOptions(object):
+    """
+    Options of a scheduler, given to it as `scheduler_options`, so that the
+    keyword arguments of the scheduled function keep all their names (e.g. a
+    function taking a `name` argument).
+
+    Sample code
+    >>> options = ntk.SchedulerOptions(name='refresh', overlap='queue', start_jitter=10)
+    >>> scheduler = ntk.FixedRateTaskScheduler(60, refresh, scheduler_options=options, name='daily')
+    """
+
+    def __init__(self, engine=None, name=None, overlap='skip', max_concurrent=2, start_jitter=0, jitter=0,
+                 misfire='coalesce', max_catch_up=10):
+        """
+        :param engine: The SchedulerEngine running the task. Defaults to the shared engine.
+        :param name: Name of the task in the metrics. Defaults to the qualified name of the function.
+        :param overlap: What to do with a run due while previous runs are still running:
+            'skip' (default), 'queue', 'allow' or 'cancel' (see `_TaskScheduler`).
+        :param max_concurrent: Max number of concurrent runs of the task. Defaults to 2.
+        :param start_jitter: The first run is delayed by a random number of seconds up to this,
+            so that schedulers created together do not run in lockstep. Defaults to 0.
+        :param jitter: Every run is delayed by a random number of seconds up to this. Defaults to 0.
+        :param misfire: For fixed rate and cron schedulers, 'coalesce' (default) to run once for
+            all the missed runs, or 'catch_up' to run once per missed run, up to `max_catch_up` runs.
+        :param max_catch_up: Max number of missed runs caught up. Defaults to 10.
+
+        The async scheduler only uses `name` and `max_concurrent`.
+        """
+        if overlap not in OVERLAP_POLICIES:
+            raise ValueError(f'Invalid overlap policy: {overlap}, expected one of {OVERLAP_POLICIES}')
+        if misfire not in MISFIRE_POLICIES:
+            raise ValueError(f'Invalid misfire policy: {misfire}, expected one of {MISFIRE_POLICIES}')
+        self.engine = engine
+        self.name = name
+        self.overlap = overlap
+        self.max_concurrent = max_concurrent
+        self.start_jitter = start_jitter
+        self.jitter = jitter
+        self.misfire = misfire
+        self.max_catch_up = max_catch_up
+
+
+class _TaskScheduler(object):
+    """
+    Common part of the schedulers: running the function on the engine with
+    logging, the overlap policy for runs due while previous runs are still
+    running, jitter, missed runs and run metrics.
+
+    When a run is due while previous runs of the same scheduler are still running,
+    the overlap policy decides:
+    - 'skip': the run is skipped.
+    - 'queue': one run starts as soon as a running one completes (several due
+      runs are queued as one).
+    - 'allow': the run starts, if less than `max_concurrent` runs are running.
+    - 'cancel': the running runs are cancelled (see `is_run_cancelled`) and the
+      run starts, or is queued if `max_concurrent` runs are still running.
+    A run running for more than `max_interval` seconds is considered stuck: with
+    any policy, a new run starts then, as long as less than `max_concurrent` runs
+    are running.
+    """
+
+    def __init__(self, function, args, kwargs, log_prefix, log, max_interval, scheduler_options):
+        options = scheduler_options or SchedulerOptions()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.engine = options.engine or get_default_scheduler_engine()
+        self.name = options.name or getattr(function, '__qualname__', repr(function))
+        self.overlap = options.overlap
+        self.max_concurrent = options.max_concurrent
+        self.start_jitter = options.start_jitter
+        self.jitter = options.jitter
+        self.misfire = options.misfire
+        self.max_catch_up = options.max_catch_up
+
+        # internal state
+        self.is_running = False
+        self.running_since = datetime.datetime(1970, 1, 1)
+        self.is_shutdown = False
+        self.log_prefix = log_prefix
+        self.log = log
+        self.max_interval = max_interval
+        self._lock = threading.RLock()
+        self._entry = None
+        # cancellation events of the running runs, oldest first
+        self._running = []
+        self._run_id = 0
+        self._running_since_monotonic = 0
+        # runs to start as soon as possible: a queued run and/or missed runs to catch up
+        self._num_pending = 0
+
+        # metrics
+        self.run_stats = common.timer_registry.get(f'scheduler.{self.name}')
+        self.num_runs = 0
+        self.num_failed = 0
+        self.num_skipped = 0
+        self.num_cancelled = 0
+        self.num_missed = 0
+
+    def _jittered(self, delay, jitter):
+        return delay + random.uniform(0, jitter) if jitter else delay
+
+    def _schedule(self, delay, callback):
+        with self._lock:
+            if not self.is_shutdown:
+                self._entry = self.engine.call_later(delay, callback)
+
+    def _start_run(self):
+        with self._lock:
+            if self.is_shutdown:
+                return
+            cancelled = threading.Event()
+            self._running.append(cancelled)
+            self._run_id += 1
+            self.num_runs += 1
+            self.is_running = True
+            self.running_since = datetime.datetime.now()
+            self._running_since_monotonic = time.monotonic()
+            self._on_run_start(self._run_id)
+        self.engine.submit(functools.partial(self._run, cancelled, self._run_id))
+
+    def _run(self, cancelled, run_id):
+        """
+        Executes the scheduled function on a worker of the engine.
+        Manages the state and logs before and after the function execution.
+        """
+        common.set_thread_log_prefix(self.log_prefix)
+        _current_run.cancelled = cancelled
+        start_ns = time.perf_counter_ns()
+        stopwatch = common.StopWatch()
+        try:
+            if self.log:
+                common.log_info(f"Function Started")
+            self.function(*self.args, **self.kwargs)
+            if self.log:
+                common.log_info(
+                    f"Function Done - took time {stopwatch.get_time()}")
+        except Exception:
+            with self._lock:
+                self.num_failed += 1
+            common.log_traceback(
+                f"Error in calling the Function - took time {stopwatch.get_time()}")
+        finally:
+            self.run_stats.record(time.perf_counter_ns() - start_ns)
+            _current_run.cancelled = None
+            common.set_thread_log_prefix('')
+            with self._lock:
+                self._running.remove(cancelled)
+                self.is_running = bool(self._running)
+                if self._num_pending and not self.is_shutdown and len(self._running) < self.max_concurrent:
+                    self._num_pending -= 1
+                    self._start_run()
+                else:
+                    self._on_run_done(run_id)
+
+    def _on_run_start(self, run_id):
+        pass
+
+    def _on_run_done(self, run_id):
+        pass
+
+    def _on_due(self, stuck=False):
+        """
+        Starts a due run, applying the overlap policy if previous runs are still running.
+        """
+        with self._lock:
+            if self.is_shutdown:
+                return
+            if not self._running:
+                self._start_run()
+                return
+            running_seconds = time.monotonic() - self._running_since_monotonic
+            stuck = stuck or bool(self.max_interval and running_seconds >= self.max_interval)
+            can_start = len(self._running) < self.max_concurrent
+            if self.overlap == 'cancel':
+                for cancelled in self._running:
+                    if not cancelled.is_set():
+                        cancelled.set()
+                        self.num_cancelled += 1
+                common.log_error(f"Previous invocation of the function is still running for {running_seconds:.1f} seconds - cancelling it",
+                                 rate_limit_key=('still running', id(self)))
+                if can_start:
+                    self._start_run()
+                else:
+                    self._num_pending = max(self._num_pending, 1)
+            elif (self.overlap == 'allow' or stuck) and can_start:
+                if stuck:
+                    common.log_error(f"Previous invocation of the function is running for more than {self.max_interval} seconds - starting a new run")
+                self._start_run()
+            elif self.overlap == 'queue':
+                self._num_pending = max(self._num_pending, 1)
+            else:
+                self.num_skipped += 1
+                common.log_error(f"Previous invocation of the function is still running for {running_seconds:.1f} seconds - skipping this run",
+                                 rate_limit_key=('still running', id(self)))
+
+    def _on_missed(self, num_missed):
+        """
+        Handles runs missed because the scheduler fell behind, e.g. when the
+        process was suspended or all the workers of the engine were busy.
+        """
+        if num_missed <= 0:
+            return
+        with self._lock:
+            self.num_missed += num_missed
+            if self.misfire == 'catch_up':
+                self._num_pending = min(self._num_pending + num_missed, self.max_catch_up)
+        common.log_error(f"Missed {num_missed} runs - {'catching up' if self.misfire == 'catch_up' else 'running once'}",
+                         rate_limit_key=('missed runs', id(self)))
+
+    def get_metrics(self) -> dict:
+        """
+        Returns:
+            dict: The number of runs started, failed, skipped, cancelled and missed,
+            and the statistics of the run durations (in milliseconds).
+        """
+        with self._lock:
+            metrics = {'name': self.name, 'runs': self.num_runs, 'failed': self.num_failed,
+                       'skipped': self.num_skipped, 'cancelled': self.num_cancelled, 'missed': self.num_missed,
+                       'running': len(self._running), 'last_started': self.running_since if self.num_runs else None}
+        duration_stats = self.run_stats.to_dict()
+        metrics.update({f'duration_{key}': value for key, value in duration_stats.items() if key != 'name'})
+        return metrics
+
+    def update_interval(self, new_interval):
+        """
+        Updates the interval between task executions. It applies from the next
+        time the task is scheduled.
+
+        :param new_interval: The new interval in seconds.
+        """
+        common.log_info(f"Updating interval from {self.interval} to {new_interval}")
+        self.interval = new_interval
+
+    def shutdown(self, cancel_running=False):
+        """
+        Shuts down the scheduler, cancelling any pending executions. A running
+        execution completes.
+
+        :param cancel_running: Whether to also cancel the running executions (see `is_run_cancelled`).
+        """
+        common.log_info('shutdown called')
+        with self._lock:
+            self.is_shutdown = True
+            self._num_pending = 0
+            if self._entry is not None:
+                self.engine.cancel(self._entry)
+            if cancel_running:
+                for cancelled in self._running:
+                    cancelled.set()
+
+
+_SCHEDULER_OPTIONS_DOC = """
+        :param scheduler_options: A SchedulerOptions: engine, name, overlap policy, max_concurrent,
+            jitter and misfire policy. The only keyword argument not passed to the function.
+"""
+
+
+class FixedDelayTaskScheduler(_TaskScheduler):
+    """
+    A class for scheduling a task to be executed at regular delays.
     This will start the delay countdown only after the current task completes.
 
+    Runs only overlap when a run exceeds `max_interval`, and the overlap policy
+    then decides whether a new run starts (see `_TaskScheduler`). By default at
+    most 2 runs (the stuck one and a new one) run at the same time.
+
     Sample code
-    >>> 
+    >>>
     >>> def code_to_run_repeatedly():
     >>>     ntk.log_info('Running a repeated task')
-    >>> 
+    >>>
     >>> scheduler = ntk.FixedDelayTaskScheduler(interval=5, function=code_to_run_repeatedly, log_prefix='[Some][Log][Prefix]')
-    >>> 
+    >>>
     >>> import time
     >>> time.sleep(20)
     >>> scheduler.shutdown()
+    >>> scheduler.get_metrics()
     """
 
-    def __init__(self, interval, function, log_prefix='', log=True, init_interval=None, max_interval=None, *args, **kwargs):
+    def __init__(self, interval, function, log_prefix='', log=True, init_interval=None, max_interval=None, *args,
+                 scheduler_options=None, **kwargs):
         """
         Initializes the scheduler with specified parameters.
 
@@ -32,11 +488,147 @@ class FixedDelayTaskScheduler(object):
         :param args: Additional arguments to pass to the function.
         :param kwargs: Additional keyword arguments to pass to the function.
         """
-        self._timer = None
+        super().__init__(function, args, kwargs, log_prefix, log, max_interval, scheduler_options)
+        self.interval = interval
+        self._watchdog = None
+        self._schedule(self._jittered(init_interval or interval, self.start_jitter), self._start_next)
+
+    __init__.__doc__ += _SCHEDULER_OPTIONS_DOC
+
+    def _start_next(self):
+        with self._lock:
+            if len(self._running) < self.max_concurrent:
+                self._start_run()
+                return
+            # all the slots are taken by stuck runs, retry after another delay
+            self.num_skipped += 1
+            common.log_error(f"{len(self._running)} invocations of the function are still running - skipping this run",
+                             rate_limit_key=('still running', id(self)))
+            self._schedule(self._jittered(self.interval, self.jitter), self._start_next)
+
+    def _on_run_start(self, run_id):
+        if self.max_interval:
+            self._watchdog = self.engine.call_later(self.max_interval, functools.partial(self._check_overrun, run_id))
+
+    def _check_overrun(self, run_id):
+        with self._lock:
+            if run_id == self._run_id and self.is_running:
+                self._on_due(stuck=True)
+
+    def _on_run_done(self, run_id):
+        # the delay starts when the latest run completes, runs started before it
+        # (stuck past max_interval) keep running and count against max_concurrent
+        if run_id == self._run_id:
+            if self._watchdog is not None:
+                self.engine.cancel(self._watchdog)
+                self._watchdog = None
+            self._schedule(self._jittered(self.interval, self.jitter), self._start_next)
+
+    def shutdown(self, cancel_running=False):
+        super().shutdown(cancel_running)
+        with self._lock:
+            if self._watchdog is not None:
+                self.engine.cancel(self._watchdog)
+
+
+class FixedRateTaskScheduler(_TaskScheduler):
+    """
+    A class for scheduling a task to be executed at a fixed rate: runs start every
+    `interval` seconds, whatever the duration of the previous runs. Runs due while
+    the previous one is still running follow the overlap policy (see
+    `_TaskScheduler`). Runs missed because the process fell behind are coalesced
+    into a single run, or caught up with misfire='catch_up'.
+
+    Sample code
+    >>> scheduler = ntk.FixedRateTaskScheduler(interval=60, function=publish_metrics,
+    >>>                                        scheduler_options=ntk.SchedulerOptions(start_jitter=10))
+    >>> ...
+    >>> scheduler.shutdown()
+    """
+
+    def __init__(self, interval, function, log_prefix='', log=True, init_interval=None, max_interval=None, *args,
+                 scheduler_options=None, **kwargs):
+        """
+        Initializes the scheduler with specified parameters.
+
+        :param interval: The interval in seconds between the starts of task executions.
+        :param function: The function to be executed.
+        :param log_prefix: Optional prefix for log messages.
+        :param log: Flag to enable or disable logging.
+        :param init_interval: Optional initial delay before the first task execution.
+        :param max_interval: Maximum time allowed for an execution; beyond this, a new execution starts.
+        :param args: Additional arguments to pass to the function.
+        :param kwargs: Additional keyword arguments to pass to the function.
+        """
+        super().__init__(function, args, kwargs, log_prefix, log, max_interval, scheduler_options)
+        self.interval = interval
+        # due times without the per-tick jitter, which must not accumulate
+        self._next_due = time.monotonic() + self._jittered(init_interval or interval, self.start_jitter)
+        self._schedule(self._next_due - time.monotonic(), self._tick)
+
+    __init__.__doc__ += _SCHEDULER_OPTIONS_DOC
+
+    def _tick(self):
+        now = time.monotonic()
+        # due times are computed from the previous due time, so they do not drift
+        due = self._next_due + self.interval
+        num_missed = 0
+        if due <= now:
+            num_missed = int((now - due) // self.interval) + 1
+            due += num_missed * self.interval
+        self._next_due = due
+        self._on_due()
+        self._on_missed(num_missed)
+        self._schedule(self._jittered(due - now, self.jitter), self._tick)
+
+
+class AsyncFixedDelayTaskScheduler(object):
+    """
+    A class for scheduling a coroutine function to be executed at regular delays
+    on the current asyncio event loop, without any thread. As with
+    `FixedDelayTaskScheduler`, the delay countdown starts only after the current
+    run completes, and a run exceeding `max_interval` seconds gets a new run
+    started next to it (at most `max_concurrent` runs at the same time).
+
+    The log prefix is set with `ntk.set_context_log_prefix`, so it only applies to
+    the runs of this scheduler and not to the other tasks of the event loop.
+
+    Sample code
+    >>> async def poll_queue():
+    >>>     ntk.log_info('Polling the queue')
+    >>>     await consume_messages()
+    >>>
+    >>> async def main():
+    >>>     scheduler = ntk.AsyncFixedDelayTaskScheduler(interval=5, function=poll_queue, log_prefix='[poller]')
+    >>>     await asyncio.sleep(20)
+    >>>     await scheduler.shutdown()
+    """
+
+    def __init__(self, interval, function, log_prefix='', log=True, init_interval=None, max_interval=None, *args,
+                 scheduler_options=None, **kwargs):
+        """
+        Initializes the scheduler with specified parameters. Must be called from a
+        coroutine running on the event loop.
+
+        :param interval: The initial interval in seconds between task executions.
+        :param function: The coroutine function to be executed. A regular function
+            also works, but blocks the event loop while it runs.
+        :param log_prefix: Optional prefix for log messages.
+        :param log: Flag to enable or disable logging.
+        :param init_interval: Optional initial delay before the first task execution.
+        :param max_interval: Maximum time allowed for an execution; beyond this, a new execution starts.
+        :param args: Additional arguments to pass to the function.
+        :param scheduler_options: A SchedulerOptions, of which only `name` and `max_concurrent`
+            apply. The only keyword argument not passed to the function.
+        :param kwargs: Additional keyword arguments to pass to the function.
+        """
+        options = scheduler_options or SchedulerOptions()
         self.interval = interval
         self.function = function
         self.args = args
         self.kwargs = kwargs
+        self.name = options.name or getattr(function, '__qualname__', repr(function))
+        self.max_concurrent = options.max_concurrent
 
         # internal state
         self.is_running = False
@@ -45,82 +637,281 @@ class FixedDelayTaskScheduler(object):
         self.log_prefix = log_prefix
         self.log = log
         self.max_interval = max_interval
-        self.__set_timer(interval=init_interval)
+        self._in_flight = set()
+        # asyncio is imported here rather than at module level, it is slow to
+        # import and only needed by code already running in an event loop
+        import asyncio
+        self._shutdown_event = asyncio.Event()
+
+        # metrics
+        self.run_stats = common.timer_registry.get(f'scheduler.{self.name}')
+        self.num_runs = 0
+        self.num_failed = 0
+
+        self._main_task = asyncio.get_running_loop().create_task(self._main(init_interval or interval))
 
-    def _run(self):
+    async def _sleep(self, seconds):
+        """Sleeps for the given time, or until shutdown. Returns whether the scheduler was shut down."""
+        import asyncio
+        try:
+            await asyncio.wait_for(self._shutdown_event.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        return self.is_shutdown
+
+    async def _wait(self, runs, timeout=None):
+        """Waits until one of the runs completes, the timeout or shutdown. Returns whether a run completed."""
+        import asyncio
+        shutdown_waiter = asyncio.ensure_future(self._shutdown_event.wait())
+        try:
+            done, _ = await asyncio.wait(set(runs) | {shutdown_waiter}, timeout=timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            shutdown_waiter.cancel()
+        return bool(done - {shutdown_waiter})
+
+    async def _main(self, delay):
+        import asyncio
+        # inherited by the tasks of the runs
+        common.set_context_log_prefix(self.log_prefix)
+        if await self._sleep(delay):
+            return
+        while not self.is_shutdown:
+            if len(self._in_flight) >= self.max_concurrent:
+                await self._wait(self._in_flight)
+                continue
+            run = asyncio.create_task(self._run())
+            self._in_flight.add(run)
+            run.add_done_callback(self._on_run_done)
+            if not await self._wait({run}, self.max_interval):
+                if not self.is_shutdown:
+                    common.log_error(f"Previous invocation of the function is running for more than {self.max_interval} seconds - starting a new run")
+                continue
+            # the delay starts when this run completes, stuck runs stay in
+            # flight and count against max_concurrent
+            if await self._sleep(self.interval):
+                break
+
+    def _on_run_done(self, run):
+        self._in_flight.discard(run)
+        self.is_running = bool(self._in_flight)
+
+    async def _run(self):
         """
-        Internal method to execute the scheduled function.
-        Manages the state and logs before and after the function execution.
+        Executes the scheduled function, with logging.
         """
-        common.set_thread_log_prefix(self.log_prefix)
-
-        if self.should_start_next_run():
-            self.__set_timer()
-            try:
-                self.is_running = True
-                self.running_since = datetime.datetime.now()
-                stopwatch = common.StopWatch()
-                if self.log:
-                    common.log_info(f"Function Started")
-                self.function(*self.args, **self.kwargs)
-                if self.log:
-                    common.log_info(
-                        f"Function Done - took time {stopwatch.get_time()}")
-            except:
-                common.log_traceback(
-                    f"Error in calling the Function - took time {stopwatch.get_time()}")
-            finally:
-                self.is_running = False
-
-    def should_start_next_run(self):
-        """
-        Determines whether the next function execution should start.
-
-        :return: True if the next execution should start, False otherwise.
-        """
-        if not self.is_running:
-            return True
-        elif self.max_interval:
-            delta_seconds = (datetime.datetime.now() - self.running_since).total_seconds()
-            if delta_seconds > self.max_interval:
-                common.log_error(f"Previous invocation of the function is running for more than {self.max_interval} seconds - starting a new run")
-                return True
-            else:
-                common.log_error(f"Previous invocation of the function is still running. delta_seconds: {delta_seconds} . Waiting for {self.min_interval} seconds.")
-                self.set_timer(interval=self.min_interval)
-                return False
-        else:
-            common.log_error(f"Previous invocation of the function is still running. Max interval not set. Waiting for {self.min_interval} seconds.")
-            self.set_timer(interval=self.min_interval)
-            return False
+        self.is_running = True
+        self.running_since = datetime.datetime.now()
+        self.num_runs += 1
+        start_ns = time.perf_counter_ns()
+        stopwatch = common.StopWatch()
+        try:
+            if self.log:
+                common.log_info(f"Function Started")
+            result = self.function(*self.args, **self.kwargs)
+            if inspect.isawaitable(result):
+                await result
+            if self.log:
+                common.log_info(
+                    f"Function Done - took time {stopwatch.get_time()}")
+        except Exception:
+            self.num_failed += 1
+            common.log_traceback(
+                f"Error in calling the Function - took time {stopwatch.get_time()}")
+        finally:
+            self.run_stats.record(time.perf_counter_ns() - start_ns)
 
     def update_interval(self, new_interval):
         """
-        Updates the interval between task executions.
+        Updates the interval between task executions. It applies from the next
+        time the task is scheduled.
 
         :param new_interval: The new interval in seconds.
         """
         common.log_info(f"Updating interval from {self.interval} to {new_interval}")
         self.interval = new_interval
 
-    def __set_timer(self, interval=None):
+    def get_metrics(self) -> dict:
         """
-        Sets the timer for the next execution of the task.
-
-        :param interval: The interval after which the task should be executed. Defaults to the current interval.
+        Returns:
+            dict: The number of runs started and failed, and the statistics of the
+            run durations (in milliseconds).
         """
-        if not interval:
-            interval = self.interval
-
-        if not self.is_shutdown:
-            self._timer = threading.Timer(interval, self._run)
-            self._timer.daemon=True
-            self._timer.start()
+        metrics = {'name': self.name, 'runs': self.num_runs, 'failed': self.num_failed,
+                   'running': len(self._in_flight), 'last_started': self.running_since if self.num_runs else None}
+        duration_stats = self.run_stats.to_dict()
+        metrics.update({f'duration_{key}': value for key, value in duration_stats.items() if key != 'name'})
+        return metrics
 
-    def shutdown(self):
+    async def shutdown(self, timeout=None):
         """
-        Shuts down the scheduler, cancelling any pending executions.
+        Shuts down the scheduler, cancelling any pending executions, and waits for
+        the running executions to complete.
+
+        :param timeout: Max seconds to wait for the running executions, after which
+            they are cancelled. Defaults to waiting as long as they run.
         """
+        import asyncio
         common.log_info('shutdown called')
         self.is_shutdown = True
-        self._timer.cancel()
+        self._shutdown_event.set()
+        await self._main_task
+        if self._in_flight:
+            _, pending = await asyncio.wait(set(self._in_flight), timeout=timeout)
+            for run in pending:
+                run.cancel()
+            if pending:
+                common.log_error(f"Cancelled {len(pending)} runs still running after {timeout} seconds")
+                await asyncio.wait(pending)
+
+
+_CRON_ALIASES = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+# name, min value, max value of the fields of a cron expression
+_CRON_FIELDS = [('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7)]
+
+
+def _parse_cron_field(field, name, low, high):
+    values = set()
+    for part in field.split(','):
+        range_part, has_step, step = part.partition('/')
+        try:
+            step = int(step) if has_step else 1
+            if range_part == '*':
+                start, end = low, high
+            elif '-' in range_part:
+                start, end = map(int, range_part.split('-'))
+            else:
+                start = int(range_part)
+                end = high if has_step else start
+        except ValueError:
+            raise ValueError(f'Invalid cron {name} field: {field}')
+        if not (low <= start <= end <= high) or step < 1:
+            raise ValueError(f'Invalid cron {name} field: {field}, values must be between {low} and {high}')
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression(object):
+    """
+    A minimal cron expression: 5 fields (minute, hour, day of month, month, day
+    of week) made of `*`, numbers, ranges `a-b`, steps `*/n` or `a-b/n`, and
+    lists `a,b`, or one of the aliases @hourly, @daily, @weekly, @monthly and
+    @yearly. Day of week 0 and 7 are sundays. As in cron, when both the day of
+    month and the day of week are restricted, a day matching either matches.
+
+    Sample code
+    >>> ntk.CronExpression('*/15 9-17 * * 1-5').next_after(datetime.datetime.now())
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = _CRON_ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f'Invalid cron expression: {expression}, expected 5 fields')
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            _parse_cron_field(field, name, low, high) for field, (name, low, high) in zip(fields, _CRON_FIELDS)]
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    def _day_matches(self, t):
+        day_matches = t.day in self.days
+        # python: monday is 0, cron: sunday is 0
+        weekday_matches = (t.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_matches and weekday_matches
+        return day_matches or weekday_matches
+
+    def next_after(self, after: datetime.datetime) -> datetime.datetime:
+        """
+        Returns:
+            datetime.datetime: The first time matching the expression strictly
+            after the given time.
+        """
+        t = after.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        # every expression which can match, matches within a few years (e.g. 29th of february)
+        last_year = t.year + 8
+        while t.year <= last_year:
+            if t.month not in self.months:
+                year, month = (t.year + 1, 1) if t.month == 12 else (t.year, t.month + 1)
+                t = t.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = (t + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+            elif t.hour not in self.hours:
+                t = (t + datetime.timedelta(hours=1)).replace(minute=0)
+            elif t.minute not in self.minutes:
+                t += datetime.timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f'Cron expression never matches: {self.expression}')
+
+    def __repr__(self):
+        return f'CronExpression({self.expression!r})'
+
+
+class CronTaskScheduler(_TaskScheduler):
+    """
+    A class for scheduling a task at the times matching a cron expression, in
+    local time (see `CronExpression`). Runs due while the previous one is still
+    running follow the overlap policy (see `_TaskScheduler`). Runs missed because
+    the process fell behind are coalesced into a single run, or caught up with
+    misfire='catch_up'.
+
+    Sample code
+    >>> # every 15 minutes during office hours, on weekdays
+    >>> scheduler = ntk.CronTaskScheduler('*/15 9-17 * * 1-5', function=refresh_dashboard,
+    >>>                                   scheduler_options=ntk.SchedulerOptions(jitter=30))
+    >>> ...
+    >>> scheduler.shutdown()
+    """
+
+    def __init__(self, cron_expression, function, log_prefix='', log=True, max_interval=None, *args,
+                 scheduler_options=None, **kwargs):
+        """
+        Initializes the scheduler with specified parameters.
+
+        :param cron_expression: The cron expression, as a string or a CronExpression.
+        :param function: The function to be executed.
+        :param log_prefix: Optional prefix for log messages.
+        :param log: Flag to enable or disable logging.
+        :param max_interval: Maximum time allowed for an execution; beyond this, a new execution starts.
+        :param args: Additional arguments to pass to the function.
+        :param kwargs: Additional keyword arguments to pass to the function.
+        """
+        super().__init__(function, args, kwargs, log_prefix, log, max_interval, scheduler_options)
+        self.cron = cron_expression if isinstance(cron_expression, CronExpression) else CronExpression(cron_expression)
+        self.next_run_time = None
+        self._schedule_next(self.start_jitter or self.jitter)
+
+    __init__.__doc__ += _SCHEDULER_OPTIONS_DOC
+
+    def update_interval(self, new_interval):
+        raise TypeError('A CronTaskScheduler has no interval, create a new one with another cron expression')
+
+    def _schedule_next(self, jitter):
+        now = datetime.datetime.now()
+        self.next_run_time = self.cron.next_after(now)
+        self._schedule(self._jittered((self.next_run_time - now).total_seconds(), jitter), self._tick)
+
+    def _tick(self):
+        now = datetime.datetime.now()
+        if now < self.next_run_time:
+            # the wall clock was set back since the run was scheduled
+            self._schedule((self.next_run_time - now).total_seconds(), self._tick)
+            return
+        num_missed, run_time = 0, self.cron.next_after(self.next_run_time)
+        # the jitter is not a delay
+        while run_time <= now - datetime.timedelta(seconds=self.jitter) and num_missed <= self.max_catch_up:
+            num_missed += 1
+            run_time = self.cron.next_after(run_time)
+        self._on_due()
+        self._on_missed(num_missed)
+        self._schedule_next(self.jitter)
@@ -0,0 +1,75 @@
+import importlib.util
+import unittest
+import numpy as np
+import pandas as pd
+import nimble_tk as ntk
+from nimble_tk.notebook import display
+
+
+class TestDisplay(unittest.TestCase):
+
+    def test_format_numbers_matches_str_format(self):
+        values = np.concatenate([np.random.default_rng(0).standard_normal(1000) * 10.0 ** np.arange(-3, 12).repeat(67)[:1000],
+                                 [0, -0.0, 0.0005, 1.0005, 2.5, 0.125, 999.9996, -999999.9999, 1e20, np.inf, np.nan]])
+        for format_str in ['{:,.0f}', '{:,.3f}', '{:.2f}', '{:,.1%}', '{:.0%}']:
+            expected = ['' if np.isnan(value) else format_str.format(value) for value in values]
+            self.assertEqual(list(display._format_column(values, format_str)), expected, format_str)
+
+    def test_show_formats_columns(self):
+        df = pd.DataFrame({'f': [1234.5, np.nan], 'i': [1234567, 8], 'p': [0.1234, 0.5], 's': ['a', 'b']})
+        html_str = df.show(return_html=True, int_cols=['i'], pct_cols=['p'], index=False)
+        self.assertIn('<tr><td>1,234.500</td><td>1,234,567</td><td>12.34%</td><td>a</td></tr>', html_str)
+        self.assertIn('<tr><td></td><td>8</td><td>50.00%</td><td>b</td></tr>', html_str)
+        self.assertNotIn('<th>0</th>', html_str)
+
+    def test_show_elides_rows(self):
+        df = pd.DataFrame({'x': np.arange(100000)})
+        html_str = df.show(return_html=True, max_rows=10)
+        self.assertEqual(html_str.count('<tr>'), 1 + 10 + 1)
+        self.assertIn('<th>4</th>', html_str)
+        self.assertNotIn('<th>5</th>', html_str)
+        self.assertIn('<th>99995</th>', html_str)
+        self.assertIn('<th>…</th>', html_str)
+        self.assertIn('100000 rows × 1 columns', html_str)
+
+    def test_show_label_styles(self):
+        df = pd.DataFrame({'x': [1, 2]}, index=['a', 'b'])
+        html_str = df.show(return_html=True, index_styles={'b': ('color', 'red')},
+                           header_styles={'x': ('color', 'blue')}, border=True)
+        self.assertIn('<th style="color:red;">b</th>', html_str)
+        self.assertIn('<th style="color:blue;">x</th>', html_str)
+        self.assertIn('th {border: 1px solid;}', html_str)
+
+    @unittest.skipUnless(importlib.util.find_spec('jinja2'), 'the pandas Styler needs jinja2')
+    def test_show_cell_styles(self):
+        df = pd.DataFrame({'x': np.arange(100)})
+        html_str = df.show(return_html=True, max_rows=10, cell_styles={(0, 'x'): ('color', 'red'),
+                                                                      (50, 'x'): ('color', 'blue')})
+        self.assertIn('color: red;', html_str)
+        self.assertNotIn('color: blue;', html_str)
+        self.assertIn('…', html_str)
+
+    def test_browse_pages(self):
+        df = pd.DataFrame({'x': np.arange(1000), 'y': np.arange(1000) % 7})
+        viewer = df.browse(page_size=100)
+        self.assertEqual(viewer.num_pages, 10)
+        self.assertEqual(list(viewer.next().page_df()['x']), list(range(100, 200)))
+        self.assertEqual(viewer.page(-1).page_df()['x'].iloc[-1], 999)
+        self.assertEqual(viewer.page(20).page_number, 9)
+        html_str = viewer.page(0).to_html()
+        self.assertEqual(html_str.count('<tr>'), 1 + 100)
+        self.assertIn('rows 1-100 of 1000, page 1 of 10', html_str)
+
+    def test_browse_sort_filter(self):
+        df = pd.DataFrame({'x': np.arange(1000), 'y': np.arange(1000) % 7})
+        viewer = df.browse(page_size=10).filter('y == 3').sort('x', ascending=False)
+        self.assertEqual(viewer.num_rows, 143)
+        self.assertEqual(list(viewer.page_df()['x']), list(range(997, 927, -7)))
+        self.assertIn('(filtered from 1000)', viewer.to_html())
+        viewer.sort(['y', 'x']).filter(lambda frame: frame['x'] < 20)
+        self.assertEqual(list(viewer.page_df().index), [0, 7, 14, 1, 8, 15, 2, 9, 16, 3])
+        self.assertEqual(viewer.filter().sort().num_rows, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import gzip
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+import numpy as np
+import nimble_tk as ntk
+from nimble_tk.common import files
+
+
+class TestFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_read_file(self):
+        with open(self.path('a.txt'), 'w') as writer:
+            writer.write('line 1\nline 2\n')
+        self.assertEqual(ntk.read_file(self.path('a.txt')), 'line 1\nline 2\n')
+
+    def test_iter_lines_gzip(self):
+        with gzip.open(self.path('a.txt.gz'), 'wt') as writer:
+            writer.write('line 1\nline 2\nline 3')
+        self.assertEqual(list(ntk.iter_lines(self.path('a.txt.gz'))), ['line 1', 'line 2', 'line 3'])
+        self.assertEqual(b''.join(ntk.iter_chunks(self.path('a.txt.gz'), chunk_size=4)),
+                         b'line 1\nline 2\nline 3')
+
+    def test_read_bytes_view(self):
+        with open(self.path('a.bin'), 'wb') as writer:
+            writer.write(b'0123456789')
+        view = ntk.read_bytes_view(self.path('a.bin'))
+        self.assertEqual(bytes(view[2:5]), b'234')
+        self.assertTrue(view.readonly)
+
+    def test_write_to_file_atomic(self):
+        ntk.write_to_file(self.path('a.txt'), '  old content ')
+        ntk.write_to_file(self.path('a.txt'), {'a': 1})
+        self.assertEqual(ntk.read_file(self.path('a.txt')), "{'a': 1}")
+        # no temporary files are left behind
+        self.assertEqual(os.listdir(self.tmp_dir.name), ['a.txt'])
+        os.chmod(self.path('a.txt'), 0o600)
+        os.symlink(self.path('a.txt'), self.path('link.txt'))
+        ntk.write_to_file(self.path('link.txt'), 'through the link')
+        self.assertTrue(os.path.islink(self.path('link.txt')))
+        self.assertEqual(ntk.read_file(self.path('a.txt')), 'through the link')
+        self.assertEqual(os.stat(self.path('a.txt')).st_mode & 0o777, 0o600)
+
+    def test_file_appender(self):
+        with ntk.FileAppender(self.path('a.csv'), flush_size=10) as appender:
+            appender.append_line('A,B')
+            self.assertEqual(ntk.read_file(self.path('a.csv')), '')
+            for i in range(3):
+                appender.append_line(f'{i},{i * 2}')
+            self.assertEqual(ntk.read_file(self.path('a.csv')), 'A,B\n0,0\n1,2\n')
+        self.assertEqual(ntk.read_file(self.path('a.csv')), 'A,B\n0,0\n1,2\n2,4\n')
+
+    def test_pickle_out_of_band(self):
+        obj = ntk.TempClass()
+        obj.array = np.arange(1000, dtype='float64')
+        obj.temp = 'not pickled'
+        ntk.pickle_dump(obj, self.path('obj.pkl'), remove=['temp'], out_of_band=True)
+        # the given object is not modified
+        self.assertEqual(obj.temp, 'not pickled')
+        self.assertTrue(os.path.exists(self.path('obj.pkl') + ntk.PICKLE_BUFFERS_SUFFIX))
+
+        loaded = ntk.pickle_load(self.path('obj.pkl'), put={'temp': 'put'})
+        self.assertTrue(np.array_equal(loaded.array, obj.array))
+        self.assertEqual(loaded.temp, 'put')
+
+        # dumping without out-of-band buffers removes the stale sidecar file
+        ntk.pickle_dump(obj, self.path('obj.pkl'))
+        self.assertFalse(os.path.exists(self.path('obj.pkl') + ntk.PICKLE_BUFFERS_SUFFIX))
+        self.assertEqual(ntk.pickle_load(self.path('obj.pkl')).temp, 'not pickled')
+
+    def test_pickle_compressed(self):
+        ntk.pickle_dump({'a': [1, 2]}, self.path('obj.pkl.gz'))
+        with open(self.path('obj.pkl.gz'), 'rb') as reader:
+            self.assertEqual(reader.read(2), b'\x1f\x8b')
+        self.assertEqual(ntk.pickle_load(self.path('obj.pkl.gz')), {'a': [1, 2]})
+
+    def test_files_recent_enough(self):
+        ntk.write_to_file(self.path('new.txt'), 'new')
+        ntk.write_to_file(self.path('old.txt'), 'old')
+        old_ts = time.time() - 10 * 24 * 60 * 60
+        os.utime(self.path('old.txt'), (old_ts, old_ts))
+        paths = [self.path(name) for name in ['new.txt', 'old.txt', 'missing.txt']]
+        expected = dict(zip(paths, [True, False, False]))
+
+        self.assertEqual(ntk.files_recent_enough(paths, max_age_days=5), expected)
+        with tempfile.TemporaryDirectory() as index_dir, \
+                mock.patch.object(files, '_stat_mtime', wraps=files._stat_mtime) as stat_mtime:
+            # outside of the watched directory, saving it does not invalidate it
+            index_path = os.path.join(index_dir, 'index.json')
+            self.assertEqual(ntk.files_recent_enough(paths, max_age_days=5, index_path=index_path), expected)
+            self.assertEqual(stat_mtime.call_count, 3)
+            # served from the index
+            self.assertEqual(ntk.files_recent_enough(paths, max_age_days=5, index_path=index_path), expected)
+            self.assertEqual(stat_mtime.call_count, 3)
+
+            # replacing a file changes the directory, which invalidates the index
+            ntk.write_to_file(self.path('old.txt'), 'replaced')
+            expected[self.path('old.txt')] = True
+            self.assertEqual(ntk.files_recent_enough(paths, max_age_days=5, index_path=index_path), expected)
+            self.assertEqual(stat_mtime.call_count, 6)
+
+            # files in the directory of the index are always stat'ed
+            index_path = self.path('index.json')
+            for _ in range(2):
+                self.assertEqual(ntk.files_recent_enough(paths, max_age_days=5, index_path=index_path), expected)
+            self.assertEqual(stat_mtime.call_count, 12)
+
+    def test_purge_older_than(self):
+        os.makedirs(self.path('a/b'))
+        for name in ['new.txt', 'old.txt', 'a/old.txt', 'a/b/old.txt']:
+            ntk.write_to_file(self.path(name), name)
+        old_ts = time.time() - 10 * 24 * 60 * 60
+        for name in ['old.txt', 'a/old.txt', 'a/b/old.txt']:
+            os.utime(self.path(name), (old_ts, old_ts))
+
+        removed = ntk.purge_older_than(self.tmp_dir.name, days=5, log=False)
+        self.assertEqual(sorted(removed), sorted(self.path(name) for name in ['old.txt', 'a/old.txt', 'a/b/old.txt']))
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ['a', 'new.txt'])
+        self.assertEqual(os.listdir(self.path('a')), ['b'])
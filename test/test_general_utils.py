@@ -0,0 +1,70 @@
+import time
+import uuid
+import decimal
+import pathlib
+import datetime
+import unittest
+import numpy as np
+import pandas as pd
+import nimble_tk as ntk
+
+
+class TestGeneralUtils(unittest.TestCase):
+
+    def test_map_to_string_truncates(self):
+        summary = ntk.map_to_string({'items': list(range(10 ** 6)), 'text': 'x' * 1000,
+                                     'array': np.arange(10 ** 6).reshape(1000, 1000),
+                                     'df': pd.DataFrame({'a': range(100), 'b': ['y' * 1000] * 100})})
+        self.assertIn('items = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, ...]\n', summary)
+        self.assertIn(f'text = {"x" * 200}...\n', summary)
+        self.assertIn('array = ndarray shape=(1000, 1000) dtype=int64 [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, ...]', summary)
+        self.assertIn('df = DataFrame shape=(100, 2)', summary)
+        self.assertLess(len(summary), 2000)
+
+    def test_map_to_string_budget(self):
+        summary = ntk.map_to_string([list(range(1000))] * 1000, max_chars=500)
+        self.assertTrue(summary.startswith('0 = [0, 1, 2'))
+        self.assertLess(len(summary), 600)
+        self.assertTrue(summary.endswith('more)\n'))
+
+    def test_map_to_string_bounded(self):
+        class Unprintable:
+            def __repr__(self):
+                raise AssertionError('the full repr must not be computed')
+
+        start = time.monotonic()
+        summary = ntk.map_to_string({'data': b'x' * (100 * 1024 * 1024), 'obj': Unprintable(),
+                                     'index': pd.Index(range(10 ** 6)), 'number': 1.5})
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertIn("data = b'xxx", summary)
+        self.assertIn('obj = <Unprintable>\n', summary)
+        self.assertIn('index = RangeIndex length=1000000', summary)
+        self.assertIn('number = 1.5\n', summary)
+
+        df_wide = pd.DataFrame({f'c{i}': ['y' * 5000] * 5 for i in range(15)})
+        summary = ntk.map_to_string({'df': df_wide, 'other': 1}, max_chars=2000)
+        self.assertLessEqual(len(summary.rpartition('...')[0]), 2000)
+        self.assertTrue(summary.endswith('... (1 more)\n'))
+
+        # small values are logged whole
+        path = pathlib.PurePosixPath('/data/input.csv')
+        key = uuid.UUID(int=1)
+        summary = ntk.map_to_string([path, key, decimal.Decimal('1.10'), datetime.datetime(2024, 5, 1)])
+        self.assertIn(f'0 = {path!r}\n', summary)
+        self.assertIn(f'1 = {key!r}\n', summary)
+        self.assertIn("2 = Decimal('1.10')\n", summary)
+        self.assertIn('3 = datetime.datetime(2024, 5, 1, 0, 0)\n', summary)
+
+    def test_exception_to_trace_string(self):
+        self.assertEqual(ntk.exception_to_trace_string(OSError(2, 'No such file')), '2\nNo such file')
+        try:
+            try:
+                raise KeyError(5)
+            except KeyError as e:
+                raise ValueError('wrapped') from e
+        except ValueError as e:
+            self.assertEqual(ntk.exception_to_trace_string(e), '5')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import datetime
+import unittest
+import nimble_tk as ntk
+
+
+def generate_in_worker(n):
+    return ntk.generate_ids(n).tolist()
+
+
+class TestIds(unittest.TestCase):
+
+    def test_generate_id(self):
+        ids = [ntk.generate_id() for _ in range(1000)]
+        self.assertEqual(len(set(ids)), 1000)
+        self.assertEqual(ids, sorted(ids))
+        self.assertTrue(all(len(id) == ntk.ID_LENGTH for id in ids))
+        self.assertTrue(ntk.generate_id(prefix='job-').startswith('job-'))
+
+    def test_generate_ids(self):
+        first = ntk.generate_id()
+        ids = ntk.generate_ids(10000)
+        self.assertEqual(ids.dtype, '<U26')
+        self.assertEqual(len(set(ids)), 10000)
+        self.assertEqual(ids.tolist(), sorted(ids.tolist()))
+        self.assertLess(first, ids[0])
+        self.assertLess(ids[-1], ntk.generate_id())
+
+    def test_unique_across_processes(self):
+        results, errors = ntk.run_concurrently([(generate_in_worker, [1000]) for _ in range(4)],
+                                               max_workers=4, fork=True)
+        ids = [id for _, worker_ids in results for id in worker_ids]
+        self.assertEqual(len(set(ids)), 4000)
+
+    def test_get_id_timestamp(self):
+        before = datetime.datetime.now(datetime.timezone.utc)
+        timestamp = ntk.get_id_timestamp(ntk.generate_id())
+        self.assertLess(abs((timestamp - before).total_seconds()), 1)
+
+    def test_generate_pseudo_uuid(self):
+        self.assertTrue(all(len(ntk.generate_pseudo_uuid()) == 23 for _ in range(1000)))
@@ -0,0 +1,41 @@
+import sys
+import unittest
+import subprocess
+import importlib
+import nimble_tk as ntk
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.split()
+
+
+class TestImports(unittest.TestCase):
+
+    def test_import_does_not_load_pandas(self):
+        output = run_python('import sys, nimble_tk; print("pandas" in sys.modules, "IPython" in sys.modules)')
+        self.assertEqual(output[-2:], ['False', 'False'])
+
+    def test_pandas_extensions_registered_on_pandas_import(self):
+        output = run_python('import nimble_tk, pandas as pd; '
+                            'print(hasattr(pd.DataFrame, "memory_report"), hasattr(pd.DataFrame, "rsort"), '
+                            'hasattr(pd.DataFrame, "show"))')
+        self.assertEqual(output[-3:], ['True', 'True', 'True'])
+
+    def test_lazy_names_match_modules(self):
+        for module_name, names in ntk._LAZY_MODULES.items():
+            module = importlib.import_module(f'nimble_tk.{module_name}')
+            public_names = {name for name in vars(module) if not name.startswith('_')}
+            # the modules' own imports of nimble_tk packages are not re-exported
+            public_names.discard('common')
+            self.assertEqual(set(names), public_names, module_name)
+
+    def test_lazy_access(self):
+        self.assertIs(ntk.mcut, importlib.import_module('nimble_tk.analytics.pandas_utils').mcut)
+        self.assertIs(ntk.format_spoken, importlib.import_module('nimble_tk.analytics.string_utils').format_spoken)
+        self.assertIn('df_display', dir(ntk))
+        with self.assertRaises(AttributeError):
+            ntk.no_such_function
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import gzip
+import tempfile
+import unittest
+import time
+import pandas as pd
+import nimble_tk as ntk
+
+
+class TestLinux(unittest.TestCase):
+
+    def test_line_splitter(self):
+        splitter = ntk.LineSplitter()
+        self.assertEqual(splitter.feed(b'ab'), [])
+        self.assertEqual(splitter.feed(b'c\nde'), [b'abc'])
+        self.assertEqual(splitter.feed(b'\n\nf'), [b'de', b''])
+        self.assertEqual(splitter.flush(), [b'f'])
+
+    def test_stream_gzip_decompress_multi_member(self):
+        data = gzip.compress(b'line 1\nline 2\n') + gzip.compress(b'line 3\nline 4')
+        blocks = [data[i:i + 5] for i in range(0, len(data), 5)]
+        self.assertEqual(list(ntk.stream_gzip_decompress(blocks)),
+                         [b'line 1\n', b'line 2\n', b'line 3\n', b'line 4'])
+
+    def test_run_command_return_iter_compress(self):
+        lines, p = ntk.run_command_return_iter('seq 1 3; echo done', compress=True, log=False)
+        self.assertEqual(list(lines), ['1\n', '2\n', '3\n', 'done\n'])
+        p.wait()
+
+    def test_run_command_capture(self):
+        output = bytearray()
+        self.assertEqual(ntk.run_command('seq 1 3', log=False, capture=output), 0)
+        self.assertEqual(output, b'1\n2\n3\n')
+
+    def test_run_command_batched_logging(self):
+        logged = []
+        ntk.run_command('seq 1 3', log_info=lambda *msgs: logged.append(msgs))
+        self.assertIn(('1\n2\n3',), logged)
+
+    def test_run_command_iter_output(self):
+        command = "seq 1 2; printf 'x'"
+        self.assertEqual(list(ntk.run_command_iter_output(command, log=False)), ['1\n', '2\n', 'x'])
+        self.assertEqual(''.join(ntk.run_command_iter_output(command, log=False, output='chunks', block_size=1)),
+                         '1\n2\nx')
+        self.assertEqual(ntk.run_command_return_output('seq 1 3', log=False), '1\n2\n3')
+
+    def test_run_commands(self):
+        results = ntk.run_commands(['echo a; echo b', 'exit 3', 'sleep 30 & sleep 30'],
+                                   max_parallel=2, timeout=1, kill_grace=1, log=False)
+        self.assertEqual([result.returncode for result in results[:2]], [0, 3])
+        self.assertEqual(results[0].tail, ['a', 'b'])
+        self.assertTrue(results[2].timed_out)
+        self.assertFalse(results[0].timed_out)
+        self.assertLess(results[2].elapsed.total_seconds(), 10)
+        # an error in the loop kills the commands still running
+        def log_info(msg):
+            if msg == '[1] boom':
+                raise KeyboardInterrupt
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(KeyboardInterrupt):
+                ntk.run_commands([f'echo $$ > {tmp_dir}/pid; exec sleep 30', 'sleep 0.1; echo boom'],
+                                 log_info=log_info)
+            with self.assertRaises(ProcessLookupError):
+                os.kill(int(ntk.read_file(f'{tmp_dir}/pid')), 0)
+        # a child in another session keeps the output open after the kill
+        start = time.monotonic()
+        results = ntk.run_commands(['setsid sleep 3 & sleep 3'], timeout=0.2, kill_grace=0.2, log=False)
+        self.assertTrue(results[0].timed_out)
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_run_command_to_df(self):
+        df = ntk.run_command_to_df("printf 'A,B\\n1,x\\n2,y\\n'", log=False)
+        self.assertEqual(df.A.tolist(), [1, 2])
+        self.assertEqual(df.B.tolist(), ['x', 'y'])
+
+        chunks = list(ntk.run_command_to_df("printf '{\"A\": 1}\\n{\"A\": 2}\\n{\"A\": 3}\\n'",
+                                            format='jsonl', chunksize=2, log=False))
+        self.assertEqual([chunk.A.tolist() for chunk in chunks], [[1, 2], [3]])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chunks = ntk.run_command_to_df(f'touch {tmp_dir}/started; seq 1 1000000', chunksize=10, header=None,
+                                           log=False)
+            self.assertFalse(os.path.exists(f'{tmp_dir}/started'))
+            self.assertEqual(next(chunks)[0].tolist(), list(range(1, 11)))
+            self.assertTrue(os.path.exists(f'{tmp_dir}/started'))
+            chunks.close()
+
+        with self.assertRaises(ValueError):
+            ntk.run_command_to_df("echo A; exit 1", log=False)
+        # no output: the exit status and stderr are reported, not pandas' EmptyDataError
+        for chunksize in [None, 10]:
+            with self.assertRaisesRegex(ValueError, 'exit status: 3 - stderr: boom') as context:
+                df = ntk.run_command_to_df("sh -c 'echo boom >&2; exit 3'", chunksize=chunksize, log=False)
+                if chunksize:
+                    list(df)
+            self.assertIsInstance(context.exception.__cause__, pd.errors.EmptyDataError)
+
+    def test_run_command_track_resources(self):
+        returncode, elapsed, report = ntk.run_command('sleep 0.2', log=False, track_time=True,
+                                                      track_resources=True, resource_sample_interval=0.05)
+        self.assertEqual(returncode, 0)
+        self.assertGreaterEqual(report.elapsed.total_seconds(), 0.2)
+        self.assertGreater(report.num_samples, 1)
+        self.assertLess(report.cpu_utilization, 0.5)
+        self.assertIn('max_rss_bytes', report.to_dict())
+
+        returncode, report = ntk.run_command('exit 3', log=False, fail_on_error=False, track_resources=True)
+        self.assertEqual(returncode, 3)
+        returncode, report = ntk.run_command('kill -9 $$', log=False, fail_on_error=False, track_resources=True)
+        self.assertEqual(returncode, -9)
@@ -0,0 +1,64 @@
+import asyncio
+import unittest
+import nimble_tk as ntk
+
+
+class ListLogger:
+
+    def __init__(self):
+        self.msgs = []
+
+    def info(self, msg):
+        self.msgs.append(msg)
+
+    error = info
+
+
+class TestLogger(unittest.TestCase):
+
+    def test_rate_limit(self):
+        list_logger = ListLogger()
+        logger = ntk.Logger(logger=list_logger, rate_limiter=ntk.LogRateLimiter(rate=0, burst=2))
+        list_logger.msgs.clear()
+        for i in range(10):
+            logger.log_info_file(f'message {i}', rate_limit_key='msg')
+        self.assertEqual(list_logger.msgs, [' message 0', ' message 1'])
+
+        logger.flush_suppressed()
+        self.assertEqual(list_logger.msgs[-1], ' suppressed 8 similar messages for key: msg')
+
+    def test_rate_limit_reports_suppressed(self):
+        limiter = ntk.LogRateLimiter(rate=0, burst=1)
+        self.assertEqual(limiter.acquire('k'), (True, 0))
+        self.assertEqual(limiter.acquire('k'), (False, 0))
+        self.assertEqual(limiter.acquire('k'), (False, 0))
+        # refill the bucket by hand
+        limiter._buckets['k'][0] = 1
+        self.assertEqual(limiter.acquire('k'), (True, 2))
+
+    def test_sample_rate(self):
+        list_logger = ListLogger()
+        logger = ntk.Logger(logger=list_logger)
+        list_logger.msgs.clear()
+        for i in range(100):
+            logger.log_info_file('never', sample_rate=0)
+            logger.log_info_file('always', sample_rate=1)
+        self.assertEqual(len(list_logger.msgs), 100)
+        self.assertTrue(all(msg == ' always' for msg in list_logger.msgs))
+
+    def test_context_log_prefix(self):
+        list_logger = ListLogger()
+        logger = ntk.Logger(logger=list_logger)
+        list_logger.msgs.clear()
+
+        async def task(prefix):
+            ntk.set_context_log_prefix(prefix)
+            await asyncio.sleep(0.01)
+            logger.log_info_file('message')
+
+        async def main():
+            await asyncio.gather(task('[A]'), task('[B]'))
+            logger.log_info_file('message')
+
+        asyncio.run(main())
+        self.assertEqual(sorted(list_logger.msgs), [' message', '[A] message', '[B] message'])
@@ -0,0 +1,36 @@
+import unittest
+import tracemalloc
+import nimble_tk as ntk
+
+
+class TestMemory(unittest.TestCase):
+
+    def test_get_process_memory(self):
+        memory = ntk.get_process_memory()
+        self.assertGreater(memory['rss_bytes'], 0)
+        self.assertGreaterEqual(memory['peak_rss_bytes'], memory['rss_bytes'])
+
+    def test_trace_memory(self):
+        with ntk.trace_memory('test', log=False) as tracer:
+            data = [str(i) * 10 for i in range(10000)]
+        self.assertGreater(tracer.allocated_bytes, 10000 * 10)
+        self.assertGreaterEqual(tracer.peak_bytes, tracer.allocated_bytes)
+        self.assertTrue(tracer.diff[0].traceback[0].filename.endswith('test_memory.py'))
+        self.assertIn('Memory trace test', tracer.report())
+        del data
+
+    def test_trace_memory_without_reset_peak(self):
+        # python 3.8
+        reset_peak = tracemalloc.reset_peak
+        del tracemalloc.reset_peak
+        try:
+            with ntk.trace_memory('test', log=False) as tracer:
+                data = [str(i) * 10 for i in range(10000)]
+        finally:
+            tracemalloc.reset_peak = reset_peak
+        self.assertGreaterEqual(tracer.peak_bytes, tracer.allocated_bytes)
+        del data
+
+    def test_format_bytes(self):
+        self.assertEqual(ntk.format_bytes(512), '512 B')
+        self.assertEqual(ntk.format_bytes(-1.5 * 1024 * 1024), '-1.50 MiB')
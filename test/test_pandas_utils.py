@@ -1,5 +1,11 @@
+import os
+import pickle
+import tempfile
 import unittest
+from collections import namedtuple
+import numpy as np
 import pandas as pd
+import nimble_tk as ntk
 
 class TestPandasUtils(unittest.TestCase):
 
@@ -14,3 +20,130 @@ class TestPandasUtils(unittest.TestCase):
         df_ref = pd.DataFrame({'COUNT':[3, 2], 'PERC':[.6, .4]}, index=['a', 'b'])
         df_vcp = df.B.vcp()
         self.assertTrue(df_vcp.equals(df_ref))
+
+    def test_memory_report(self):
+        df = pd.DataFrame({'A': np.arange(1000), 'B': np.arange(1000) / 2,
+                           'C': np.random.rand(1000), 'D': ['a', 'b'] * 500})
+        df_report = df.memory_report().set_index('COLUMN')
+        self.assertEqual(df_report.SUGGESTED_DTYPE.fillna('').tolist(), ['', 'uint16', 'float32', '', 'category'])
+        self.assertEqual(df_report.loc['A', 'PROJECTED_BYTES'], 2000)
+        self.assertEqual(df_report.loc['C', 'SAVINGS_BYTES'], 0)
+        self.assertGreater(df_report.loc['D', 'SAVINGS_BYTES'], 0)
+
+    def test_optimize_dtypes(self):
+        df = pd.DataFrame({'A': np.arange(1000) - 500, 'B': np.arange(1000) / 2,
+                           'C': ['x', 'y', 'z', 'w'] * 250})
+        df_optimized = df.optimize_dtypes(log=False)
+        self.assertEqual([str(dtype) for dtype in df_optimized.dtypes], ['int16', 'float64', 'category'])
+        self.assertTrue(df_optimized.astype({'C': str}).equals(df.astype({'C': str}).astype({'A': 'int16'})))
+        self.assertEqual(str(df.optimize_dtypes(downcast_floats=True, log=False).B.dtype), 'float32')
+
+    def test_read_csv_optimized(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filepath = os.path.join(tmp_dir, 'a.csv')
+            df = pd.DataFrame({'A': list(range(100)) + [100000] * 10, 'B': (['x', 'y'] * 55)})
+            df.to_csv(filepath, index=False)
+            df_read = ntk.read_csv_optimized(filepath, sample_rows=20, chunksize=30, log=False)
+            # values beyond the sample widen the dtype instead of overflowing
+            self.assertEqual(str(df_read.A.dtype), 'uint32')
+            self.assertEqual(str(df_read.B.dtype), 'category')
+            self.assertEqual(df_read.A.tolist(), df.A.tolist())
+            self.assertEqual(df_read.B.tolist(), df.B.tolist())
+
+    def test_to_map(self):
+        df = pd.DataFrame({'K': ['a', 'b', 'a'], 'V': [1, 2, 3]})
+        self.assertEqual(df.to_map('K', 'V'), {'a': 3, 'b': 2})
+
+    def test_to_lookup(self):
+        df = pd.DataFrame({'K': [5, 1, 3, 5], 'V': [1.5, 2.5, 3.5, 4.5]})
+        lookup = df.to_lookup('K', 'V')
+        self.assertEqual(len(lookup), 3)
+        self.assertEqual(lookup[5], 4.5)
+        self.assertNotIn(2, lookup)
+        looked_up = lookup.get(pd.Series([1, 2, 5], index=['x', 'y', 'z']))
+        self.assertEqual(looked_up.index.tolist(), ['x', 'y', 'z'])
+        self.assertTrue(looked_up.equals(pd.Series([2.5, np.nan, 4.5], index=['x', 'y', 'z'])))
+        self.assertEqual(lookup.get([0, 3], default=-1.0).tolist(), [-1.0, 3.5])
+
+    def test_lookup_save_load(self):
+        lookup = ntk.LookupTable(['bb', 'a', 'ccc'], ['B', 'A', 'C'])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            lookup.save(tmp_dir)
+            loaded = ntk.LookupTable.load(tmp_dir)
+            self.assertEqual(loaded.keys.dtype, object)
+            self.assertEqual(loaded.get(['ccc', 'x', None, 'a'], default='').tolist(), ['C', '', '', 'A'])
+            Country = namedtuple('Country', ['name'])
+            countries = ntk.LookupTable(['in', 'us'], [Country('India'), Country('USA')])
+            names = pd.Series(['us', 'xx']).map_attr(countries, 'name')
+            self.assertEqual(names[0], 'USA')
+            self.assertTrue(pd.isna(names[1]))
+
+    def test_lookup_key_types(self):
+        # a long key does not widen the storage of the others
+        keys = ['k' * 100000] + [str(i) for i in range(10000)]
+        lookup = ntk.LookupTable(keys, np.arange(len(keys)))
+        self.assertLess(lookup.keys.nbytes, 1000000)
+        self.assertEqual(lookup.get(['5', 'k' * 100000, 5], default=-1).tolist(), [6, 0, -1])
+        self.assertEqual(pickle.loads(pickle.dumps(lookup))['9999'], 10000)
+        # keys of another type are missing
+        lookup = ntk.LookupTable([1, 3, 5], [1.5, 3.5, 5.5])
+        self.assertEqual(lookup.get(['a', 3, None], default=0.0).tolist(), [0.0, 3.5, 0.0])
+        self.assertNotIn('3', lookup)
+        dates = ntk.LookupTable(pd.to_datetime(['2024-01-01', '2024-01-02']), ['a', 'b'])
+        self.assertEqual(dates.get([1, pd.Timestamp('2024-01-02')], default='').tolist(), ['', 'b'])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            lookup.save(tmp_dir)
+            loaded = ntk.LookupTable.load(tmp_dir)
+            self.assertIsInstance(loaded.values, np.memmap)
+            self.assertEqual(loaded.get(np.array([5, 4])).tolist()[0], 5.5)
+
+    def test_flattened_columns(self):
+        df = pd.DataFrame([[1, 2, 3]], columns=pd.MultiIndex.from_tuples([('A', 'x'), ('B', ''), ('C', 1)]))
+        df_flat = df.flattened_columns()
+        self.assertEqual(df_flat.columns.tolist(), ['A_x', 'B', 'C_1'])
+        self.assertIsInstance(df.columns, pd.MultiIndex)
+        self.assertIsNone(df.flattened_columns(separator='.', inplace=True))
+        self.assertEqual(df.columns.tolist(), ['A.x', 'B', 'C.1'])
+
+    def test_idx_outer_merge(self):
+        df_a = pd.DataFrame({'V': [1, 2, 3]}, index=['c', 'a', 'b'])
+        df_b = pd.DataFrame({'V': [4.0, 5.0], 'W': [1, 2]}, index=['d', 'a'])
+        for kwargs in [{}, {'suffixes': ('', '_B')}]:
+            df_expected = df_a.merge(df_b, left_index=True, right_index=True, how='outer', **kwargs)
+            self.assertTrue(df_a.idx_outer_merge(df_b, **kwargs).equals(df_expected))
+        # duplicate index values go through merge
+        df_c = pd.DataFrame({'X': [1, 2]}, index=['a', 'a'])
+        self.assertEqual(df_a.idx_outer_merge(df_c).X.fillna(0).tolist(), [1, 2, 0, 0])
+
+    def test_idx_outer_merge_all(self):
+        dfs = [pd.DataFrame({f'V{i}': range(3)}, index=np.arange(3) * (i + 1)) for i in range(4)]
+        df_expected = dfs[0]
+        for df in dfs[1:]:
+            df_expected = df_expected.merge(df, left_index=True, right_index=True, how='outer')
+        self.assertTrue(ntk.idx_outer_merge_all(dfs).equals(df_expected))
+        self.assertEqual(ntk.idx_outer_merge_all([dfs[0], dfs[0]]).columns.tolist(), ['V0_x', 'V0_y'])
+        with self.assertRaisesRegex(ValueError, 'No frames to merge'):
+            ntk.idx_outer_merge_all(iter([]))
+
+    def test_remove_tz_info(self):
+        times = pd.Series(pd.date_range('2024-01-01 10:00', periods=3, freq='h', tz='Asia/Kolkata'), index=[5, 6, 7])
+        wall_times = times.remove_tz_info()
+        self.assertEqual(wall_times.index.tolist(), [5, 6, 7])
+        self.assertIsNone(wall_times.dt.tz)
+        self.assertEqual(wall_times[5], pd.Timestamp('2024-01-01 10:00'))
+        self.assertEqual(times.remove_tz_info(wall_time=False)[5], pd.Timestamp('2024-01-01 04:30'))
+        self.assertIs(wall_times.remove_tz_info(), wall_times)
+
+    def test_df_remove_tz_info(self):
+        index = pd.date_range('2024-01-01', periods=2, tz='UTC')
+        df = pd.DataFrame({'T': pd.date_range('2024-06-01', periods=2, tz='Europe/Paris'), 'V': [1, 2]}, index=index)
+        df_naive = df.remove_tz_info()
+        self.assertEqual(df_naive['T'].tolist(), [pd.Timestamp('2024-06-01'), pd.Timestamp('2024-06-02')])
+        self.assertIsNone(df_naive.index.tz)
+        self.assertIsNotNone(df['T'].dt.tz)
+        df.remove_tz_info(wall_time=False, inplace=True)
+        self.assertEqual(df['T'].iloc[0], pd.Timestamp('2024-05-31 22:00'))
+        df_dup = pd.DataFrame([[1, pd.Timestamp('2024-06-01', tz='UTC')]], columns=['T', 'T'])
+        df_dup_naive = df_dup.remove_tz_info()
+        self.assertEqual(df_dup_naive.iloc[0].tolist(), [1, pd.Timestamp('2024-06-01')])
+        self.assertIsNone(df_dup_naive.iloc[:, 1].dt.tz)
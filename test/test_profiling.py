@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+import unittest
+import nimble_tk as ntk
+
+
+def busy(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def run_in_worker():
+    with ntk.profiled('worker'):
+        busy(0.1)
+    return os.getpid()
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        ntk.set_profile_dir(self.tmp_dir.name)
+        ntk.reset_profile()
+
+    def tearDown(self):
+        ntk.set_profile_mode('off')
+        ntk.reset_profile()
+        self.tmp_dir.cleanup()
+
+    def test_off(self):
+        registry_size = len(ntk.timer_registry.timers())
+
+        @ntk.profile
+        def fn():
+            return 1
+
+        self.assertEqual(fn(), 1)
+        with ntk.profiled('off_stage'):
+            pass
+        ntk.flush_profile()
+        self.assertEqual(len(ntk.timer_registry.timers()), registry_size)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_time(self):
+        ntk.set_profile_mode('time')
+
+        @ntk.profile(stage='inner')
+        def inner():
+            time.sleep(0.01)
+
+        with ntk.profiled('outer'):
+            inner()
+            inner()
+        ntk.flush_profile()
+        stacks = ntk.merge_collapsed_stacks(kind='time')
+        self.assertEqual(sorted(stacks), ['outer', 'outer;inner'])
+        self.assertGreaterEqual(stacks['outer;inner'], 20 * 1000)
+        self.assertLess(stacks['outer'], stacks['outer;inner'])
+        self.assertEqual(ntk.timer_registry.get('inner').count % 2, 0)
+
+    def test_sample_across_processes(self):
+        ntk.set_profile_mode('sample')
+        with ntk.profiled('main'):
+            busy(0.1)
+        results, errors = ntk.run_concurrently([(run_in_worker, {}) for _ in range(2)], max_workers=2, fork=True)
+        self.assertEqual(errors, [])
+        ntk.flush_profile()
+
+        output_path = os.path.join(self.tmp_dir.name, 'merged.txt')
+        stacks = ntk.merge_collapsed_stacks(output_path=output_path)
+        stages = {stack.split(';')[0] for stack in stacks}
+        self.assertEqual(stages, {'main', 'worker'})
+        self.assertTrue(any('busy (test_profiling.py:' in stack for stack in stacks))
+        with open(output_path) as reader:
+            self.assertEqual(len(reader.readlines()), len(stacks))
+
+    def test_cprofile(self):
+        ntk.set_profile_mode('cprofile')
+        with ntk.profiled('stage'):
+            busy(0.01)
+        ntk.flush_profile()
+        stats = ntk.merge_cprofile_stats()
+        self.assertTrue(any(func[2] == 'busy' for func in stats.stats))
@@ -0,0 +1,324 @@
+import asyncio
+import datetime
+import threading
+import time
+import unittest
+import nimble_tk as ntk
+from test.test_logger import ListLogger
+
+
+class TestSchedulers(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = ntk.SchedulerEngine(max_workers=4)
+
+    def tearDown(self):
+        self.engine.shutdown()
+
+    def options(self, **kwargs):
+        return ntk.SchedulerOptions(engine=self.engine, **kwargs)
+
+    def test_fixed_delay(self):
+        starts, ends = [], []
+
+        def task():
+            starts.append(time.monotonic())
+            time.sleep(0.05)
+            ends.append(time.monotonic())
+
+        scheduler = ntk.FixedDelayTaskScheduler(0.05, task, log=False, init_interval=0.01, scheduler_options=self.options())
+        time.sleep(0.4)
+        scheduler.shutdown()
+        self.assertGreaterEqual(len(starts), 3)
+        # the delay counts from the end of the previous run
+        for end, next_start in zip(ends, starts[1:]):
+            self.assertGreaterEqual(next_start - end, 0.045)
+
+    def test_fixed_delay_max_interval(self):
+        release = threading.Event()
+        starts = []
+
+        def task():
+            starts.append(time.monotonic())
+            release.wait(1)
+
+        scheduler = ntk.FixedDelayTaskScheduler(0.01, task, log=False, init_interval=0.01, max_interval=0.1,
+                                                scheduler_options=self.options())
+        time.sleep(0.15)
+        release.set()
+        scheduler.shutdown()
+        self.assertEqual(len(starts), 2)
+        self.assertAlmostEqual(starts[1] - starts[0], 0.1, delta=0.05)
+
+    def test_fixed_delay_max_interval_recovers(self):
+        list_logger = ListLogger()
+        logger = ntk.common.logger.default_logger
+        ntk.init_file_logger(None, logger=list_logger)
+        release = threading.Event()
+        starts = []
+
+        def task():
+            starts.append(time.monotonic())
+            if len(starts) == 1:
+                # only the first run hangs
+                release.wait(1)
+
+        try:
+            scheduler = ntk.FixedDelayTaskScheduler(0.02, task, log=False, init_interval=0.01, max_interval=0.05,
+                                                    scheduler_options=self.options())
+            time.sleep(0.3)
+            release.set()
+            scheduler.shutdown()
+        finally:
+            ntk.common.logger.default_logger = logger
+        # runs continue every ~20 ms after the replacement of the stuck run
+        self.assertGreater(len(starts), 6)
+        self.assertEqual(sum('more than 0.05 seconds' in msg for msg in list_logger.msgs), 1)
+
+    def test_fixed_rate(self):
+        starts = []
+        scheduler = ntk.FixedRateTaskScheduler(0.05, lambda: starts.append(time.monotonic()), log=False,
+                                               scheduler_options=self.options())
+        time.sleep(0.53)
+        scheduler.shutdown()
+        self.assertIn(len(starts), [9, 10, 11])
+        # starts do not drift
+        self.assertAlmostEqual(starts[-1] - starts[0], 0.05 * (len(starts) - 1), delta=0.03)
+
+    def test_shared_threads(self):
+        counts = [0] * 20
+        num_threads = threading.active_count()
+
+        def task(i):
+            counts[i] += 1
+
+        schedulers = [ntk.FixedDelayTaskScheduler(0.01, task, False, False, None, None, i, scheduler_options=self.options())
+                      for i in range(20)]
+        time.sleep(0.3)
+        for scheduler in schedulers:
+            scheduler.shutdown()
+        self.assertTrue(all(count >= 5 for count in counts))
+        # a dispatcher plus at most max_workers workers
+        self.assertLessEqual(threading.active_count() - num_threads, 1 + self.engine.max_workers)
+
+    def test_function_kwargs(self):
+        calls = []
+
+        def task(name, overlap, engine=None):
+            calls.append((name, overlap, engine))
+
+        scheduler = ntk.FixedDelayTaskScheduler(1, task, log=False, init_interval=0.01, name='x', overlap=1,
+                                                engine='e', scheduler_options=self.options(name='task'))
+        time.sleep(0.1)
+        scheduler.shutdown()
+        self.assertEqual(calls, [('x', 1, 'e')])
+        self.assertEqual(scheduler.name, 'task')
+        with self.assertRaises(ValueError):
+            ntk.SchedulerOptions(overlap='wait')
+
+    def test_cron_update_interval(self):
+        scheduler = ntk.CronTaskScheduler('0 0 1 1 *', lambda: None, log=False, scheduler_options=self.options())
+        with self.assertRaises(TypeError):
+            scheduler.update_interval(10)
+        scheduler.shutdown()
+
+    def test_default_engine_recreated(self):
+        engine = ntk.get_default_scheduler_engine()
+        engine.shutdown()
+        starts = []
+        scheduler = ntk.FixedDelayTaskScheduler(1, lambda: starts.append(1), log=False, init_interval=0.01)
+        time.sleep(0.1)
+        scheduler.shutdown()
+        self.assertIsNot(scheduler.engine, engine)
+        self.assertEqual(starts, [1])
+
+    def test_cron_expression(self):
+        cron = ntk.CronExpression('*/15 9-17 * * 1-5')
+        # a friday evening is followed by a monday morning
+        self.assertEqual(cron.next_after(datetime.datetime(2024, 5, 3, 17, 50)), datetime.datetime(2024, 5, 6, 9, 0))
+        self.assertEqual(cron.next_after(datetime.datetime(2024, 5, 6, 9, 0)), datetime.datetime(2024, 5, 6, 9, 15))
+        self.assertEqual(ntk.CronExpression('0 0 29 2 *').next_after(datetime.datetime(2024, 3, 1)),
+                         datetime.datetime(2028, 2, 29))
+        # day of month or day of week, when both are restricted
+        self.assertEqual(ntk.CronExpression('0 0 13 * 5').next_after(datetime.datetime(2024, 5, 1)),
+                         datetime.datetime(2024, 5, 3))
+        self.assertEqual(ntk.CronExpression('@daily').next_after(datetime.datetime(2024, 5, 1, 10)),
+                         datetime.datetime(2024, 5, 2))
+        with self.assertRaises(ValueError):
+            ntk.CronExpression('61 * * * *')
+        with self.assertRaises(ValueError):
+            ntk.CronExpression('0 0 31 2 *').next_after(datetime.datetime(2024, 1, 1))
+
+    def run_overlapping(self, overlap, **kwargs):
+        """Runs a task taking 0.12s every 0.05s, for 0.275s."""
+        starts = []
+
+        def task():
+            starts.append(time.monotonic())
+            for _ in range(12):
+                if ntk.is_run_cancelled():
+                    return
+                time.sleep(0.01)
+
+        scheduler = ntk.FixedRateTaskScheduler(0.05, task, log=False,
+                                               scheduler_options=self.options(overlap=overlap, **kwargs))
+        time.sleep(0.275)
+        scheduler.shutdown()
+        return starts, scheduler.get_metrics()
+
+    def test_overlap_skip(self):
+        starts, metrics = self.run_overlapping('skip')
+        self.assertEqual(len(starts), 2)
+        self.assertGreaterEqual(metrics['skipped'], 3)
+
+    def test_overlap_queue(self):
+        starts, metrics = self.run_overlapping('queue')
+        # runs follow each other
+        self.assertEqual(len(starts), 2)
+        self.assertAlmostEqual(starts[1] - starts[0], 0.12, delta=0.03)
+
+    def test_overlap_allow(self):
+        starts, metrics = self.run_overlapping('allow', max_concurrent=4)
+        self.assertEqual(len(starts), 5)
+        self.assertEqual(metrics['skipped'], 0)
+
+    def test_overlap_cancel(self):
+        starts, metrics = self.run_overlapping('cancel')
+        self.assertEqual(len(starts), 5)
+        self.assertEqual(metrics['cancelled'], 4)
+
+    def test_start_jitter(self):
+        starts = []
+        created = time.monotonic()
+        schedulers = [ntk.FixedDelayTaskScheduler(10, lambda: starts.append(time.monotonic()), log=False,
+                                                  init_interval=0.01,
+                                                  scheduler_options=self.options(start_jitter=0.2))
+                      for _ in range(10)]
+        time.sleep(0.35)
+        for scheduler in schedulers:
+            scheduler.shutdown()
+        self.assertEqual(len(starts), 10)
+        self.assertTrue(all(0.01 <= start - created <= 0.25 for start in starts))
+        self.assertGreater(max(starts) - min(starts), 0.05)
+
+    def test_misfire(self):
+        for misfire, expected_runs in [('coalesce', 2), ('catch_up', 4)]:
+            starts = []
+            scheduler = ntk.FixedRateTaskScheduler(0.05, lambda: starts.append(time.monotonic()), log=False,
+                                                   scheduler_options=self.options(misfire=misfire))
+            time.sleep(0.06)
+            # block the dispatcher past 2 more due times
+            self.engine.call_later(0, lambda: time.sleep(0.15))
+            time.sleep(0.17)
+            scheduler.shutdown()
+            self.assertEqual(scheduler.get_metrics()['missed'], 2)
+            self.assertEqual(len(starts), expected_runs)
+
+    def test_metrics(self):
+        def task():
+            raise ValueError('failed')
+
+        scheduler = ntk.FixedDelayTaskScheduler(0.02, task, log=False, init_interval=0.01,
+                                                scheduler_options=self.options(name='test_metrics'))
+        time.sleep(0.1)
+        scheduler.shutdown()
+        metrics = scheduler.get_metrics()
+        self.assertGreaterEqual(metrics['runs'], 2)
+        self.assertEqual(metrics['failed'], metrics['runs'])
+        self.assertEqual(metrics['duration_count'], metrics['runs'])
+        self.assertIn('scheduler.test_metrics', ntk.get_timer_stats_df().name.tolist())
+
+    def test_async_fixed_delay(self):
+        list_logger = ListLogger()
+        logger = ntk.common.logger.default_logger
+        ntk.init_file_logger(None, logger=list_logger)
+
+        async def task(durations):
+            start = time.monotonic()
+            await asyncio.sleep(0.03)
+            durations.append((start, time.monotonic()))
+
+        async def other_task():
+            await asyncio.sleep(0.05)
+            ntk.log_info_file('other task')
+
+        async def main():
+            durations = []
+            scheduler = ntk.AsyncFixedDelayTaskScheduler(0.05, task, '[async]', True, 0.01, None, durations)
+            await other_task()
+            await asyncio.sleep(0.2)
+            scheduler.update_interval(0.02)
+            await asyncio.sleep(0.02)
+            # shutdown waits for the run in flight
+            await scheduler.shutdown()
+            self.assertFalse(scheduler.is_running)
+            return durations, scheduler.get_metrics()
+
+        try:
+            durations, metrics = asyncio.run(main())
+        finally:
+            ntk.common.logger.default_logger = logger
+        self.assertEqual(metrics['runs'], len(durations))
+        self.assertGreaterEqual(len(durations), 3)
+        for (_, end), (next_start, _) in zip(durations, durations[1:]):
+            self.assertGreaterEqual(next_start - end, 0.015)
+        self.assertIn(' other task', list_logger.msgs)
+        self.assertTrue(all(msg.startswith('[async]') for msg in list_logger.msgs
+                            if 'Function' in msg))
+
+    def test_async_max_interval(self):
+        async def main():
+            starts = []
+
+            async def task():
+                starts.append(time.monotonic())
+                await asyncio.sleep(1)
+
+            scheduler = ntk.AsyncFixedDelayTaskScheduler(0.01, task, log=False, init_interval=0.01, max_interval=0.05)
+            await asyncio.sleep(0.2)
+            await scheduler.shutdown(timeout=0.01)
+            return starts
+
+        starts = asyncio.run(main())
+        # the stuck run and one more
+        self.assertEqual(len(starts), 2)
+
+    def test_async_max_interval_recovers(self):
+        async def main():
+            starts = []
+
+            async def task():
+                starts.append(time.monotonic())
+                if len(starts) == 1:
+                    # only the first run hangs
+                    await asyncio.sleep(10)
+
+            scheduler = ntk.AsyncFixedDelayTaskScheduler(0.02, task, log=False, init_interval=0.01, max_interval=0.05)
+            await asyncio.sleep(0.3)
+            await scheduler.shutdown(timeout=0.01)
+            return starts
+
+        starts = asyncio.run(main())
+        # runs continue every ~20 ms after the replacement of the stuck run
+        self.assertGreater(len(starts), 6)
+
+    def test_async_shutdown_timeout(self):
+        async def main():
+            cancelled = []
+
+            async def task():
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+
+            scheduler = ntk.AsyncFixedDelayTaskScheduler(1, task, log=False, init_interval=0.01)
+            await asyncio.sleep(0.05)
+            start = time.monotonic()
+            await scheduler.shutdown(timeout=0.05)
+            return cancelled, time.monotonic() - start
+
+        cancelled, shutdown_seconds = asyncio.run(main())
+        self.assertEqual(cancelled, [True])
+        self.assertLess(shutdown_seconds, 0.5)
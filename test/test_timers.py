@@ -0,0 +1,48 @@
+import random
+import time
+import unittest
+import nimble_tk as ntk
+
+
+class TestTimers(unittest.TestCase):
+
+    def test_timer_stats_percentiles(self):
+        stats = ntk.TimerStats('test')
+        values = list(range(1, 100001))
+        random.shuffle(values)
+        for value in values:
+            stats.record(value)
+        self.assertEqual(stats.count, 100000)
+        self.assertEqual((stats.min_ns, stats.max_ns), (1, 100000))
+        self.assertAlmostEqual(stats.percentile(50) / 50000, 1, delta=0.07)
+        self.assertAlmostEqual(stats.percentile(99) / 99000, 1, delta=0.07)
+        self.assertEqual(stats.percentile(100), 100000)
+
+    def test_timed(self):
+        registry = ntk.TimerRegistry()
+
+        @ntk.timed('fn', registry=registry)
+        def fn():
+            pass
+
+        for _ in range(3):
+            fn()
+        with ntk.timed('block', registry=registry):
+            pass
+        df = registry.to_df()
+        self.assertEqual(df.name.tolist(), ['fn', 'block'])
+        self.assertEqual(df['count'].tolist(), [3, 1])
+
+    def test_stopwatch(self):
+        registry = ntk.TimerRegistry()
+        with ntk.StopWatch('job', registry=registry) as stopwatch:
+            time.sleep(0.01)
+            stopwatch.lap('sleep')
+            stopwatch.lap()
+        self.assertEqual([name for name, _ in stopwatch.laps], ['sleep', '2'])
+        self.assertGreaterEqual(stopwatch.laps[0][1], 10 * 1000 * 1000)
+        self.assertEqual([timer.name for timer in registry.timers()], ['job.sleep', 'job.2', 'job'])
+
+    def test_format_hhmmss(self):
+        two_days = 2 * 24 * 60 * 60
+        self.assertEqual(ntk.StopWatch.format_hhmmss(int((two_days + 3661.5) * 1e9)), '49:01:01.500')